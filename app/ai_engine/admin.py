@@ -103,7 +103,7 @@ class DataSourceAdmin(admin.ModelAdmin):
             'fields': ('url', 'api_endpoint', 'api_key', 'scraping_interval')
         }),
         ('สถิติ', {
-            'fields': ('last_scraped',),
+            'fields': ('last_scraped', 'last_ingested_at', 'last_ingested_id'),
             'classes': ('collapse',)
         })
     )
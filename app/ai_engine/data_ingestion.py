@@ -3,120 +3,165 @@ Data Ingestion System
 ระบบเก็บข้อมูลอัตโนมัติสำหรับ AI
 """
 
-import re
 import json
 import requests
 import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, NamedTuple, Optional, Any
 from django.utils import timezone
 from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Q
 import logging
 
 from .models import DataSource, DataIngestionRecord
+from .text_analytics import TextAnalysis, extract_numbers, text_analyzer
 from news.models import NewsArticle
 from dreams.models import DreamInterpretation
 
 logger = logging.getLogger(__name__)
 
+# ประเภทแหล่งข้อมูลที่ DataIngestionManager เก็บข้อมูลได้
+INGESTION_SOURCE_TYPES = ('news', 'social_media', 'dreams', 'trends')
+
+
+class IngestionCursor(NamedTuple):
+    """ตำแหน่งของข้อมูลต้นทางที่เก็บถึงแล้ว (เวลา และ id ของแถวสุดท้ายถ้ามี)"""
+    timestamp: datetime
+    id: Optional[int] = None
+
+
+class SourceRunReport(NamedTuple):
+    """ผลการเก็บข้อมูลของแหล่งข้อมูลหนึ่งใน run_all_ingestors"""
+    source_id: int
+    name: str
+    source_type: str
+    records: int
+    seconds: float
+    error: Optional[str] = None
+
+
+def after_cursor(queryset, data_source: DataSource, time_field: str, since: datetime):
+    """
+    แถวที่ใหม่กว่า cursor ของแหล่งข้อมูล (และไม่เก่ากว่า since) เรียงจากเก่าไปใหม่
+    แถวที่เวลาเท่ากับ cursor ใช้ id ตัดสิน จึงไม่ข้ามแถวที่เวลาซ้ำกัน
+    """
+    queryset = queryset.filter(**{f'{time_field}__gte': since})
+    
+    last_at = data_source.last_ingested_at
+    if last_at is not None:
+        if data_source.last_ingested_id is None:
+            queryset = queryset.filter(**{f'{time_field}__gt': last_at})
+        else:
+            queryset = queryset.filter(
+                Q(**{f'{time_field}__gt': last_at}) |
+                Q(**{time_field: last_at, 'id__gt': data_source.last_ingested_id})
+            )
+    
+    return queryset.order_by(time_field, 'id')
+
+
+def advance_cursor(data_source: DataSource, cursor: IngestionCursor):
+    """บันทึก cursor ใหม่ของแหล่งข้อมูล (อัปเดตเฉพาะฟิลด์ cursor)"""
+    data_source.last_ingested_at = cursor.timestamp
+    data_source.last_ingested_id = cursor.id
+    DataSource.objects.filter(pk=data_source.pk).update(
+        last_ingested_at=cursor.timestamp,
+        last_ingested_id=cursor.id
+    )
+
+
+def create_ingestion_records(records: List[DataIngestionRecord]) -> List[DataIngestionRecord]:
+    """
+    bulk_create ทั้งชุด ถ้าฐานข้อมูลปฏิเสธแถวใดแถวหนึ่ง บันทึกทีละแถวแทนแล้วข้ามเฉพาะแถวที่ผิดพลาด
+    (แต่ละครั้งอยู่ใน savepoint ของตัวเอง transaction ภายนอกจึงใช้ต่อได้)
+    """
+    try:
+        with transaction.atomic():
+            return DataIngestionRecord.objects.bulk_create(records, batch_size=500)
+    except DatabaseError as e:
+        logger.warning(f"Bulk insert of {len(records)} ingestion records failed, saving one by one: {str(e)}")
+    
+    saved = []
+    for record in records:
+        # batch ที่บันทึกสำเร็จก่อนหน้าถูก rollback ไปแล้ว
+        record.pk = None
+        try:
+            with transaction.atomic():
+                record.save(force_insert=True)
+        except DatabaseError as e:
+            logger.error(f"Skipping ingestion record '{record.title[:50]}': {str(e)}")
+            continue
+        saved.append(record)
+    return saved
+
+
+def save_ingestion_records(data_source: DataSource, records: List[DataIngestionRecord],
+                           skip_existing_titles: bool = False,
+                           cursor: Optional[IngestionCursor] = None) -> List[DataIngestionRecord]:
+    """
+    บันทึก DataIngestionRecord ที่ยังไม่ได้บันทึกทั้งชุดด้วย bulk_create ใน transaction เดียว
+    แถวที่ฐานข้อมูลไม่รับจะถูกข้าม (ดู create_ingestion_records) ไม่ทำให้ทั้งชุดล้มเหลว
+    skip_existing_titles: ข้ามหัวข้อที่แหล่งข้อมูลนี้เคยเก็บแล้ว (ตรวจด้วย query เดียว) และหัวข้อซ้ำในชุด
+    cursor: เลื่อน cursor ของแหล่งข้อมูลใน transaction เดียวกับการบันทึก
+    จำนวน query คงที่ไม่ว่าจะมีกี่รายการ
+    """
+    if skip_existing_titles and records:
+        seen = set(DataIngestionRecord.objects.filter(
+            data_source=data_source,
+            title__in={record.title for record in records}
+        ).values_list('title', flat=True))
+        
+        new_records = []
+        for record in records:
+            if record.title in seen:
+                continue  # ข้ามถ้า ingest แล้ว
+            seen.add(record.title)
+            new_records.append(record)
+        records = new_records
+    
+    if not records and cursor is None:
+        return []
+    
+    with transaction.atomic():
+        if records:
+            records = create_ingestion_records(records)
+        if cursor is not None:
+            advance_cursor(data_source, cursor)
+    return records
+
+
 class TextProcessor:
-    """ประมวลผลข้อความและสกัดข้อมูล"""
+    """ประมวลผลข้อความและสกัดข้อมูล (ใช้ TextAnalyzer ที่คอมไพล์ไว้แล้วใน text_analytics)"""
+    
+    @staticmethod
+    def analyze(text: str) -> TextAnalysis:
+        """สกัดตัวเลข คำสำคัญ คะแนนอารมณ์ และความเกี่ยวข้องในการสแกนรอบเดียว"""
+        return text_analyzer.analyze(text)
+    
+    @staticmethod
+    def analyze_many(texts: List[str]) -> List[TextAnalysis]:
+        """วิเคราะห์หลายข้อความพร้อมกัน"""
+        return text_analyzer.analyze_many(texts)
     
     @staticmethod
     def extract_numbers_from_text(text: str) -> List[str]:
         """สกัดตัวเลขจากข้อความ"""
         if not text:
             return []
-            
-        # ค้นหาตัวเลข 1-6 หลัก
-        patterns = [
-            r'\b\d{1}\b',   # เลข 1 หลัก
-            r'\b\d{2}\b',   # เลข 2 หลัก
-            r'\b\d{3}\b',   # เลข 3 หลัก
-            r'\b\d{4}\b',   # เลข 4 หลัก
-            r'\b\d{6}\b'    # เลข 6 หลัก (หวย)
-        ]
-        
-        numbers = []
-        for pattern in patterns:
-            matches = re.findall(pattern, text)
-            numbers.extend(matches)
-        
-        # กรองเลขที่ไม่ใช่ปี
-        filtered_numbers = []
-        for num in numbers:
-            # ข้ามปี ค.ศ.
-            if len(num) == 4 and (num.startswith('19') or num.startswith('20')):
-                continue
-            # ข้ามเลขที่มีค่าน้อยเกินไป
-            if len(num) == 1 and int(num) < 1:
-                continue
-                
-            filtered_numbers.append(num)
-        
-        return list(set(filtered_numbers))  # ไม่ซ้ำ
+        return extract_numbers(text)
     
     @staticmethod
     def extract_keywords(text: str) -> List[str]:
         """สกัดคำสำคัญ"""
-        if not text:
-            return []
-            
-        # คำสำคัญที่เกี่ยวข้องกับหวย
-        lottery_keywords = [
-            'หวย', 'ลอตเตอรี่', 'เลข', 'งวด', 'ออก', 'รางวัล',
-            'เด็ด', 'ดัง', 'แม่น', 'ถูก', 'รวย', 'โชค',
-            'ทำนาย', 'พยากรณ์', 'วิเคราะห์', 'สถิติ',
-            'ความฝัน', 'ฝัน', 'เฮง', 'มงคล', 'ศาล', 'วัด'
-        ]
-        
-        # ความฝันและสัญลักษณ์
-        dream_symbols = [
-            'งู', 'ช้าง', 'ปลา', 'นก', 'แมว', 'หมา', 'เสือ', 'หนู',
-            'ผี', 'เทพ', 'พระ', 'แม่', 'พ่อ', 'ลิง', 'กบ', 'เต่า',
-            'น้ำ', 'ไฟ', 'ฟ้า', 'ดิน', 'ต้นไม้', 'ดอกไม้', 'บ้าน', 'รถ'
-        ]
-        
-        all_keywords = lottery_keywords + dream_symbols
-        found_keywords = []
-        
-        text_lower = text.lower()
-        for keyword in all_keywords:
-            if keyword in text_lower:
-                found_keywords.append(keyword)
-        
-        return found_keywords
+        return text_analyzer.analyze(text).keywords
     
     @staticmethod
     def calculate_sentiment_score(text: str) -> float:
         """คำนวณคะแนนอารมณ์ (sentiment)"""
-        if not text:
-            return 0.5
-            
-        # คำบวก
-        positive_words = [
-            'ดี', 'เยี่ยม', 'ยอด', 'สุดยอด', 'แม่น', 'ถูก', 'รวย', 
-            'โชค', 'เฮง', 'มงคล', 'ได้', 'ชนะ', 'รางวัล', 'ดัง'
-        ]
-        
-        # คำลบ
-        negative_words = [
-            'แย่', 'เสีย', 'เสี่ยง', 'อันตราย', 'ผิด', 'พลาด', 
-            'เสียใจ', 'โชคร้าย', 'ล้มเหลว', 'ปัญหา', 'ลำบาก'
-        ]
-        
-        text_lower = text.lower()
-        
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
-        
-        total_words = len(text.split())
-        if total_words == 0:
-            return 0.5
-            
-        # คำนวณคะแนน (0-1)
-        score = 0.5 + (positive_count - negative_count) / (total_words * 2)
-        return max(0.0, min(1.0, score))
+        return text_analyzer.analyze(text).sentiment_score
     
     @staticmethod
     def calculate_relevance_score(title: str, content: str) -> float:
@@ -124,30 +169,14 @@ class TextProcessor:
         
         if not title and not content:
             return 0.0
-            
-        full_text = f"{title} {content}".lower()
-        
-        # คำสำคัญหลัก (น้ำหนักสูง)
-        main_keywords = ['หวย', 'ลอตเตอรี่', 'เลขเด็ด', 'ทำนาย', 'รางวัล']
-        main_score = sum(2 for keyword in main_keywords if keyword in full_text)
-        
-        # คำสำคัญรอง (น้ำหนักปานกลาง)
-        secondary_keywords = ['เลข', 'งวด', 'ออก', 'แม่น', 'ถูก', 'โชค', 'เฮง']
-        secondary_score = sum(1 for keyword in secondary_keywords if keyword in full_text)
-        
-        # คำสำคัญความฝัน (น้ำหนักต่ำ)
-        dream_keywords = ['ฝัน', 'ความฝัน', 'งู', 'ช้าง', 'ปลา']
-        dream_score = sum(0.5 for keyword in dream_keywords if keyword in full_text)
-        
-        total_score = main_score + secondary_score + dream_score
-        max_possible_score = len(main_keywords) * 2 + len(secondary_keywords) + len(dream_keywords) * 0.5
-        
-        relevance = total_score / max_possible_score if max_possible_score > 0 else 0
-        return min(1.0, relevance)
+        return text_analyzer.analyze(f"{title} {content}").relevance_score
 
 class NewsIngester:
     """เก็บข้อมูลจากข่าวสาร"""
     
+    # จำนวนข่าวใหม่สูงสุดต่อรอบ (ที่เหลือเก็บในรอบถัดไปต่อจาก cursor)
+    batch_size = 100
+    
     def __init__(self):
         self.text_processor = TextProcessor()
     
@@ -160,66 +189,54 @@ class NewsIngester:
             # ดึงข่าวหวยจาก news app ที่เผยแพร่แล้ว
             from news.models import NewsArticle
             
-            # หาข่าวหวยล่าสุดที่มีเลขเด็ด หรือข่าวทั้งหมด
-            recent_articles = NewsArticle.objects.filter(
-                status='published',
-                published_date__gte=timezone.now() - timedelta(days=7)  # ข่าวใน 7 วันล่าสุด
-            ).order_by('-published_date')[:15]
+            # ข่าวที่บันทึกหรือแก้ไขหลัง cursor ของแหล่งข้อมูลนี้ (ไม่เก่ากว่า 7 วัน)
+            # ใช้ updated_at ที่ระบบตั้งเอง ไม่ใช้ published_date ที่บรรณาธิการย้อนวันได้
+            # ข่าวที่เพิ่งเปลี่ยนจากแบบร่างเป็นเผยแพร่จึงยังถูกเก็บ (ข่าวที่แก้ไขซ้ำถูกข้ามด้วยหัวข้อ)
+            recent_articles = list(after_cursor(
+                NewsArticle.objects.filter(status='published'),
+                data_source,
+                'updated_at',
+                since=timezone.now() - timedelta(days=7)
+            ).select_related('author')[:self.batch_size])
             
-            for article in recent_articles:
-                try:
-                    # ตรวจสอบว่าได้ ingest ข่าวนี้แล้วหรือยัง
-                    existing_record = DataIngestionRecord.objects.filter(
-                        data_source=data_source,
-                        title=article.title
-                    ).first()
-                    
-                    if existing_record:
-                        continue  # ข้ามถ้า ingest แล้ว
-                    
-                    # สร้างเนื้อหาสำหรับวิเคราะห์
-                    full_content = f"{article.title}. {article.intro} {article.content}"
-                    
-                    # วิเคราะห์เนื้อหาด้วย TextProcessor
-                    extracted_numbers_from_text = self.text_processor.extract_numbers_from_text(full_content)
-                    keywords = self.text_processor.extract_keywords(full_content)
-                    sentiment_score = self.text_processor.calculate_sentiment_score(full_content)
-                    
-                    # ถ้าบทความมีเลขเด็ดอยู่แล้ว ให้ใช้เลขนั้นรวมกับเลขที่วิเคราะห์ได้
-                    if article.extracted_numbers:
-                        existing_numbers = article.get_extracted_numbers_list()
-                        # รวมเลขที่มีอยู่กับเลขที่วิเคราะห์ได้
-                        all_numbers = list(set(existing_numbers + extracted_numbers_from_text))
-                    else:
-                        all_numbers = extracted_numbers_from_text
-                    
-                    # สร้างบันทึกข้อมูล
-                    record = DataIngestionRecord.objects.create(
-                        data_source=data_source,
-                        raw_content=full_content[:1000],  # จำกัดความยาวเนื้อหา
-                        processed_content=article.title,  # หัวข้อเป็นเนื้อหาที่ประมวลผล
-                        title=article.title,
-                        publish_date=article.published_date,
-                        author=article.author.username if article.author else '',
-                        extracted_numbers=all_numbers,
-                        keywords=keywords,
-                        sentiment_score=sentiment_score,
-                        relevance_score=article.confidence_score / 100.0,  # แปลงเป็น 0-1
-                        processing_status='completed',
-                        processed_at=timezone.now()
-                    )
-                    
-                    records.append(record)
-                    logger.info(f"Ingested news article '{article.title[:50]}...' with {len(all_numbers)} numbers")
-                    
-                except Exception as e:
-                    logger.error(f"Error ingesting news article {article.id}: {str(e)}")
-                    continue
+            # สร้างเนื้อหาสำหรับวิเคราะห์ แล้ววิเคราะห์ทั้งชุดด้วย TextProcessor
+            contents = [f"{article.title}. {article.intro} {article.content}" for article in recent_articles]
+            analyses = self.text_processor.analyze_many(contents)
+            
+            candidates = []
+            for article, full_content, analysis in zip(recent_articles, contents, analyses):
+                # รวมเลขที่บทความระบุไว้พร้อมเหตุผลกับเลขที่วิเคราะห์ได้
+                all_numbers = list(dict.fromkeys(article.get_numbers_only() + analysis.numbers))
+                
+                candidates.append(DataIngestionRecord(
+                    data_source=data_source,
+                    raw_content=full_content[:1000],  # จำกัดความยาวเนื้อหา
+                    processed_content=article.title,  # หัวข้อเป็นเนื้อหาที่ประมวลผล
+                    title=article.title,
+                    publish_date=article.published_date,
+                    author=article.author.username if article.author else '',
+                    extracted_numbers=all_numbers,
+                    keywords=analysis.keywords,
+                    sentiment_score=analysis.sentiment_score,
+                    relevance_score=analysis.relevance_score,
+                    processing_status='completed',
+                    processed_at=timezone.now()
+                ))
+            
+            # ข้ามข่าวที่ ingest แล้ว บันทึกข่าวใหม่ทั้งหมดพร้อมกัน และเลื่อน cursor ไปที่ข่าวสุดท้าย
+            # (ถ้าสร้างบันทึกของข่าวใดไม่ได้จะไม่ถึงบรรทัดนี้ cursor จึงไม่ข้ามข่าวที่ยังไม่ได้เก็บ)
+            cursor = None
+            if recent_articles:
+                last_article = recent_articles[-1]
+                cursor = IngestionCursor(last_article.updated_at, last_article.id)
+            records = save_ingestion_records(
+                data_source, candidates, skip_existing_titles=True, cursor=cursor
+            )
+            for record in records:
+                logger.info(f"Ingested news article '{record.title[:50]}...' with {len(record.extracted_numbers)} numbers")
                     
         except ImportError:
             logger.error("Cannot import news.models - news app not available")
-        except Exception as e:
-            logger.error(f"Error in ingest_from_existing_news: {str(e)}")
         
         return records
     
@@ -241,9 +258,10 @@ class NewsIngester:
                 # สำหรับการทดสอบ - สร้างข้อมูลจำลอง
                 mock_articles = self._generate_mock_news_data()
                 
-                for article_data in mock_articles:
-                    record = self._create_record_from_external_data(data_source, article_data)
-                    records.append(record)
+                records = save_ingestion_records(data_source, [
+                    self._build_record_from_external_data(data_source, article_data)
+                    for article_data in mock_articles
+                ])
                     
         except Exception as e:
             logger.error(f"Error ingesting from external API {data_source.name}: {str(e)}")
@@ -277,19 +295,19 @@ class NewsIngester:
         
         return mock_data
     
-    def _create_record_from_external_data(self, data_source: DataSource, article_data: Dict) -> DataIngestionRecord:
-        """สร้างบันทึกจากข้อมูลภายนอก"""
+    def _build_record_from_external_data(self, data_source: DataSource, article_data: Dict) -> DataIngestionRecord:
+        """สร้างบันทึกจากข้อมูลภายนอก (ยังไม่บันทึกลงฐานข้อมูล)"""
         
         # ประมวลผลข้อความ
         full_text = f"{article_data['title']} {article_data['content']}"
-        extracted_numbers = self.processor.extract_numbers_from_text(full_text)
-        keywords = self.processor.extract_keywords(full_text)
-        sentiment_score = self.processor.calculate_sentiment_score(article_data['content'])
-        relevance_score = self.processor.calculate_relevance_score(
-            article_data['title'], article_data['content']
-        )
-        
-        record = DataIngestionRecord.objects.create(
+        analysis = self.text_processor.analyze(full_text)
+        extracted_numbers = analysis.numbers
+        keywords = analysis.keywords
+        # คะแนนอารมณ์คิดจากเนื้อหาอย่างเดียว
+        sentiment_score = self.text_processor.calculate_sentiment_score(article_data['content'])
+        relevance_score = analysis.relevance_score
+        
+        record = DataIngestionRecord(
             data_source=data_source,
             raw_content=article_data['content'],
             processed_content=article_data['content'],
@@ -315,42 +333,38 @@ class SocialMediaIngester:
     def ingest_social_mentions(self, data_source: DataSource) -> List[DataIngestionRecord]:
         """เก็บข้อมูลการพูดถึงหวยในโซเชียล"""
         
-        records = []
-        
         # ตัวอย่างการสร้างข้อมูลโซเชียลจำลอง
         # ในการใช้งานจริงจะต้องเชื่อมต่อกับ API ของแต่ละแพลตฟอร์ม
         
-        mock_posts = self._generate_mock_social_data()
+        # เฉพาะโพสต์ที่ใหม่กว่า cursor ของแหล่งข้อมูลนี้
+        mock_posts = [
+            post for post in self._generate_mock_social_data()
+            if data_source.last_ingested_at is None or post['created_at'] > data_source.last_ingested_at
+        ]
         
+        candidates = []
         for post_data in mock_posts:
-            try:
-                extracted_numbers = self.processor.extract_numbers_from_text(post_data['content'])
-                keywords = self.processor.extract_keywords(post_data['content'])
-                sentiment_score = self.processor.calculate_sentiment_score(post_data['content'])
-                relevance_score = self.processor.calculate_relevance_score('', post_data['content'])
-                
-                record = DataIngestionRecord.objects.create(
-                    data_source=data_source,
-                    raw_content=post_data['content'],
-                    processed_content=post_data['content'],
-                    title=f"Social post from {post_data['platform']}",
-                    publish_date=post_data['created_at'],
-                    author=post_data['username'],
-                    extracted_numbers=extracted_numbers,
-                    keywords=keywords,
-                    sentiment_score=sentiment_score,
-                    relevance_score=relevance_score,
-                    processing_status='completed',
-                    processed_at=timezone.now()
-                )
-                
-                records.append(record)
-                
-            except Exception as e:
-                logger.error(f"Error processing social media post: {str(e)}")
-                continue
-        
-        return records
+            analysis = self.processor.analyze(post_data['content'])
+            
+            candidates.append(DataIngestionRecord(
+                data_source=data_source,
+                raw_content=post_data['content'],
+                processed_content=post_data['content'],
+                title=f"Social post from {post_data['platform']}",
+                publish_date=post_data['created_at'],
+                author=post_data['username'],
+                extracted_numbers=analysis.numbers,
+                keywords=analysis.keywords,
+                sentiment_score=analysis.sentiment_score,
+                relevance_score=analysis.relevance_score,
+                processing_status='completed',
+                processed_at=timezone.now()
+            ))
+        
+        cursor = None
+        if mock_posts:
+            cursor = IngestionCursor(max(post['created_at'] for post in mock_posts))
+        return save_ingestion_records(data_source, candidates, cursor=cursor)
     
     def _generate_mock_social_data(self) -> List[Dict]:
         """สร้างข้อมูลโซเชียลจำลอง"""
@@ -393,55 +407,50 @@ class SocialMediaIngester:
 class DreamDataIngester:
     """เก็บข้อมูลความฝัน"""
     
+    # จำนวนความฝันใหม่สูงสุดต่อรอบ (ที่เหลือเก็บในรอบถัดไปต่อจาก cursor)
+    batch_size = 100
+    
     def __init__(self):
         self.processor = TextProcessor()
     
     def ingest_dream_interpretations(self, data_source: DataSource) -> List[DataIngestionRecord]:
         """เก็บข้อมูลการตีความฝัน"""
         
-        records = []
-        
-        # ดึงข้อมูลความฝันจากระบบ
-        recent_dreams = DreamInterpretation.objects.filter(
-            interpreted_at__gte=timezone.now() - timedelta(days=7)
-        )[:30]
+        # ความฝันที่ตีความหลัง cursor ของแหล่งข้อมูลนี้ (ไม่เก่ากว่า 7 วัน)
+        recent_dreams = list(after_cursor(
+            DreamInterpretation.objects.all(),
+            data_source,
+            'interpreted_at',
+            since=timezone.now() - timedelta(days=7)
+        ).select_related('user')[:self.batch_size])
         
+        candidates = []
         for dream in recent_dreams:
-            try:
-                # วิเคราะห์ความฝัน
-                extracted_numbers = self._extract_numbers_from_dream(dream)
-                keywords = self.processor.extract_keywords(dream.dream_text)
-                
-                # ความฝันมักมี sentiment เป็นกลาง
-                sentiment_score = 0.6
-                
-                # คำนวณความเกี่ยวข้อง
-                relevance_score = self._calculate_dream_relevance(dream.dream_text)
-                
-                record = DataIngestionRecord.objects.create(
-                    data_source=data_source,
-                    raw_content=dream.dream_text,
-                    processed_content=dream.interpretation,
-                    title=f"Dream interpretation - {dream.interpreted_at.strftime('%d/%m/%Y')}",
-                    publish_date=dream.interpreted_at,
-                    author=dream.user.username if dream.user else 'Anonymous',
-                    extracted_numbers=extracted_numbers,
-                    keywords=keywords,
-                    sentiment_score=sentiment_score,
-                    relevance_score=relevance_score,
-                    processing_status='completed',
-                    processed_at=timezone.now()
-                )
-                
-                records.append(record)
-                
-            except Exception as e:
-                logger.error(f"Error processing dream interpretation {dream.id}: {str(e)}")
-                continue
-        
-        return records
+            # วิเคราะห์ความฝัน
+            analysis = self.processor.analyze(dream.dream_text)
+            
+            candidates.append(DataIngestionRecord(
+                data_source=data_source,
+                raw_content=dream.dream_text,
+                processed_content=dream.interpretation,
+                title=f"Dream interpretation - {dream.interpreted_at.strftime('%d/%m/%Y')}",
+                publish_date=dream.interpreted_at,
+                author=dream.user.username if dream.user else 'Anonymous',
+                extracted_numbers=self._extract_numbers_from_dream(dream, analysis.numbers),
+                keywords=analysis.keywords,
+                sentiment_score=0.6,  # ความฝันมักมี sentiment เป็นกลาง
+                relevance_score=self._calculate_dream_relevance(dream.dream_text),
+                processing_status='completed',
+                processed_at=timezone.now()
+            ))
+        
+        cursor = None
+        if recent_dreams:
+            cursor = IngestionCursor(recent_dreams[-1].interpreted_at, recent_dreams[-1].id)
+        return save_ingestion_records(data_source, candidates, cursor=cursor)
     
-    def _extract_numbers_from_dream(self, dream: DreamInterpretation) -> List[str]:
+    def _extract_numbers_from_dream(self, dream: DreamInterpretation,
+                                    text_numbers: Optional[List[str]] = None) -> List[str]:
         """สกัดตัวเลขจากความฝัน"""
         numbers = []
         
@@ -451,7 +460,8 @@ class DreamDataIngester:
             numbers.extend([num.strip() for num in suggested if num.strip()])
         
         # เลขจากข้อความความฝัน
-        text_numbers = self.processor.extract_numbers_from_text(dream.dream_text)
+        if text_numbers is None:
+            text_numbers = self.processor.extract_numbers_from_text(dream.dream_text)
         numbers.extend(text_numbers)
         
         return list(set(numbers))
@@ -484,35 +494,34 @@ class TrendDataIngester:
     def ingest_google_trends(self, data_source: DataSource) -> List[DataIngestionRecord]:
         """เก็บข้อมูล Google Trends (จำลอง)"""
         
-        records = []
-        
         # สร้างข้อมูล Google Trends จำลอง
-        mock_trends = self._generate_mock_trends_data()
+        mock_trends = [
+            trend for trend in self._generate_mock_trends_data()
+            if data_source.last_ingested_at is None or trend['date'] > data_source.last_ingested_at
+        ]
         
-        for trend_data in mock_trends:
-            try:
-                record = DataIngestionRecord.objects.create(
-                    data_source=data_source,
-                    raw_content=json.dumps(trend_data),
-                    processed_content=trend_data['description'],
-                    title=f"Google Trends: {trend_data['keyword']}",
-                    publish_date=trend_data['date'],
-                    author='Google Trends',
-                    extracted_numbers=trend_data['related_numbers'],
-                    keywords=[trend_data['keyword']],
-                    sentiment_score=0.5,  # เป็นกลาง
-                    relevance_score=trend_data['trend_score'],
-                    processing_status='completed',
-                    processed_at=timezone.now()
-                )
-                
-                records.append(record)
-                
-            except Exception as e:
-                logger.error(f"Error processing trends data: {str(e)}")
-                continue
+        candidates = [
+            DataIngestionRecord(
+                data_source=data_source,
+                raw_content=json.dumps(trend_data, default=str),
+                processed_content=trend_data['description'],
+                title=f"Google Trends: {trend_data['keyword']}",
+                publish_date=trend_data['date'],
+                author='Google Trends',
+                extracted_numbers=trend_data['related_numbers'],
+                keywords=[trend_data['keyword']],
+                sentiment_score=0.5,  # เป็นกลาง
+                relevance_score=trend_data['trend_score'],
+                processing_status='completed',
+                processed_at=timezone.now()
+            )
+            for trend_data in mock_trends
+        ]
         
-        return records
+        cursor = None
+        if mock_trends:
+            cursor = IngestionCursor(max(trend['date'] for trend in mock_trends))
+        return save_ingestion_records(data_source, candidates, cursor=cursor)
     
     def _generate_mock_trends_data(self) -> List[Dict]:
         """สร้างข้อมูลเทรนด์จำลอง"""
@@ -541,14 +550,58 @@ class TrendDataIngester:
 class DataIngestionManager:
     """ตัวจัดการหลักสำหรับการเก็บข้อมูล"""
     
-    def __init__(self):
+    def __init__(self, max_workers: int = 4):
         self.news_ingester = NewsIngester()
         self.social_ingester = SocialMediaIngester()
         self.dream_ingester = DreamDataIngester()
         self.trend_ingester = TrendDataIngester()
+        # จำนวนแหล่งข้อมูลที่เก็บพร้อมกันได้สูงสุด
+        self.max_workers = max_workers
+        # ผลของแต่ละแหล่งข้อมูลจาก run_all_ingestors ครั้งล่าสุด
+        self.source_reports: List[SourceRunReport] = []
+    
+    def _ingest(self, source: DataSource) -> List[DataIngestionRecord]:
+        """เรียก ingester ตามประเภทของแหล่งข้อมูล"""
+        if source.source_type == 'news':
+            return self.news_ingester.ingest_from_existing_news(source)
+        if source.source_type == 'social_media':
+            return self.social_ingester.ingest_social_mentions(source)
+        if source.source_type == 'dreams':
+            return self.dream_ingester.ingest_dream_interpretations(source)
+        if source.source_type == 'trends':
+            return self.trend_ingester.ingest_google_trends(source)
+        return []
+    
+    def _mark_scraped(self, source: DataSource):
+        """อัปเดตเวลาการเก็บข้อมูล (เฉพาะฟิลด์นี้ ไม่เขียนทับ cursor)"""
+        source.last_scraped = timezone.now()
+        DataSource.objects.filter(pk=source.pk).update(last_scraped=source.last_scraped)
+    
+    def _run_source(self, source: DataSource) -> SourceRunReport:
+        """เก็บข้อมูลหนึ่งแหล่งใน thread ของ pool ข้อผิดพลาดไม่กระทบแหล่งอื่น"""
+        started = time.perf_counter()
+        try:
+            records = self._ingest(source)
+            self._mark_scraped(source)
+            return SourceRunReport(
+                source.id, source.name, source.source_type,
+                len(records), time.perf_counter() - started
+            )
+        except Exception as e:
+            logger.error(f"Error ingesting from source {source.name}: {str(e)}")
+            return SourceRunReport(
+                source.id, source.name, source.source_type,
+                0, time.perf_counter() - started, str(e)
+            )
+        finally:
+            # thread ของ pool เปิด connection ของตัวเอง
+            connection.close()
     
     def run_all_ingestors(self) -> Dict[str, int]:
-        """รันการเก็บข้อมูลทั้งหมด"""
+        """
+        รันการเก็บข้อมูลทั้งหมด: ทุกแหล่งที่เปิดใช้งานทำงานพร้อมกันใน pool ขนาด max_workers
+        แต่ละแหล่งอ่านเฉพาะข้อมูลหลัง cursor ของตัวเอง
+        """
         
         results = {
             'news': 0,
@@ -558,48 +611,27 @@ class DataIngestionManager:
             'total': 0
         }
         
-        try:
-            # เก็บข้อมูลข่าว
-            news_sources = DataSource.objects.filter(source_type='news', is_active=True)
-            for source in news_sources:
-                records = self.news_ingester.ingest_from_existing_news(source)
-                results['news'] += len(records)
-                
-                # อัปเดตเวลาการเก็บข้อมูล
-                source.last_scraped = timezone.now()
-                source.save()
-            
-            # เก็บข้อมูลโซเชียล
-            social_sources = DataSource.objects.filter(source_type='social_media', is_active=True)
-            for source in social_sources:
-                records = self.social_ingester.ingest_social_mentions(source)
-                results['social_media'] += len(records)
-                source.last_scraped = timezone.now()
-                source.save()
-            
-            # เก็บข้อมูลความฝัน
-            dream_sources = DataSource.objects.filter(source_type='dreams', is_active=True)
-            for source in dream_sources:
-                records = self.dream_ingester.ingest_dream_interpretations(source)
-                results['dreams'] += len(records)
-                source.last_scraped = timezone.now()
-                source.save()
-            
-            # เก็บข้อมูลเทรนด์
-            trend_sources = DataSource.objects.filter(source_type='trends', is_active=True)
-            for source in trend_sources:
-                records = self.trend_ingester.ingest_google_trends(source)
-                results['trends'] += len(records)
-                source.last_scraped = timezone.now()
-                source.save()
-            
-            results['total'] = sum([results[key] for key in results if key != 'total'])
-            
-            logger.info(f"Data ingestion completed. Total records: {results['total']}")
-            
-        except Exception as e:
-            logger.error(f"Error in data ingestion: {str(e)}")
-            raise
+        sources = list(DataSource.objects.filter(
+            source_type__in=INGESTION_SOURCE_TYPES,
+            is_active=True
+        ).order_by('id'))
+        
+        self.source_reports = []
+        if sources:
+            workers = min(self.max_workers, len(sources))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='data-ingestion') as pool:
+                self.source_reports = list(pool.map(self._run_source, sources))
+        
+        for report in self.source_reports:
+            results[report.source_type] += report.records
+            logger.info(
+                f"Ingested {report.records} records from {report.name} in {report.seconds:.2f}s"
+                + (f" (error: {report.error})" if report.error else "")
+            )
+        
+        results['total'] = sum([results[key] for key in results if key != 'total'])
+        
+        logger.info(f"Data ingestion completed. Total records: {results['total']}")
         
         return results
     
@@ -609,19 +641,11 @@ class DataIngestionManager:
         records = []
         
         try:
-            if data_source.source_type == 'news':
-                records = self.news_ingester.ingest_from_existing_news(data_source)
-            elif data_source.source_type == 'social_media':
-                records = self.social_ingester.ingest_social_mentions(data_source)
-            elif data_source.source_type == 'dreams':
-                records = self.dream_ingester.ingest_dream_interpretations(data_source)
-            elif data_source.source_type == 'trends':
-                records = self.trend_ingester.ingest_trend_data(data_source)
+            records = self._ingest(data_source)
             
             if records:
                 # อัปเดตเวลาการเก็บข้อมูล
-                data_source.last_scraped = timezone.now()
-                data_source.save()
+                self._mark_scraped(data_source)
                 
                 logger.info(f"Collected {len(records)} records from {data_source.name}")
             
@@ -635,20 +659,10 @@ class DataIngestionManager:
         
         try:
             source = DataSource.objects.get(id=source_id, is_active=True)
-            records = []
-            
-            if source.source_type == 'news':
-                records = self.news_ingester.ingest_from_existing_news(source)
-            elif source.source_type == 'social_media':
-                records = self.social_ingester.ingest_social_mentions(source)
-            elif source.source_type == 'dreams':
-                records = self.dream_ingester.ingest_dream_interpretations(source)
-            elif source.source_type == 'trends':
-                records = self.trend_ingester.ingest_google_trends(source)
+            records = self._ingest(source)
             
             # อัปเดตเวลาการเก็บข้อมูล
-            source.last_scraped = timezone.now()
-            source.save()
+            self._mark_scraped(source)
             
             logger.info(f"Ingestion completed for {source.name}: {len(records)} records")
             return len(records)
@@ -34,6 +34,13 @@ class Command(BaseCommand):
             help='ลบข้อมูลเก่าที่เก็บไว้เกินกี่วัน (default: 30)'
         )
         
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='จำนวนแหล่งข้อมูลที่เก็บพร้อมกันสูงสุด (default: 4)'
+        )
+        
         parser.add_argument(
             '--cleanup-only',
             action='store_true',
@@ -41,7 +48,7 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **options):
-        ingestion_manager = DataIngestionManager()
+        ingestion_manager = DataIngestionManager(max_workers=max(1, options['workers']))
         
         try:
             # ถ้าเป็น cleanup เท่านั้น
@@ -91,6 +98,13 @@ class Command(BaseCommand):
                 if source_type != 'total':
                     self.stdout.write(f'{source_type}: {count} รายการ')
             
+            for report in ingestion_manager.source_reports:
+                line = f'  - {report.name}: {report.records} รายการ ({report.seconds:.2f} วินาที)'
+                if report.error:
+                    self.stdout.write(self.style.ERROR(f'{line} ผิดพลาด: {report.error}'))
+                else:
+                    self.stdout.write(line)
+            
             self.stdout.write(
                 self.style.SUCCESS(f'\nเก็บข้อมูลเสร็จแล้ว รวม {results["total"]} รายการ')
             )
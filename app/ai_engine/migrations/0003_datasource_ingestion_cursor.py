@@ -0,0 +1,23 @@
+# Generated by Django 4.2.13 on 2026-10-17 01:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_engine', '0002_aimodeltype_datasource_ensembleprediction_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasource',
+            name='last_ingested_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='เก็บข้อมูลถึงเวลา'),
+        ),
+        migrations.AddField(
+            model_name='datasource',
+            name='last_ingested_id',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='เก็บข้อมูลถึง ID'),
+        ),
+    ]
@@ -207,6 +207,10 @@ class DataSource(models.Model):
     
     last_scraped = models.DateTimeField("เก็บข้อมูลล่าสุด", null=True, blank=True)
     
+    # ตำแหน่งของข้อมูลต้นทางที่เก็บถึงแล้ว (เวลา, id) รอบถัดไปอ่านเฉพาะข้อมูลที่ใหม่กว่านี้
+    last_ingested_at = models.DateTimeField("เก็บข้อมูลถึงเวลา", null=True, blank=True)
+    last_ingested_id = models.BigIntegerField("เก็บข้อมูลถึง ID", null=True, blank=True)
+    
     class Meta:
         verbose_name = "แหล่งข้อมูล"
         verbose_name_plural = "แหล่งข้อมูล"
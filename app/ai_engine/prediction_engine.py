@@ -6,8 +6,10 @@ AI Ensemble Prediction Engine
 import re
 import json
 import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Any
+from typing import Callable, Dict, List, Optional, Tuple, Any
 from django.utils import timezone
 from django.db.models import Q, Count, Avg
 from collections import Counter
@@ -17,12 +19,20 @@ from .models import (
     DataSource, DataIngestionRecord, AIModelType, 
     PredictionSession, ModelPrediction, EnsemblePrediction
 )
+from dreams.keyword_matcher import KeywordMatcher, get_keyword_matcher
 from dreams.models import DreamKeyword, DreamInterpretation
 from news.models import NewsArticle
 from lotto_stats.models import LotteryDraw
 
 logger = logging.getLogger(__name__)
 
+# บทบาทของโมเดล -> ประเภทแหล่งข้อมูลใน DataIngestionRecord ที่โมเดลนั้นใช้
+MODEL_SOURCE_TYPES = {
+    'journalist': ('news', 'social_media'),
+    'interpreter': ('astrology',),
+    'statistician': (),
+}
+
 class JournalistAI:
     """AI Model 1: วิเคราะห์ข่าวและโซเชียลมีเดีย"""
     
@@ -176,20 +186,33 @@ class InterpreterAI:
         self.name = "Dream Interpreter AI"
         self.weight = 0.3
     
-    def analyze_dream_data(self, data_records: List[DataIngestionRecord]) -> Dict[str, Any]:
-        """วิเคราะห์ข้อมูลความฝันและโหราศาสตร์"""
+    @staticmethod
+    def load_recent_dreams() -> List[DreamInterpretation]:
+        """ความฝันที่ตีความใน 14 วันล่าสุด"""
+        return list(DreamInterpretation.objects.filter(
+            interpreted_at__gte=timezone.now() - timedelta(days=14)
+        )[:50])
+    
+    def analyze_dream_data(self, data_records: List[DataIngestionRecord],
+                           recent_dreams: Optional[List[DreamInterpretation]] = None,
+                           matcher: Optional[KeywordMatcher] = None) -> Dict[str, Any]:
+        """
+        วิเคราะห์ข้อมูลความฝันและโหราศาสตร์
+        recent_dreams/matcher: ข้อมูลที่อ่านไว้แล้ว (ไม่ระบุ = อ่านจากฐานข้อมูล)
+        """
         
         dream_numbers = Counter()
         astrology_numbers = Counter()
         popular_dreams = []
         
         # วิเคราะห์ข้อมูลความฝันจาก database
-        recent_dreams = DreamInterpretation.objects.filter(
-            interpreted_at__gte=timezone.now() - timedelta(days=14)
-        )[:50]
+        if recent_dreams is None:
+            recent_dreams = self.load_recent_dreams()
+        if matcher is None:
+            matcher = get_keyword_matcher()
         
         for dream in recent_dreams:
-            numbers = self._extract_numbers_from_dream(dream)
+            numbers = self._extract_numbers_from_dream(dream, matcher)
             for num in numbers:
                 dream_numbers[num] += 1
         
@@ -215,26 +238,26 @@ class InterpreterAI:
             }
         }
     
-    def _extract_numbers_from_dream(self, dream: DreamInterpretation) -> List[str]:
+    def _extract_numbers_from_dream(self, dream: DreamInterpretation,
+                                    matcher: Optional[KeywordMatcher] = None) -> List[str]:
         """สกัดตัวเลขจากความฝัน"""
         numbers = []
         
-        # ใช้ DreamKeyword ที่มีอยู่
-        dream_text = dream.dream_text.lower()
-        keywords = DreamKeyword.objects.all()
-        
-        for keyword in keywords:
-            if keyword.keyword.lower() in dream_text:
-                # เพิ่มเลขเด่นและเลขรอง
-                numbers.extend([
-                    f"{keyword.main_number}{keyword.secondary_number}",
-                    f"{keyword.secondary_number}{keyword.main_number}",
-                    f"{keyword.main_number}{keyword.main_number}"
-                ])
-                
-                # เพิ่มเลขที่มักตี
-                if keyword.common_numbers:
-                    numbers.extend(keyword.get_numbers_list())
+        # ใช้ DreamKeyword ที่มีอยู่ (automaton ที่คอมไพล์ไว้ ไม่ต้อง query ต่อความฝัน)
+        if matcher is None:
+            matcher = get_keyword_matcher()
+        
+        for keyword in matcher.keywords_in(dream.dream_text):
+            # เพิ่มเลขเด่นและเลขรอง
+            numbers.extend([
+                f"{keyword.main_number}{keyword.secondary_number}",
+                f"{keyword.secondary_number}{keyword.main_number}",
+                f"{keyword.main_number}{keyword.main_number}"
+            ])
+            
+            # เพิ่มเลขที่มักตี
+            if keyword.common_numbers:
+                numbers.extend(keyword.get_numbers_list())
         
         return numbers
     
@@ -329,11 +352,21 @@ class StatisticianAI:
         self.name = "Statistical Trend AI"  
         self.weight = 0.3
     
-    def analyze_statistical_data(self, data_records: List[DataIngestionRecord]) -> Dict[str, Any]:
-        """วิเคราะห์ข้อมูลสถิติและแนวโน้ม"""
+    @staticmethod
+    def load_recent_results() -> List[LotteryDraw]:
+        """ผลหวย 20 งวดล่าสุด"""
+        return list(LotteryDraw.objects.order_by('-draw_date')[:20])
+    
+    def analyze_statistical_data(self, data_records: List[DataIngestionRecord],
+                                 recent_results: Optional[List[LotteryDraw]] = None) -> Dict[str, Any]:
+        """
+        วิเคราะห์ข้อมูลสถิติและแนวโน้ม
+        recent_results: ผลหวยที่อ่านไว้แล้ว (ไม่ระบุ = อ่านจากฐานข้อมูล)
+        """
         
         # วิเคราะห์ประวัติผลหวย
-        recent_results = LotteryDraw.objects.order_by('-draw_date')[:20]
+        if recent_results is None:
+            recent_results = self.load_recent_results()
         
         hot_numbers = self._find_hot_numbers(recent_results)
         cold_numbers = self._find_cold_numbers(recent_results)
@@ -737,26 +770,21 @@ class PredictionEngine:
             
             start_time = timezone.now()
             
-            # เก็บข้อมูลจากแหล่งต่างๆ
-            data_records = self._collect_data_for_session(session)
-            
-            # รันโมเดล AI แต่ละตัว
-            model_predictions = []
-            
-            # รัน Journalist AI
-            journalist_result = self.ensemble.journalist.analyze_text_data(data_records)
-            journalist_pred = self._save_model_prediction(session, 'journalist', journalist_result)
-            model_predictions.append(journalist_pred)
+            # อ่านข้อมูลที่ทุกโมเดลใช้ครั้งเดียว แล้วรันโมเดลทั้งสามพร้อมกัน
+            inputs = self._prefetch_inputs(session)
+            data_records = inputs['data_records']
+            model_runs = self._run_models(inputs)
             
-            # รัน Interpreter AI  
-            interpreter_result = self.ensemble.interpreter.analyze_dream_data(data_records)
-            interpreter_pred = self._save_model_prediction(session, 'interpreter', interpreter_result)
-            model_predictions.append(interpreter_pred)
-            
-            # รัน Statistician AI
-            statistician_result = self.ensemble.statistician.analyze_statistical_data(data_records)
-            statistician_pred = self._save_model_prediction(session, 'statistician', statistician_result)
-            model_predictions.append(statistician_pred)
+            # บันทึกผลตามลำดับโมเดลเดิม (ฐานข้อมูลใช้เฉพาะใน thread หลัก)
+            model_predictions = [
+                self._save_model_prediction(
+                    session, role, result,
+                    processing_time=wall_time,
+                    cpu_time=cpu_time,
+                    data_sources=self._data_sources_for(role, inputs)
+                )
+                for role, (result, wall_time, cpu_time) in model_runs.items()
+            ]
             
             # รันโมเดลรวม
             ensemble_prediction = self.ensemble.create_ensemble_prediction(session, model_predictions)
@@ -785,22 +813,93 @@ class PredictionEngine:
             ingested_at__gte=session.data_collection_period_start,
             ingested_at__lte=session.data_collection_period_end,
             processing_status='completed'
-        ).order_by('-relevance_score')[:100]  # เก็บ 100 รายการที่ดีที่สุด
+        ).select_related('data_source').order_by('-relevance_score')[:100]  # เก็บ 100 รายการที่ดีที่สุด
+    
+    def _prefetch_inputs(self, session: PredictionSession) -> Dict[str, Any]:
+        """อ่านข้อมูลนำเข้าของทุกโมเดลจากฐานข้อมูล (thread ของโมเดลไม่ต้อง query เอง)"""
+        
+        return {
+            'data_records': list(self._collect_data_for_session(session)),
+            'recent_dreams': InterpreterAI.load_recent_dreams(),
+            'keyword_matcher': get_keyword_matcher(),
+            'recent_results': StatisticianAI.load_recent_results(),
+        }
+    
+    def _run_models(self, inputs: Dict[str, Any]) -> Dict[str, Tuple[Dict, float, float]]:
+        """
+        รันโมเดลทั้งสามพร้อมกันใน thread pool
+        คืนค่า บทบาท -> (ผลลัพธ์, เวลาจริง, เวลา CPU) ในหน่วยวินาที
+        """
+        records = inputs['data_records']
+        runners: Dict[str, Callable[[], Dict]] = {
+            'journalist': lambda: self.ensemble.journalist.analyze_text_data(records),
+            'interpreter': lambda: self.ensemble.interpreter.analyze_dream_data(
+                records, recent_dreams=inputs['recent_dreams'], matcher=inputs['keyword_matcher']
+            ),
+            'statistician': lambda: self.ensemble.statistician.analyze_statistical_data(
+                records, recent_results=inputs['recent_results']
+            ),
+        }
+        
+        with ThreadPoolExecutor(max_workers=len(runners), thread_name_prefix='prediction-model') as pool:
+            futures = {role: pool.submit(self._timed, runner) for role, runner in runners.items()}
+        
+        runs = {role: future.result() for role, future in futures.items()}
+        for role, (_, wall_time, cpu_time) in runs.items():
+            logger.info(f"Model {role} finished in {wall_time:.3f}s (cpu {cpu_time:.3f}s)")
+        return runs
+    
+    @staticmethod
+    def _timed(runner: Callable[[], Dict]) -> Tuple[Dict, float, float]:
+        """รันและวัดเวลาจริงกับเวลา CPU ของ thread ที่รัน"""
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        result = runner()
+        return result, time.perf_counter() - wall_start, time.thread_time() - cpu_start
+    
+    def _data_sources_for(self, model_role: str, inputs: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """แหล่งข้อมูลและจำนวนรายการที่โมเดลนี้ใช้"""
+        
+        counts = Counter(
+            (record.data_source.name, record.data_source.source_type)
+            for record in inputs['data_records']
+            if record.data_source.source_type in MODEL_SOURCE_TYPES[model_role]
+        )
+        sources = [
+            {'source': name, 'type': source_type, 'records': count}
+            for (name, source_type), count in counts.most_common()
+        ]
+        
+        if model_role == 'interpreter':
+            sources.append({'source': 'DreamInterpretation', 'type': 'dreams', 'records': len(inputs['recent_dreams'])})
+        elif model_role == 'statistician':
+            sources.append({'source': 'LotteryDraw', 'type': 'lottery_results', 'records': len(inputs['recent_results'])})
+        
+        return sources
     
-    def _save_model_prediction(self, session: PredictionSession, model_role: str, result: Dict) -> ModelPrediction:
+    def _save_model_prediction(self, session: PredictionSession, model_role: str, result: Dict,
+                               processing_time: float = 0.0, cpu_time: Optional[float] = None,
+                               data_sources: Optional[List[Dict[str, Any]]] = None) -> ModelPrediction:
         """บันทึกผลการทำนายของโมเดล"""
         
         model_type = AIModelType.objects.get(role=model_role)
         
+        input_data_summary = dict(result['data_summary'])
+        if cpu_time is not None:
+            input_data_summary['timing'] = {
+                'wall_seconds': round(processing_time, 6),
+                'cpu_seconds': round(cpu_time, 6),
+            }
+        
         prediction = ModelPrediction.objects.create(
             session=session,
             model_type=model_type,
             predicted_numbers=result['predicted_numbers'],
             confidence_scores=result['confidence_scores'],
             reasoning=result['reasoning'],
-            input_data_summary=result['data_summary'],
-            data_sources_used=[],  # TODO: เก็บรายละเอียดแหล่งข้อมูล
-            processing_time=0.0  # TODO: วัดเวลาจริง
+            input_data_summary=input_data_summary,
+            data_sources_used=data_sources or [],
+            processing_time=processing_time
         )
         
         return prediction
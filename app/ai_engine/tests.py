@@ -1,3 +1,275 @@
+import re
+from datetime import timedelta
+from unittest import mock
+
 from django.test import TestCase
+from django.utils import timezone
+
+from ai_engine.data_ingestion import (
+    DataIngestionManager, IngestionCursor, NewsIngester, TrendDataIngester, save_ingestion_records
+)
+from ai_engine.models import AIModelType, DataIngestionRecord, DataSource, ModelPrediction
+from ai_engine.prediction_engine import PredictionEngine
+from ai_engine.text_analytics import (
+    DREAM_SYMBOLS, LOTTERY_KEYWORDS, NEGATIVE_WORDS, POSITIVE_WORDS, RELEVANCE_KEYWORDS, extract_numbers,
+    text_analyzer
+)
+from dreams.models import DreamInterpretation
+from lotto_stats.models import LotteryDraw
+from news.models import NewsArticle
+
+
+class SaveIngestionRecordsTests(TestCase):
+    """Test batched saving of ingestion records"""
+
+    def setUp(self):
+        self.source = DataSource.objects.create(name='ข่าว', source_type='news')
+
+    def record(self, title, raw_content='เนื้อหา'):
+        return DataIngestionRecord(data_source=self.source, raw_content=raw_content, title=title)
+
+    def test_bad_row_does_not_fail_the_batch(self):
+        """Test rows the database rejects are skipped and the rest are still saved"""
+        cursor = IngestionCursor(timezone.now(), 7)
+
+        saved = save_ingestion_records(
+            self.source, [self.record('a'), self.record('bad', raw_content=None), self.record('b')], cursor=cursor
+        )
+
+        self.assertEqual([record.title for record in saved], ['a', 'b'])
+        self.assertEqual(sorted(DataIngestionRecord.objects.values_list('title', flat=True)), ['a', 'b'])
+        self.source.refresh_from_db()
+        self.assertEqual(self.source.last_ingested_id, 7)
+
+    def test_trend_records_are_saved(self):
+        """Test trend rows with datetime fields serialize into raw_content"""
+        source = DataSource.objects.create(name='เทรนด์', source_type='trends')
+
+        records = TrendDataIngester().ingest_google_trends(source)
+
+        self.assertEqual(len(records), 5)
+        self.assertEqual(DataIngestionRecord.objects.filter(data_source=source).count(), 5)
+
+
+class NewsIngestionCursorTests(TestCase):
+    """Test the news ingestion cursor"""
+
+    def setUp(self):
+        self.source = DataSource.objects.create(name='ข่าวในระบบ', source_type='news')
+        self.ingester = NewsIngester()
+
+    def article(self, title, **kwargs):
+        return NewsArticle.objects.create(
+            title=title, intro='คำนำ', content='เนื้อหา', status='published',
+            numbers_with_reasons=[{'number': '24', 'reason': 'วันที่เกิดเหตุ'}], **kwargs
+        )
+
+    def ingest(self):
+        self.source.refresh_from_db()
+        return [record.title for record in self.ingester.ingest_from_existing_news(self.source)]
+
+    def test_cursor_skips_ingested_articles(self):
+        """Test a second run only picks up articles saved after the cursor"""
+        self.article('ข่าวแรก')
+
+        self.assertEqual(self.ingest(), ['ข่าวแรก'])
+        self.assertEqual(self.ingest(), [])
+
+        self.article('ข่าวที่สอง')
+        self.assertEqual(self.ingest(), ['ข่าวที่สอง'])
+        record = DataIngestionRecord.objects.get(title='ข่าวที่สอง')
+        self.assertIn('24', record.extracted_numbers)
+
+    def test_backdated_article_is_ingested(self):
+        """Test an article published with an old published_date is not skipped"""
+        self.article('ข่าวใหม่')
+        self.assertEqual(self.ingest(), ['ข่าวใหม่'])
+
+        # บรรณาธิการตั้งวันเผยแพร่ย้อนหลังไปก่อน cursor
+        self.article('ข่าวย้อนหลัง', published_date=timezone.now() - timedelta(days=3))
+        self.assertEqual(self.ingest(), ['ข่าวย้อนหลัง'])
+
+    def test_articles_with_the_same_time_are_taken_in_id_order(self):
+        """Test articles sharing updated_at are split across runs by id without gaps"""
+        articles = [self.article(f'ข่าว {i}') for i in range(3)]
+        NewsArticle.objects.filter(pk__in=[a.pk for a in articles]).update(updated_at=timezone.now())
+        self.ingester.batch_size = 1
+
+        self.assertEqual([self.ingest() for _ in range(4)], [['ข่าว 0'], ['ข่าว 1'], ['ข่าว 2'], []])
+        self.assertEqual(self.source.last_ingested_id, articles[-1].pk)
+
+    def test_failed_build_does_not_advance_the_cursor(self):
+        """Test articles that could not be turned into records are read again next run"""
+        self.article('ข่าวแรก')
+
+        with mock.patch.object(NewsArticle, 'get_numbers_only', side_effect=ValueError('bad numbers')):
+            with self.assertRaises(ValueError):
+                self.ingest()
+
+        self.source.refresh_from_db()
+        self.assertIsNone(self.source.last_ingested_at)
+        self.assertEqual(self.ingest(), ['ข่าวแรก'])
+
+
+class DataIngestionManagerTests(TestCase):
+    """Test per-source error isolation in the ingestion manager"""
+
+    def test_failing_source_does_not_affect_others(self):
+        """Test an error in one source is reported while other sources still ingest"""
+        news = DataSource.objects.create(name='ข่าว', source_type='news')
+        trends = DataSource.objects.create(name='เทรนด์', source_type='trends')
+        manager = DataIngestionManager()
+
+        # connection.close() ของ thread ใน pool ปิด transaction ของเทสต์
+        with mock.patch('ai_engine.data_ingestion.connection'), \
+                mock.patch.object(manager.news_ingester, 'ingest_from_existing_news', side_effect=RuntimeError('boom')):
+            news_report = manager._run_source(news)
+            trends_report = manager._run_source(trends)
+
+        self.assertEqual((news_report.records, news_report.error), (0, 'boom'))
+        self.assertEqual((trends_report.records, trends_report.error), (5, None))
+        news.refresh_from_db()
+        trends.refresh_from_db()
+        self.assertIsNone(news.last_scraped)
+        self.assertIsNotNone(trends.last_scraped)
+
+
+class PredictionEngineTests(TestCase):
+    """Test the concurrent model run of the prediction engine"""
+
+    def setUp(self):
+        for role, name in (('journalist', 'Journalist'), ('interpreter', 'Interpreter'), ('statistician', 'Statistician')):
+            AIModelType.objects.create(name=name, role=role, description=name, weight_in_ensemble=0.3)
+        sources = {
+            source_type: DataSource.objects.create(name=name, source_type=source_type)
+            for source_type, name in (
+                ('news', 'ข่าว'), ('social_media', 'โซเชียล'), ('astrology', 'ดวง'), ('trends', 'เทรนด์')
+            )
+        }
+        for source_type, count in (('news', 2), ('social_media', 1), ('astrology', 1), ('trends', 1)):
+            for i in range(count):
+                DataIngestionRecord.objects.create(
+                    data_source=sources[source_type], raw_content=f'เลขเด็ด 12 และ 345 งวดนี้ {i}',
+                    relevance_score=0.8, sentiment_score=0.6, processing_status='completed'
+                )
+        DreamInterpretation.objects.create(dream_text='ฝันเห็นงู')
+        today = timezone.localdate()
+        for i, prize in enumerate(['123456', '654321']):
+            LotteryDraw.objects.create(
+                draw_date=today - timedelta(days=16 * i + 1), first_prize=prize, two_digit=prize[-2:],
+                three_digit_front='123', three_digit_back='456'
+            )
+
+    def test_run_prediction_records_timing_and_sources(self):
+        """Test each model run is saved with its timing and the sources it used"""
+        engine = PredictionEngine()
+        session = engine.create_prediction_session(timezone.now() + timedelta(days=2))
+
+        ensemble = engine.run_prediction(session)
+
+        session.refresh_from_db()
+        self.assertEqual(session.status, 'completed')
+        self.assertEqual(ensemble.session, session)
+        predictions = {p.model_type.role: p for p in ModelPrediction.objects.filter(session=session)}
+        self.assertEqual(set(predictions), {'journalist', 'interpreter', 'statistician'})
+        for prediction in predictions.values():
+            self.assertGreater(prediction.processing_time, 0)
+            self.assertGreater(prediction.input_data_summary['timing']['wall_seconds'], 0)
+            self.assertGreaterEqual(prediction.input_data_summary['timing']['cpu_seconds'], 0)
+
+        self.assertEqual(predictions['journalist'].data_sources_used, [
+            {'source': 'ข่าว', 'type': 'news', 'records': 2},
+            {'source': 'โซเชียล', 'type': 'social_media', 'records': 1},
+        ])
+        self.assertEqual(predictions['interpreter'].data_sources_used, [
+            {'source': 'ดวง', 'type': 'astrology', 'records': 1},
+            {'source': 'DreamInterpretation', 'type': 'dreams', 'records': 1},
+        ])
+        self.assertEqual(predictions['statistician'].data_sources_used, [
+            {'source': 'LotteryDraw', 'type': 'lottery_results', 'records': 2},
+        ])
+
+
+def legacy_numbers(text):
+    """TextProcessor.extract_numbers_from_text เดิม: regex ทีละจำนวนหลัก"""
+    numbers = []
+    for pattern in (r'\b\d{1}\b', r'\b\d{2}\b', r'\b\d{3}\b', r'\b\d{4}\b', r'\b\d{6}\b'):
+        numbers.extend(re.findall(pattern, text))
+    return {
+        num for num in numbers
+        if not (len(num) == 4 and num.startswith(('19', '20'))) and not (len(num) == 1 and int(num) < 1)
+    }
+
+
+def legacy_sentiment(text):
+    """TextProcessor.calculate_sentiment_score เดิม: ค้นทีละคำ"""
+    if not text or not text.split():
+        return 0.5
+    text_lower = text.lower()
+    positive = sum(1 for word in POSITIVE_WORDS if word in text_lower)
+    negative = sum(1 for word in NEGATIVE_WORDS if word in text_lower)
+    return max(0.0, min(1.0, 0.5 + (positive - negative) / (len(text.split()) * 2)))
+
+
+def legacy_relevance(text):
+    """TextProcessor.calculate_relevance_score เดิม: น้ำหนัก 2 / 1 / 0.5 ต่อกลุ่มคำ"""
+    text_lower = text.lower()
+    main = sum(2 for word in ['หวย', 'ลอตเตอรี่', 'เลขเด็ด', 'ทำนาย', 'รางวัล'] if word in text_lower)
+    secondary = sum(1 for word in ['เลข', 'งวด', 'ออก', 'แม่น', 'ถูก', 'โชค', 'เฮง'] if word in text_lower)
+    dream = sum(0.5 for word in ['ฝัน', 'ความฝัน', 'งู', 'ช้าง', 'ปลา'] if word in text_lower)
+    return min(1.0, (main + secondary + dream) / (5 * 2 + 7 + 5 * 0.5))
+
+
+class TextAnalyzerParityTests(TestCase):
+    """Test the one-pass text analyzer against the old per-word TextProcessor"""
+
+    TEXTS = [
+        '',
+        '   ',
+        'หวยงวดนี้ เลขเด็ด 12 34 567 ออกแน่ 123456',
+        'ปี 2024 และ 1999 ไม่ใช่เลข แต่ 2100 3000 และ 0 0 7 ใช่',
+        'เลข 12345 กับ 1234567 ยาวเกิน ส่วน 00 และ 000 ยังนับ',
+        'โชคร้ายมาก เสียใจ พลาดรางวัล',
+        'ฝันเห็นงูกับช้าง ความฝันแม่นๆ เฮงๆ รวยๆ',
+        'LOTTO หวย ลอตเตอรี่ ทำนาย 45,67 89/12',
+        'งวด12 ไม่มีขอบคำ 9.5 และ 08:30 น.',
+    ]
+
+    def test_numbers_match_the_old_patterns(self):
+        """Test years, the single 0 and 5-digit runs are filtered as before"""
+        for text in self.TEXTS:
+            self.assertEqual(set(extract_numbers(text)), legacy_numbers(text), text)
+
+        numbers = extract_numbers('ปี 2024 1999 เลข 2100 0 7 12345 00 123456 12 12')
+        self.assertEqual(numbers, ['2100', '7', '00', '123456', '12'])
+
+    def test_keywords_and_sentiment_match_the_old_lists(self):
+        """Test nested words such as "โชค" in "โชคร้าย" are counted as before"""
+        for text in self.TEXTS:
+            analysis = text_analyzer.analyze(text)
+            text_lower = text.lower()
+            self.assertEqual(
+                analysis.keywords, [word for word in LOTTERY_KEYWORDS + DREAM_SYMBOLS if word in text_lower], text
+            )
+            self.assertAlmostEqual(analysis.sentiment_score, legacy_sentiment(text), msg=text)
+
+        analysis = text_analyzer.analyze('โชคร้าย')
+        self.assertEqual((analysis.keywords, analysis.positive_count, analysis.negative_count), (['โชค'], 1, 1))
+
+    def test_relevance_weights_match_the_old_score(self):
+        """Test relevance keeps the 2 / 1 / 0.5 group weights"""
+        self.assertEqual([weight for _, weight in RELEVANCE_KEYWORDS], [2, 1, 0.5])
+        for text in self.TEXTS:
+            self.assertAlmostEqual(text_analyzer.analyze(text).relevance_score, legacy_relevance(text), msg=text)
+
+        self.assertAlmostEqual(text_analyzer.analyze('หวย').relevance_score, 2 / 19.5)
+        self.assertAlmostEqual(text_analyzer.analyze('งวด').relevance_score, 1 / 19.5)
+        self.assertAlmostEqual(text_analyzer.analyze('งู').relevance_score, 0.5 / 19.5)
+
+    def test_empty_text(self):
+        """Test empty text gives no numbers, no keywords and neutral scores"""
+        analysis = text_analyzer.analyze('')
 
-# Create your tests here.
+        self.assertEqual((analysis.numbers, analysis.keywords), ([], []))
+        self.assertEqual((analysis.sentiment_score, analysis.relevance_score), (0.5, 0.0))
+        self.assertEqual(extract_numbers(''), [])
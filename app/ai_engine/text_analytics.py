@@ -0,0 +1,143 @@
+"""
+Text Analytics - สกัดตัวเลข คำสำคัญ คะแนนอารมณ์ และความเกี่ยวข้องจากข้อความในการสแกนรอบเดียว
+ตัวเลขใช้ regex ที่คอมไพล์ไว้ตัวเดียวแล้วจำแนกตามจำนวนหลัก ส่วนทุกรายการคำรวมเป็นชุดคำเดียว (ไม่ซ้ำ)
+ที่ค้นในข้อความ lower ครั้งเดียว แล้วนับแต่ละรายการจากตารางลำดับคำที่เตรียมไว้
+ผลลัพธ์เหมือนการค้นหาทีละ regex/ทีละคำแบบเดิมของ TextProcessor
+"""
+
+import re
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+# ตัวเลขทั้งก้อน จำนวนหลักที่นำไปใช้: 1-4 หลัก และ 6 หลัก (หวย)
+NUMBER_PATTERN = re.compile(r'\b\d+\b')
+NUMBER_LENGTHS = frozenset({1, 2, 3, 4, 6})
+
+# คำสำคัญที่เกี่ยวข้องกับหวย
+LOTTERY_KEYWORDS = [
+    'หวย', 'ลอตเตอรี่', 'เลข', 'งวด', 'ออก', 'รางวัล',
+    'เด็ด', 'ดัง', 'แม่น', 'ถูก', 'รวย', 'โชค',
+    'ทำนาย', 'พยากรณ์', 'วิเคราะห์', 'สถิติ',
+    'ความฝัน', 'ฝัน', 'เฮง', 'มงคล', 'ศาล', 'วัด'
+]
+
+# ความฝันและสัญลักษณ์
+DREAM_SYMBOLS = [
+    'งู', 'ช้าง', 'ปลา', 'นก', 'แมว', 'หมา', 'เสือ', 'หนู',
+    'ผี', 'เทพ', 'พระ', 'แม่', 'พ่อ', 'ลิง', 'กบ', 'เต่า',
+    'น้ำ', 'ไฟ', 'ฟ้า', 'ดิน', 'ต้นไม้', 'ดอกไม้', 'บ้าน', 'รถ'
+]
+
+# คำบวก
+POSITIVE_WORDS = [
+    'ดี', 'เยี่ยม', 'ยอด', 'สุดยอด', 'แม่น', 'ถูก', 'รวย',
+    'โชค', 'เฮง', 'มงคล', 'ได้', 'ชนะ', 'รางวัล', 'ดัง'
+]
+
+# คำลบ
+NEGATIVE_WORDS = [
+    'แย่', 'เสีย', 'เสี่ยง', 'อันตราย', 'ผิด', 'พลาด',
+    'เสียใจ', 'โชคร้าย', 'ล้มเหลว', 'ปัญหา', 'ลำบาก'
+]
+
+# คำที่ใช้คำนวณความเกี่ยวข้องกับการทำนายหวย และน้ำหนักของแต่ละกลุ่ม
+RELEVANCE_KEYWORDS = [
+    (['หวย', 'ลอตเตอรี่', 'เลขเด็ด', 'ทำนาย', 'รางวัล'], 2),          # คำสำคัญหลัก
+    (['เลข', 'งวด', 'ออก', 'แม่น', 'ถูก', 'โชค', 'เฮง'], 1),           # คำสำคัญรอง
+    (['ฝัน', 'ความฝัน', 'งู', 'ช้าง', 'ปลา'], 0.5),                      # คำสำคัญความฝัน
+]
+
+
+class TextAnalysis(NamedTuple):
+    """ผลวิเคราะห์ข้อความหนึ่งชิ้น"""
+    numbers: List[str]
+    keywords: List[str]
+    positive_count: int
+    negative_count: int
+    word_count: int
+    relevance_score: float
+
+    @property
+    def sentiment_score(self) -> float:
+        """คะแนนอารมณ์ (0-1) 0.5 คือเป็นกลาง"""
+        if self.word_count == 0:
+            return 0.5
+        score = 0.5 + (self.positive_count - self.negative_count) / (self.word_count * 2)
+        return max(0.0, min(1.0, score))
+
+
+def extract_numbers(text: str) -> List[str]:
+    """ตัวเลขที่ใช้ได้ในข้อความ (ไม่ซ้ำ ตามลำดับที่พบ) ข้ามปี ค.ศ. และเลข 0 หลักเดียว"""
+    numbers = {}
+    for number in NUMBER_PATTERN.findall(text):
+        length = len(number)
+        if length not in NUMBER_LENGTHS:
+            continue
+        # ข้ามปี ค.ศ.
+        if length == 4 and number[:2] in ('19', '20'):
+            continue
+        # ข้ามเลขที่มีค่าน้อยเกินไป
+        if length == 1 and int(number) < 1:
+            continue
+        numbers[number] = None
+    return list(numbers)
+
+
+class TextAnalyzer:
+    """
+    ชุดคำรวมของทุกรายการ (คำที่อยู่หลายรายการเก็บครั้งเดียว) พร้อมลำดับคำของแต่ละรายการ
+    สร้างครั้งเดียวแล้วใช้ซ้ำได้หลาย thread
+    """
+
+    def __init__(self, keywords: Iterable[str] = None, positive_words: Iterable[str] = None,
+                 negative_words: Iterable[str] = None, relevance_keywords=None):
+        keywords = list(keywords if keywords is not None else LOTTERY_KEYWORDS + DREAM_SYMBOLS)
+        positive_words = list(positive_words if positive_words is not None else POSITIVE_WORDS)
+        negative_words = list(negative_words if negative_words is not None else NEGATIVE_WORDS)
+        relevance_keywords = relevance_keywords if relevance_keywords is not None else RELEVANCE_KEYWORDS
+
+        ids: Dict[str, int] = {}
+        for word in keywords + positive_words + negative_words:
+            ids.setdefault(word, len(ids))
+        for words, _ in relevance_keywords:
+            for word in words:
+                ids.setdefault(word, len(ids))
+
+        self._words: List[str] = list(ids)
+        self._keywords: List[Tuple[int, str]] = [(ids[word], word) for word in keywords]
+        self._positive = [ids[word] for word in positive_words]
+        self._negative = [ids[word] for word in negative_words]
+        self._relevance: List[Tuple[int, float]] = [
+            (ids[word], weight) for words, weight in relevance_keywords for word in words
+        ]
+        self._max_relevance = sum(weight for _, weight in self._relevance)
+
+    def analyze(self, text: str) -> TextAnalysis:
+        """วิเคราะห์ข้อความหนึ่งชิ้น: regex หนึ่งรอบสำหรับตัวเลข และค้นชุดคำรวมหนึ่งรอบ"""
+        if not text:
+            return TextAnalysis([], [], 0, 0, 0, 0.0)
+
+        text_lower = text.lower()
+        # found[i] = คำลำดับที่ i อยู่ในข้อความหรือไม่ (นับคำที่ซ้อนกันด้วย เช่น "โชค" ใน "โชคร้าย")
+        found = [word in text_lower for word in self._words]
+
+        relevance = 0.0
+        if self._max_relevance:
+            score = sum(weight for word_id, weight in self._relevance if found[word_id])
+            relevance = min(1.0, score / self._max_relevance)
+
+        return TextAnalysis(
+            numbers=extract_numbers(text),
+            keywords=[word for word_id, word in self._keywords if found[word_id]],
+            positive_count=sum(1 for word_id in self._positive if found[word_id]),
+            negative_count=sum(1 for word_id in self._negative if found[word_id]),
+            word_count=len(text.split()),
+            relevance_score=relevance,
+        )
+
+    def analyze_many(self, texts: Iterable[str]) -> List[TextAnalysis]:
+        """วิเคราะห์หลายข้อความ ผลเรียงตามลำดับเดียวกับข้อความที่ส่งเข้ามา"""
+        analyze = self.analyze
+        return [analyze(text) for text in texts]
+
+
+text_analyzer = TextAnalyzer()
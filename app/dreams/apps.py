@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class DreamsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dreams'
+
+    def ready(self):
+        # ล้าง automaton ของคำสำคัญเมื่อ DreamKeyword เปลี่ยน
+        from . import signals  # noqa: F401
@@ -0,0 +1,172 @@
+"""
+Keyword Matcher - ค้นหา DreamKeyword ทุกคำในข้อความด้วย Aho-Corasick automaton
+คอมไพล์ครั้งเดียวต่อ process แล้วใช้ร่วมกัน สแกนข้อความรอบเดียวโดยไม่ขึ้นกับจำนวนคำสำคัญ
+และไม่ต้อง query ฐานข้อมูล ผลลัพธ์เหมือนการค้นทีละคำแบบเดิม (คำยาวก่อน ไม่ซ้อนทับกัน)
+สร้างใหม่เมื่อเวอร์ชันของคำสำคัญในฐานข้อมูลเปลี่ยน (process ที่แก้ไขล้างทันที ดู signals.py)
+"""
+
+import threading
+from collections import deque
+from operator import attrgetter
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from .models import DreamKeyword
+
+VERSION_KEY = 'dreams:keyword_version'
+# อายุของเวอร์ชันที่แคชไว้ (แคชแยกตาม process คำสำคัญที่ถูกแก้จาก process อื่นจะเห็นภายในเวลานี้)
+VERSION_TIMEOUT = 300
+
+# คำที่ไม่นับเมื่อตามด้วยตัวอักษรเหล่านี้ เช่น "หมู" ใน "หมู่" และ "ขา" ใน "ขาว"
+EXCLUDED_FOLLOWERS = {
+    'หมู': {'่'},
+    'ขา': {'ว'},
+}
+
+
+class KeywordMatch(NamedTuple):
+    start: int
+    end: int
+    keyword: DreamKeyword
+
+
+class KeywordMatcher:
+    """
+    automaton ของคำสำคัญทั้งหมด (อ่านอย่างเดียวหลังสร้าง จึงใช้ได้หลาย thread)
+    คำยาวกว่าได้ตำแหน่งก่อนทั้งข้อความ คำยาวเท่ากันเรียงตามลำดับที่ส่งเข้ามา
+    """
+
+    def __init__(self, keywords: Iterable[DreamKeyword], version=None):
+        self.version = version
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # ความยาวของคำที่จบที่ state นี้ (รวมคำที่ได้จาก fail link)
+        self._out: List[List[int]] = [[]]
+        # คำ (ตัวพิมพ์เล็ก) -> DreamKeyword ตัวแรกของคำนั้น
+        self._entries: Dict[str, DreamKeyword] = {}
+
+        for keyword in keywords:
+            pattern = keyword.keyword.lower()
+            if pattern and pattern not in self._entries:
+                self._entries[pattern] = keyword
+                self._add(pattern)
+        self._build_failure_links()
+        # ลำดับความสำคัญ: ยาวไปสั้น ยาวเท่ากันตามลำดับที่ส่งเข้ามา (sorted คงลำดับเดิมของคำที่ยาวเท่ากัน)
+        self._priority: Dict[str, int] = {
+            pattern: rank for rank, pattern in enumerate(sorted(self._entries, key=len, reverse=True))
+        }
+
+    def _add(self, pattern: str):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+        self._out[state].append(len(pattern))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._out[next_state].extend(self._out[self._fail[next_state]])
+
+    def __len__(self):
+        return len(self._entries)
+
+    def find(self, text: str) -> List[KeywordMatch]:
+        """
+        คำสำคัญที่พบในข้อความ เรียงตามตำแหน่ง
+        ไล่คำจากยาวไปสั้น แต่ละคำจับตำแหน่งแรกที่ไม่ซ้อนกับคำที่จับไปแล้ว (คำละหนึ่งตำแหน่ง)
+        """
+        text = text.lower()
+        # คำ -> ตำแหน่งเริ่มทั้งหมดที่พบ เรียงจากซ้ายไปขวา
+        starts: Dict[str, List[int]] = {}
+        state = 0
+
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+
+            following = text[index + 1] if index + 1 < len(text) else ''
+            for length in self._out[state]:
+                start = index - length + 1
+                pattern = text[start:index + 1]
+                if following in EXCLUDED_FOLLOWERS.get(pattern, ()):
+                    continue
+                starts.setdefault(pattern, []).append(start)
+
+        claimed = [False] * len(text)
+        matches = []
+        for pattern in sorted(starts, key=self._priority.__getitem__):
+            length = len(pattern)
+            for start in starts[pattern]:
+                end = start + length
+                if not any(claimed[start:end]):
+                    claimed[start:end] = [True] * length
+                    matches.append(KeywordMatch(start, end, self._entries[pattern]))
+                    break
+        matches.sort(key=attrgetter('start'))
+        return matches
+
+    def keywords_in(self, text: str) -> List[DreamKeyword]:
+        """DreamKeyword ที่พบ (คำละครั้ง ตามลำดับที่พบในข้อความ)"""
+        found = {}
+        for match in self.find(text):
+            found.setdefault(match.keyword.keyword, match.keyword)
+        return list(found.values())
+
+
+_matcher: Optional[KeywordMatcher] = None
+_matcher_lock = threading.Lock()
+
+
+def get_keyword_version():
+    """เวอร์ชันของคำสำคัญจากฐานข้อมูล (query เฉพาะเมื่อเวอร์ชันไม่อยู่ในแคช)"""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        keywords = DreamKeyword.objects.aggregate(
+            total=Count('id'), last_id=Max('id'), modified=Max('updated_at')
+        )
+        modified = keywords['modified'].timestamp() if keywords['modified'] else 0
+        version = f"{keywords['total']}:{keywords['last_id']}:{modified:.6f}"
+        cache.set(VERSION_KEY, version, timeout=VERSION_TIMEOUT)
+    return version
+
+
+def get_keyword_matcher() -> KeywordMatcher:
+    """
+    automaton ที่ใช้ร่วมกันทั้ง process
+    สร้างใหม่เมื่อเวอร์ชันของคำสำคัญในฐานข้อมูลเปลี่ยน รวมถึงเมื่อถูกแก้จาก process อื่น
+    """
+    global _matcher
+    version = get_keyword_version()
+    matcher = _matcher
+    if matcher is None or matcher.version != version:
+        with _matcher_lock:
+            if _matcher is None or _matcher.version != version:
+                keywords = DreamKeyword.objects.select_related('category').order_by('keyword', 'id')
+                _matcher = KeywordMatcher(keywords, version=version)
+            matcher = _matcher
+    return matcher
+
+
+def reset_keyword_matcher():
+    """ล้างเวอร์ชันและ automaton ของ process นี้ ให้อ่านเวอร์ชันใหม่จากฐานข้อมูลเมื่อเรียกใช้ครั้งถัดไป"""
+    global _matcher
+    cache.delete(VERSION_KEY)
+    with _matcher_lock:
+        _matcher = None
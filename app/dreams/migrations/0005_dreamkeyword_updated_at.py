@@ -0,0 +1,18 @@
+# Generated by Django 4.2.13 on 2026-10-16 23:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dreams', '0004_dreaminterpretation_main_symbols_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dreamkeyword',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='วันที่อัปเดต'),
+        ),
+    ]
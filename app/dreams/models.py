@@ -41,6 +41,7 @@ class DreamKeyword(models.Model):
         blank=True,
         help_text="จะถูกสร้างอัตโนมัติจาก common_numbers"
     )
+    updated_at = models.DateTimeField("วันที่อัปเดต", auto_now=True)
     
     class Meta:
         verbose_name = "คำสำคัญความฝัน"
@@ -0,0 +1,17 @@
+"""
+Signals - สร้าง automaton ของคำสำคัญใหม่เมื่อ DreamKeyword เปลี่ยน
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .keyword_matcher import reset_keyword_matcher
+from .models import DreamKeyword
+
+
+@receiver(post_save, sender=DreamKeyword, dispatch_uid='dreams_reset_keyword_matcher_on_save')
+@receiver(post_delete, sender=DreamKeyword, dispatch_uid='dreams_reset_keyword_matcher_on_delete')
+def dream_keyword_changed(sender, **kwargs):
+    """สร้างใหม่หลัง commit เพื่อไม่ให้ process อื่นโหลดคำสำคัญก่อนข้อมูลถูกบันทึกจริง"""
+    transaction.on_commit(reset_keyword_matcher)
@@ -1,3 +1,92 @@
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
 
-# Create your tests here.
+from dreams.keyword_matcher import KeywordMatcher, get_keyword_matcher, reset_keyword_matcher
+from dreams.models import DreamCategory, DreamKeyword
+
+
+class KeywordMatcherTests(TestCase):
+    """Test the Aho-Corasick dream keyword matcher"""
+
+    def setUp(self):
+        self.category = DreamCategory.objects.create(name='สัตว์')
+
+    def tearDown(self):
+        reset_keyword_matcher()
+
+    def keyword(self, word, save=False):
+        keyword = DreamKeyword(
+            keyword=word, category=self.category, main_number='1', secondary_number='2', common_numbers='12'
+        )
+        if save:
+            keyword.save()
+        return keyword
+
+    def matcher(self, *words):
+        return KeywordMatcher([self.keyword(word) for word in words])
+
+    def found(self, matcher, text):
+        return [(match.start, match.end, match.keyword.keyword) for match in matcher.find(text)]
+
+    def test_finds_overlapping_and_nested_patterns(self):
+        """Test keywords reached only through failure links are found"""
+        matcher = self.matcher('he', 'she', 'his', 'hers')
+
+        self.assertEqual(self.found(matcher, 'ushers'), [(2, 6, 'hers')])
+        self.assertEqual(self.found(matcher, 'she'), [(0, 3, 'she')])
+        self.assertEqual([k.keyword for k in matcher.keywords_in('this is his')], ['his'])
+        self.assertEqual(matcher.find('xyz'), [])
+
+    def test_longer_keywords_claim_text_first(self):
+        """Test longer keywords win over the whole text, not only at the same start"""
+        matcher = self.matcher('ab', 'bcde', 'a')
+
+        self.assertEqual(self.found(matcher, 'abcde'), [(0, 1, 'a'), (1, 5, 'bcde')])
+
+    def test_each_keyword_takes_its_first_free_occurrence(self):
+        """Test a shorter keyword can match a later occurrence not covered by a longer one"""
+        matcher = self.matcher('งูเห่า', 'งู')
+
+        self.assertEqual(
+            [k.keyword for k in matcher.keywords_in('ฝันเห็นงูเห่า แล้วเห็นงูอีกตัว')], ['งูเห่า', 'งู']
+        )
+        self.assertEqual([k.keyword for k in matcher.keywords_in('งูเห่าตัวใหญ่')], ['งูเห่า'])
+
+    def test_excluded_followers(self):
+        """Test "หมู" before "่" and "ขา" before "ว" are not matched"""
+        matcher = self.matcher('หมู', 'ขา')
+
+        self.assertEqual(matcher.keywords_in('ไปหมู่บ้าน'), [])
+        self.assertEqual(matcher.keywords_in('ฝันเห็นแมวขาว'), [])
+        self.assertEqual([k.keyword for k in matcher.keywords_in('หมู่บ้านมีหมูขาหัก')], ['หมู', 'ขา'])
+
+    def test_shared_matcher_is_rebuilt_after_commit(self):
+        """Test keyword changes reach the shared matcher only once the transaction commits"""
+        self.keyword('ช้าง', save=True)
+        reset_keyword_matcher()
+        matcher = get_keyword_matcher()
+        with self.assertNumQueries(0):
+            self.assertIs(get_keyword_matcher(), matcher)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.keyword('ปลา', save=True)
+            # ยังไม่ commit ใช้ automaton เดิม
+            self.assertIs(get_keyword_matcher(), matcher)
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual([k.keyword for k in get_keyword_matcher().keywords_in('ช้างกับปลา')], ['ช้าง', 'ปลา'])
+
+    def test_changes_from_another_process_are_picked_up(self):
+        """Test the matcher is rebuilt from the database version once the cached version expires"""
+        keyword = self.keyword('ช้าง', save=True)
+        reset_keyword_matcher()
+        matcher = get_keyword_matcher()
+
+        # process อื่นแก้คำสำคัญ: signal ไม่ได้ล้างแคชของ process นี้
+        DreamKeyword.objects.filter(pk=keyword.pk).update(keyword='ปลา', updated_at=timezone.now())
+        self.assertIs(get_keyword_matcher(), matcher)
+
+        # เวอร์ชันในแคชหมดอายุ
+        cache.clear()
+        self.assertEqual([k.keyword for k in get_keyword_matcher().keywords_in('ช้างกับปลา')], ['ปลา'])
@@ -2,6 +2,7 @@ from django.shortcuts import render
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
+from .keyword_matcher import get_keyword_matcher
 from .models import DreamKeyword, DreamInterpretation
 import json
 import re
@@ -116,60 +117,24 @@ def analyze_dream_text(dream_text):
     suggested_numbers = []
     matched_keywords_info = []  # เก็บข้อมูลเลขเด่น/เลขรอง
     
-    # ค้นหา keywords ที่ตรงกับในฐานข้อมูล
-    # เรียงลำดับตามความยาวของ keyword (ยาวที่สุดก่อน) เพื่อจับคำที่เฉพาะเจาะจงมากกว่า
-    all_keywords = sorted(DreamKeyword.objects.all(), key=lambda x: len(x.keyword), reverse=True)
+    # ค้นหา keywords ที่ตรงกับในฐานข้อมูลด้วย automaton ที่คอมไพล์ไว้ (คำที่ยาวที่สุด ไม่ซ้อนทับกัน)
+    # เรียงคำที่ยาวกว่าก่อน เพื่อให้คำที่เฉพาะเจาะจงมากกว่าอยู่ในรายการที่แสดง
+    matched = sorted(get_keyword_matcher().keywords_in(dream_text), key=lambda x: len(x.keyword), reverse=True)
     
-    matched_positions = []  # เก็บตำแหน่งที่จับได้แล้ว เพื่อไม่ให้ซ้ำ
-    
-    for keyword_obj in all_keywords:
-        keyword = keyword_obj.keyword.lower()
+    for keyword_obj in matched:
+        found_keywords.append(keyword_obj.keyword)
+        
+        # เก็บข้อมูลเลขเด่น/เลขรอง เฉพาะคำที่พบ
+        matched_keywords_info.append({
+            'keyword': keyword_obj.keyword,
+            'category': keyword_obj.category.name,
+            'main_number': keyword_obj.main_number,
+            'secondary_number': keyword_obj.secondary_number,
+            'common_numbers': keyword_obj.get_numbers_list()
+        })
         
-        # ค้นหาคำที่ตรงกันทั้งคำ และไม่ซ้อนทับกับคำที่จับแล้ว
-        if keyword in dream_text:
-            # หาตำแหน่งทั้งหมดที่พบคำนี้
-            start_idx = 0
-            while True:
-                idx = dream_text.find(keyword, start_idx)
-                if idx == -1:
-                    break
-                
-                start, end = idx, idx + len(keyword)
-                
-                # ตรวจสอบว่าเป็นคำสมบูรณ์ โดยเฉพาะกรณีที่อาจเป็นส่วนของคำอื่น
-                is_valid_match = True
-                
-                # ตรวจสอบเฉพาะกรณีที่เป็นปัญหา เช่น "หมู" ใน "หมู่"
-                if end < len(dream_text):
-                    next_char = dream_text[end]
-                    # ถ้าเป็น "หมู" และตามด้วย "่" ให้ข้าม
-                    if keyword == "หมู" and next_char == "่":
-                        is_valid_match = False
-                    # ถ้าเป็น "ขา" และตามด้วย "ว" ให้ข้าม (กรณี "ขาว")
-                    elif keyword == "ขา" and next_char == "ว":
-                        is_valid_match = False
-                
-                # ตรวจสอบว่าตำแหน่งนี้ถูกจับแล้วหรือไม่
-                overlap = any(start < pos_end and end > pos_start for pos_start, pos_end in matched_positions)
-                
-                if not overlap and is_valid_match:
-                    matched_positions.append((start, end))
-                    found_keywords.append(keyword_obj.keyword)
-                    
-                    # เก็บข้อมูลเลขเด่น/เลขรอง เฉพาะคำที่พบ
-                    matched_keywords_info.append({
-                        'keyword': keyword_obj.keyword,
-                        'category': keyword_obj.category.name,
-                        'main_number': keyword_obj.main_number,
-                        'secondary_number': keyword_obj.secondary_number,
-                        'common_numbers': keyword_obj.get_numbers_list()
-                    })
-                    
-                    # เพิ่มเลขที่มักตี
-                    suggested_numbers.extend(keyword_obj.get_numbers_list())
-                    break  # เจอแล้วครั้งแรกก็พอ
-                
-                start_idx = idx + 1
+        # เพิ่มเลขที่มักตี
+        suggested_numbers.extend(keyword_obj.get_numbers_list())
     
     # ลบเลขซ้ำและเรียงลำดับ
     suggested_numbers = list(dict.fromkeys(suggested_numbers))
@@ -56,18 +56,21 @@ def get_next_draw_prediction():
             })
         
         # เลขเย็น - ไม่ออกนานแล้ว มีโอกาสออก
+        # ใช้วันที่ออกล่าสุดคำนวณจำนวนวันที่ไม่ออก ณ วันนี้
+        today = timezone.now().date()
         cold_numbers = NumberStatistics.objects.filter(
             number_type='2D',
-            days_since_last__gte=30,
+            last_appeared__lte=today - timedelta(days=30),
             total_appearances__gte=1
-        ).order_by('-days_since_last')[:4]
+        ).order_by('last_appeared')[:4]
         
         for cold_num in cold_numbers:
+            days_since_last = (today - cold_num.last_appeared).days
             statistical_numbers.append({
                 'number': cold_num.number,
                 'source': 'cold_stats',
-                'confidence': min(75, 40 + (cold_num.days_since_last // 10)),
-                'reason': f'ไม่ออก {cold_num.days_since_last} วัน'
+                'confidence': min(75, 40 + (days_since_last // 10)),
+                'reason': f'ไม่ออก {days_since_last} วัน'
             })
             
     except Exception:
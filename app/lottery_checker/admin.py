@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import LottoResult
+from .models import BackgroundJob, LottoResult
 
 @admin.register(LottoResult)
 class LottoResultAdmin(admin.ModelAdmin):
@@ -68,3 +68,14 @@ class LottoResultAdmin(admin.ModelAdmin):
         """ไม่อนุญาตให้ลบข้อมูลผ่าน admin"""
         return False
 
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    """งานเบื้องหลังที่รันโดย worker (python manage.py run_jobs)"""
+    
+    list_display = ['id', 'kind', 'status', 'processed_items', 'total_items', 'failed_items',
+                    'worker', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind']
+    readonly_fields = ['created_at', 'started_at', 'heartbeat_at', 'finished_at']
+    ordering = ['-created_at']
@@ -5,3 +5,7 @@ class LotteryCheckerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'lottery_checker'
     verbose_name = 'ตรวจสอบหวย'
+
+    def ready(self):
+        # คอมไพล์ตารางค้นหารางวัลเมื่อบันทึกผลรางวัล
+        from . import signals  # noqa: F401
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GLO Client - HTTP client สำหรับ GLO API ที่ใช้ connection pool ร่วมกันทั้ง process
+keep-alive, retry แบบ exponential backoff + jitter เมื่อเจอ 5xx/timeout, circuit breaker และเก็บเวลาตอบสนองของแต่ละครั้ง
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+GLO_API_URL = "https://www.glo.or.th/api/checking/getLotteryResult"
+
+
+class CircuitBreaker:
+    """หยุดเรียก API ชั่วคราวเมื่อผิดพลาดติดกันเกินกำหนด แล้วลองใหม่หนึ่งครั้งเมื่อครบเวลา"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_started_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """อนุญาตให้เรียก API หรือไม่ (สถานะ half-open ให้ผ่านทีละหนึ่งครั้ง)"""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.OPEN:
+                if now - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_started_at = now
+                return True
+            if self.state == self.HALF_OPEN:
+                # มีการลองอยู่แล้ว รอผลก่อน (ถ้าไม่มีผลภายใน reset_timeout ให้ลองใหม่ได้อีกหนึ่งครั้ง)
+                if now - self._trial_started_at < self.reset_timeout:
+                    return False
+                self._trial_started_at = now
+                return True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"⚡ เปิด circuit breaker ของ GLO API หลังผิดพลาด {self.failures} ครั้ง")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class GLOClient:
+    """client ที่ใช้ร่วมกันได้หลาย thread (requests.Session + HTTPAdapter pool)"""
+
+    RETRY_STATUSES = {500, 502, 503, 504}
+
+    def __init__(self, pool_size: int = 10, connect_timeout: float = 3.05, read_timeout: float = 10,
+                 max_retries: int = 3, backoff_seconds: float = 0.5, max_backoff_seconds: float = 8,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0, latency_window: int = 200):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max(0, max_retries)
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+        self.session = requests.Session()
+        self.session.headers.update({'Content-Type': 'application/json'})
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._metrics_lock = threading.Lock()
+        self._latencies = deque(maxlen=latency_window)
+        self._counters = {'calls': 0, 'attempts': 0, 'retries': 0, 'errors': 0, 'rejected': 0}
+
+    def _backoff(self, attempt: int) -> float:
+        """เวลารอก่อนลองใหม่: exponential backoff แบบ full jitter"""
+        return random.uniform(0, min(self.max_backoff_seconds, self.backoff_seconds * (2 ** attempt)))
+
+    def _record(self, counter: str, latency: Optional[float] = None):
+        with self._metrics_lock:
+            self._counters[counter] += 1
+            if latency is not None:
+                self._latencies.append(latency)
+
+    def post_json(self, url: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """POST JSON แล้วคืนค่า JSON ที่ได้ (ผิดพลาดหรือ circuit เปิดอยู่คืน None)"""
+        self._record('calls')
+
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                self._record('rejected')
+                logger.warning("⚡ circuit breaker เปิดอยู่ ข้ามการเรียก GLO API")
+                return None
+
+            if attempt:
+                self._record('retries')
+            started = time.perf_counter()
+            retryable = False
+            # ผลของครั้งนี้สำหรับ circuit breaker บันทึกทุกทางออก (รวม exception ที่ไม่คาดคิด)
+            # เพื่อไม่ให้การลองในสถานะ half-open ค้างอยู่
+            server_ok = False
+
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout)
+                self._record('attempts', time.perf_counter() - started)
+
+                if response.status_code == 200:
+                    data = response.json()
+                    server_ok = True
+                    return data
+
+                logger.error(f"❌ API ส่งคืน status code: {response.status_code}")
+                retryable = response.status_code in self.RETRY_STATUSES
+                # 4xx เป็นปัญหาของ request ไม่ใช่ของ server
+                server_ok = not retryable
+
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                self._record('attempts', time.perf_counter() - started)
+                logger.error(f"❌ เกิดข้อผิดพลาดในการเรียก API: {e}")
+                retryable = True
+            except json.JSONDecodeError as e:
+                logger.error(f"❌ ไม่สามารถแปลง JSON ได้: {e}")
+                server_ok = True
+            except requests.exceptions.RequestException as e:
+                self._record('attempts', time.perf_counter() - started)
+                logger.error(f"❌ เกิดข้อผิดพลาดในการเรียก API: {e}")
+            finally:
+                if server_ok:
+                    self.breaker.record_success()
+                else:
+                    self.breaker.record_failure()
+
+            if not retryable or attempt == self.max_retries:
+                break
+            time.sleep(self._backoff(attempt))
+
+        self._record('errors')
+        return None
+
+    def metrics(self) -> Dict[str, Any]:
+        """จำนวนการเรียกและเวลาตอบสนอง (วินาที) ของการเรียกล่าสุด"""
+        with self._metrics_lock:
+            counters = dict(self._counters)
+            latencies = sorted(self._latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 4)
+
+        return {
+            **counters,
+            'circuit_state': self.breaker.state,
+            'latency': {
+                'samples': len(latencies),
+                'avg': round(sum(latencies) / len(latencies), 4) if latencies else None,
+                'p50': percentile(0.5),
+                'p95': percentile(0.95),
+                'max': round(latencies[-1], 4) if latencies else None,
+            },
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_glo_client() -> GLOClient:
+    """client ที่ใช้ร่วมกันทั้ง process (ตั้งค่าผ่าน environment variables)"""
+    global _shared_client
+    if _shared_client is None:
+        with _shared_lock:
+            if _shared_client is None:
+                _shared_client = GLOClient(
+                    pool_size=int(os.environ.get('GLO_POOL_SIZE', 10)),
+                    read_timeout=float(os.environ.get('GLO_TIMEOUT', 10)),
+                    max_retries=int(os.environ.get('GLO_MAX_RETRIES', 3)),
+                )
+    return _shared_client
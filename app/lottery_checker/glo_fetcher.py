@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GLO Bulk Fetcher - ดึงผลรางวัลย้อนหลังจาก GLO API เฉพาะวันที่หวยออก
+ใช้ปฏิทินวันที่หวยออกที่คำนวณไว้แล้ว, worker pool จำกัดจำนวน, token bucket และ retry แบบ backoff
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from .lotto_service import LottoService, has_valid_lottery_data
+from .models import LottoResult
+from utils.lottery_dates import LOTTERY_DATES
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """จำกัดอัตราการเรียก API (ใช้ร่วมกันได้หลาย thread)"""
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """รอจนกว่าจะมี token ว่าง แล้วใช้หนึ่ง token"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def candidate_draw_dates(start_date: date, end_date: date) -> List[date]:
+    """
+    วันที่หวยออกในช่วงที่กำหนด จากปฏิทินวันที่หวยออก
+    ถ้าปฏิทินไม่ครอบคลุมช่วงนี้ ใช้วันที่ 1 และ 16 ของทุกเดือนแทน
+    """
+    calendar = set()
+    for date_str in LOTTERY_DATES.get_all_draw_dates():
+        draw_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        if start_date <= draw_date <= end_date:
+            calendar.add(draw_date)
+
+    if not calendar:
+        year, month = start_date.year, start_date.month
+        while date(year, month, 1) <= end_date:
+            for day in (1, 16):
+                draw_date = date(year, month, day)
+                if start_date <= draw_date <= end_date:
+                    calendar.add(draw_date)
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    return sorted(calendar)
+
+
+def is_draw_date(day: date) -> bool:
+    """เป็นวันที่หวยออกหรือไม่ (เทียบกับปฏิทินช่วง 31 วันรอบวันนั้น เพื่อให้ใช้กฎ 1/16 เมื่อปฏิทินไม่ครอบคลุมจริงๆ)"""
+    return day in candidate_draw_dates(day - timedelta(days=31), day + timedelta(days=31))
+
+
+class GLOBulkFetcher:
+    """ดึงผลรางวัลหลายงวดพร้อมกัน แล้วบันทึกลงฐานข้อมูลใน thread หลัก"""
+
+    def __init__(self, service: Optional[LottoService] = None, max_workers: int = 4,
+                 rate_per_second: float = 2.0, burst: int = 2, max_retries: int = 1,
+                 backoff_seconds: float = 0.5):
+        self.service = service or LottoService()
+        self.max_workers = max(1, max_workers)
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self.max_retries = max(0, max_retries)
+        self.backoff_seconds = backoff_seconds
+        self._calls = 0
+        self._calls_lock = threading.Lock()
+
+    def _fetch_one(self, draw_date: date):
+        """
+        เรียก API ของวันที่เดียว ลองใหม่แบบ exponential backoff เมื่อไม่ได้ผลลัพธ์
+        (GLOClient retry 5xx/timeout ให้แล้ว ที่นี่จึงลองซ้ำเพียงเล็กน้อย)
+        """
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            with self._calls_lock:
+                self._calls += 1
+            data = self.service.fetch_from_api(draw_date.day, draw_date.month, draw_date.year)
+            if data is not None:
+                return data
+            if attempt < self.max_retries:
+                time.sleep(self.backoff_seconds * (2 ** attempt))
+        return None
+
+    def fetch(self, start_date: date, end_date: Optional[date] = None,
+              force_update: bool = False, progress=None) -> Dict[str, Any]:
+        """
+        ดึงผลรางวัลทุกงวดในช่วงวันที่ คืนค่าสรุปผลในรูปแบบเดียวกับ bulk_fetch_api
+        progress: ตัวรับความคืบหน้ารายวันที่ (เช่น jobs.JobProgress) ที่มีเมธอด start(total), item(key, message, ok) และ flush()
+        """
+        started = time.perf_counter()
+        end_date = end_date or date.today()
+        candidates = candidate_draw_dates(start_date, end_date)
+
+        # ตรวจสอบข้อมูลที่มีอยู่แล้วด้วย query เดียว
+        existing = set(
+            LottoResult.objects.filter(draw_date__in=candidates).values_list('draw_date', flat=True)
+        )
+        to_fetch = [d for d in candidates if force_update or d not in existing]
+
+        statuses = {}
+        
+        def report(draw_date, message, ok=True):
+            statuses[draw_date] = message
+            if progress is not None:
+                progress.item(draw_date, message, ok)
+        
+        if progress is not None:
+            progress.start(len(candidates))
+        for draw_date in candidates:
+            if draw_date not in to_fetch:
+                report(draw_date, f"⏭️ {draw_date}: มีข้อมูลอยู่แล้ว")
+        valid_dates = []
+        fetched_count = 0
+        error_count = 0
+        self._calls = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._fetch_one, d): d for d in to_fetch}
+            for future in as_completed(futures):
+                draw_date = futures[future]
+                try:
+                    data = future.result()
+                    if data is None:
+                        error_count += 1
+                        report(draw_date, f"❌ {draw_date}: ไม่สามารถดึงข้อมูลจาก API ได้", ok=False)
+                        continue
+
+                    if not has_valid_lottery_data(data):
+                        report(draw_date, f"⚠️ {draw_date}: ไม่มีข้อมูลรางวัล")
+                        continue
+
+                    # บันทึกใน thread หลัก เพื่อไม่ให้ worker ต้องเปิด connection ฐานข้อมูลเอง
+                    if self.service.save_to_database(data, draw_date):
+                        valid_dates.append(draw_date.strftime('%Y-%m-%d'))
+                        fetched_count += 1
+                        report(draw_date, f"✅ {draw_date}: พบข้อมูลรางวัล")
+                    else:
+                        error_count += 1
+                        report(draw_date, f"❌ {draw_date}: ไม่สามารถบันทึกลงฐานข้อมูลได้", ok=False)
+                except Exception as e:
+                    error_count += 1
+                    report(draw_date, f"❌ {draw_date}: เกิดข้อผิดพลาด - {str(e)}", ok=False)
+                    logger.error(f"Error fetching {draw_date}: {e}")
+
+        if progress is not None:
+            progress.flush()
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"ดึงข้อมูล {len(to_fetch)} งวดจาก {len(candidates)} วันที่หวยออก "
+            f"ด้วย {self._calls} การเรียก API ใน {elapsed:.2f} วินาที"
+        )
+
+        return {
+            'success': True,
+            'message': f'ดึงข้อมูลเสร็จสิ้น: {fetched_count} สำเร็จ, {error_count} ไม่สำเร็จ',
+            'fetched_count': fetched_count,
+            'error_count': error_count,
+            'valid_dates': sorted(valid_dates),
+            'total_days': (end_date - start_date).days + 1,
+            'candidate_dates': len(candidates),
+            'api_calls': self._calls,
+            'elapsed_seconds': round(elapsed, 2),
+            'results': [statuses[d] for d in sorted(statuses)],
+        }
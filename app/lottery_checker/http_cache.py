@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP Cache - ETag/Last-Modified และ Cache-Control ของ JSON API ที่ข้อมูลเปลี่ยนเฉพาะเมื่อมีงวดใหม่
+validator ของแต่ละ view คำนวณ ETag จากเวอร์ชันของข้อมูล (ส่วนใหญ่อยู่ในแคชแล้ว) จึงตอบ 304
+ได้โดยไม่ต้องสร้าง JSON และไม่ต้องอ่านฐานข้อมูล
+"""
+
+import hashlib
+from datetime import datetime
+from functools import wraps
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .models import LottoResult
+
+RESULTS_VERSION_KEY = 'lottery_checker:results_version'
+RESULTS_VERSION_TIMEOUT = 60 * 60
+
+
+class CachePolicy(NamedTuple):
+    """ตัวตรวจสอบและอายุแคชของ response หนึ่ง"""
+    etag: str
+    last_modified: Optional[datetime] = None
+    cache_control: Optional[Dict[str, Any]] = None
+
+
+def make_etag(*parts) -> str:
+    """ETag จากส่วนประกอบที่กำหนดเนื้อหาของ response"""
+    return hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def get_results_version():
+    """
+    เวอร์ชันของ LottoResult ทั้งหมด คืนค่า (เวอร์ชัน, เวลาแก้ไขล่าสุด)
+    query เฉพาะเมื่อไม่อยู่ในแคช (signals ล้างเมื่อบันทึกหรือลบ)
+    """
+    version = cache.get(RESULTS_VERSION_KEY)
+    if version is None:
+        history = LottoResult.objects.aggregate(total=Count('id'), modified=Max('updated_at'))
+        version = (f"{history['total']}:{history['modified']}", history['modified'])
+        cache.set(RESULTS_VERSION_KEY, version, timeout=RESULTS_VERSION_TIMEOUT)
+    return version
+
+
+def invalidate_results_version():
+    cache.delete(RESULTS_VERSION_KEY)
+
+
+def conditional_cache(validator: Callable[..., Optional[CachePolicy]]):
+    """
+    decorator ของ view แบบ GET: ตอบ 304 เมื่อ If-None-Match/If-Modified-Since ตรงกับ validator
+    และใส่ ETag, Last-Modified, Cache-Control ให้ response ที่สำเร็จ
+    validator คืน None เมื่อ response นี้ไม่ควรแคช
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            policy = validator(request, *args, **kwargs)
+            if policy is None:
+                return view(request, *args, **kwargs)
+
+            etag = quote_etag(policy.etag)
+            last_modified = int(policy.last_modified.timestamp()) if policy.last_modified else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            if response.status_code not in (200, 304):
+                return response
+
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, **(policy.cache_control or {}))
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Background Jobs - คิวงานที่เก็บในฐานข้อมูล (ไม่ต้องมี broker ภายนอก)
+web process เพียงสร้าง BackgroundJob แล้วตอบกลับทันที ส่วนการทำงานจริงอยู่ใน
+worker ที่รันด้วยคำสั่ง `python manage.py run_jobs`
+"""
+
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .glo_fetcher import GLOBulkFetcher
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+# ประเภทงาน -> handler(progress, **params) ที่คืนค่า dict สรุปผล
+JOB_HANDLERS: Dict[str, Callable] = {}
+
+
+def register_job(kind: str):
+    """ลงทะเบียน handler ของงานประเภทนี้"""
+    def decorator(handler):
+        JOB_HANDLERS[kind] = handler
+        return handler
+    return decorator
+
+
+def enqueue_job(kind: str, **params) -> BackgroundJob:
+    """สร้างงานใหม่ในคิว (params ต้องแปลงเป็น JSON ได้)"""
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"ไม่รู้จักงานประเภท {kind}")
+    return BackgroundJob.objects.create(kind=kind, params=params)
+
+
+class JobProgress:
+    """
+    บันทึกความคืบหน้ารายวันที่ของงาน
+    เขียนลงฐานข้อมูลไม่เกินหนึ่งครั้งต่อ flush_interval วินาที เพื่อไม่ให้การรายงานช้ากว่างานจริง
+    """
+
+    def __init__(self, job: BackgroundJob, flush_interval: float = 1.0):
+        self.job = job
+        self.flush_interval = flush_interval
+        self._last_flush = 0.0
+
+    def start(self, total: int):
+        """กำหนดจำนวนรายการทั้งหมดของงาน"""
+        self.job.total_items = total
+        self.flush()
+
+    def item(self, key, message: str, ok: bool = True):
+        """บันทึกผลของรายการหนึ่ง (เช่น หนึ่งวันที่หวยออก)"""
+        key = str(key)
+        previous = self.job.item_statuses.get(key)
+        if previous is None:
+            self.job.processed_items += 1
+        elif not previous['ok']:
+            self.job.failed_items -= 1
+        if not ok:
+            self.job.failed_items += 1
+        self.job.item_statuses[key] = {'ok': ok, 'message': message}
+
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        self.job.heartbeat_at = timezone.now()
+        BackgroundJob.objects.filter(pk=self.job.pk).update(
+            total_items=self.job.total_items,
+            processed_items=self.job.processed_items,
+            failed_items=self.job.failed_items,
+            item_statuses=self.job.item_statuses,
+            heartbeat_at=self.job.heartbeat_at,
+        )
+
+
+def claim_next_job(worker: str) -> Optional[BackgroundJob]:
+    """
+    จองงานที่รอนานที่สุด ใช้ conditional UPDATE จึงมี worker เดียวที่ได้งานแม้รันหลาย process
+    """
+    pending = BackgroundJob.objects.filter(status=BackgroundJob.STATUS_PENDING).order_by('created_at')
+    for job_id in pending.values_list('pk', flat=True)[:10]:
+        now = timezone.now()
+        claimed = BackgroundJob.objects.filter(pk=job_id, status=BackgroundJob.STATUS_PENDING).update(
+            status=BackgroundJob.STATUS_RUNNING, worker=worker, started_at=now, heartbeat_at=now
+        )
+        if claimed:
+            return BackgroundJob.objects.get(pk=job_id)
+    return None
+
+
+def requeue_stale_jobs(timeout_seconds: int = 600) -> int:
+    """คืนงานที่ worker หยุดรายงานความคืบหน้าเกินกำหนด (เช่น process ถูก kill) กลับเข้าคิว"""
+    cutoff = timezone.now() - timedelta(seconds=timeout_seconds)
+    count = BackgroundJob.objects.filter(
+        status=BackgroundJob.STATUS_RUNNING, heartbeat_at__lt=cutoff
+    ).update(status=BackgroundJob.STATUS_PENDING, worker='', started_at=None)
+    if count:
+        logger.warning(f"⚠️ คืนงานที่ค้าง {count} งานกลับเข้าคิว")
+    return count
+
+
+def run_job(job: BackgroundJob) -> BackgroundJob:
+    """รันงานที่จองไว้แล้ว และบันทึกผลสุดท้าย"""
+    progress = JobProgress(job)
+    handler = JOB_HANDLERS.get(job.kind)
+
+    try:
+        if handler is None:
+            raise ValueError(f"ไม่รู้จักงานประเภท {job.kind}")
+        result = handler(progress, **job.params) or {}
+        # สถานะรายวันที่อยู่ใน item_statuses แล้ว ไม่ต้องเก็บซ้ำในผลลัพธ์
+        job.result = {key: value for key, value in result.items() if key != 'results'}
+        job.error = result.get('error', '')
+        job.status = (
+            BackgroundJob.STATUS_SUCCEEDED if result.get('success', True) else BackgroundJob.STATUS_FAILED
+        )
+    except Exception as e:
+        logger.exception(f"❌ งาน {job.kind} #{job.pk} ล้มเหลว: {e}")
+        job.error = str(e)
+        job.status = BackgroundJob.STATUS_FAILED
+
+    job.finished_at = timezone.now()
+    job.heartbeat_at = job.finished_at
+    job.save()
+    return job
+
+
+def run_worker(poll_interval: float = 2.0, max_jobs: Optional[int] = None, once: bool = False,
+               stale_timeout: int = 600, worker: Optional[str] = None) -> int:
+    """
+    วนรับงานจากคิวจนกว่าจะครบ max_jobs (once=True: หยุดเมื่อคิวว่าง)
+    คืนค่าจำนวนงานที่รัน
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    completed = 0
+
+    while max_jobs is None or completed < max_jobs:
+        close_old_connections()
+        requeue_stale_jobs(stale_timeout)
+
+        job = claim_next_job(worker)
+        if job is None:
+            if once:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        logger.info(f"▶️ {worker} เริ่มงาน {job.kind} #{job.pk}")
+        job = run_job(job)
+        completed += 1
+        logger.info(f"⏹️ งาน {job.kind} #{job.pk} จบด้วยสถานะ {job.status}")
+
+    return completed
+
+
+@register_job('glo_bulk_fetch')
+def glo_bulk_fetch_job(progress, start_date, end_date=None, force_update=False,
+                       max_workers=4, rate_per_second=2.0):
+    """ดึงผลรางวัลย้อนหลังจาก GLO API (งานของ bulk_fetch_api)"""
+    start = datetime.strptime(start_date, '%Y-%m-%d').date()
+    end = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+    fetcher = GLOBulkFetcher(max_workers=max_workers, rate_per_second=rate_per_second)
+    return fetcher.fetch(start, end, force_update=force_update, progress=progress)
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Live Results - ส่งผลรางวัลที่ทยอยประกาศในวันหวยออกให้ client แบบ Server-Sent Events
+แต่ละงวดมี poller เดียวต่อ process ที่ถาม GLO API เป็นรอบๆ แล้วเทียบกับ LottoResult ที่บันทึกไว้
+เมื่อมีรางวัลใหม่จะบันทึกลงฐานข้อมูลและส่ง event ให้ทุก client ที่เชื่อมต่ออยู่
+ถาม GLO เฉพาะงวดของวันนี้ ผู้ถามในแต่ละรอบกำหนดด้วย cache.add ซึ่งใช้ได้เฉพาะใน process เดียว
+กับ LocMem (ค่าเริ่มต้น) ถ้าต้องการให้หลาย process ถามรวมกันครั้งเดียวต้องตั้ง CACHES เป็นแคชที่ใช้ร่วมกัน
+เช่น Redis หรือ Memcached
+"""
+
+import json
+import logging
+import queue
+import threading
+from typing import Any, Dict, List, Optional
+
+from django.core.cache import cache
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from .lotto_service import CACHE_PREFIX, LottoService
+from .models import LottoResult
+from .prize_index import PRIZES, is_complete, parse_prize, prize_data_of
+
+logger = logging.getLogger(__name__)
+
+def prize_snapshot(result_data) -> Dict[str, List[str]]:
+    """เลขรางวัลที่ประกาศแล้วของแต่ละประเภท (เฉพาะประเภทที่มีเลข)"""
+    data = prize_data_of(result_data)
+    snapshot = {}
+    for prize in PRIZES:
+        if prize in data:
+            numbers, _ = parse_prize(data[prize])
+            if numbers:
+                snapshot[prize] = numbers
+    return snapshot
+
+
+def diff_prizes(old: Dict[str, List[str]], new: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """เลขที่เพิ่งประกาศหรือเปลี่ยนไปของแต่ละประเภท"""
+    changes = {}
+    for prize, numbers in new.items():
+        seen = set(old.get(prize, ()))
+        added = [number for number in numbers if number not in seen]
+        if added:
+            changes[prize] = added
+    return changes
+
+
+def poll_lock_key(draw_date) -> str:
+    return f"{CACHE_PREFIX}:live_poll:{draw_date:%Y-%m-%d}"
+
+
+def snapshot_payload(draw_date, prizes: Dict[str, List[str]], version: int = 0, changes=None) -> Dict[str, Any]:
+    """ข้อมูลของ event snapshot/update (changes มีเฉพาะ update)"""
+    payload = {
+        'draw_date': draw_date.isoformat(),
+        'version': version,
+        'complete': is_complete(prizes),
+        'prizes': prizes,
+    }
+    if changes is not None:
+        payload['changes'] = changes
+    return payload
+
+
+def format_event(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    """แปลงเป็นข้อความตามรูปแบบ text/event-stream"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class LiveResultHub:
+    """
+    poller ของงวดเดียว กับรายชื่อ client ที่รับ event อยู่
+    thread ของ poller เริ่มเมื่อมี client แรก และหยุดเองเมื่อไม่มี client เหลือ
+    """
+
+    def __init__(self, draw_date, poll_interval: float = 10.0, service: Optional[LottoService] = None,
+                 queue_size: int = 100):
+        self.draw_date = draw_date
+        self.poll_interval = poll_interval
+        self.service = service or LottoService()
+        self.queue_size = queue_size
+        self.prizes: Dict[str, List[str]] = {}
+        self.version = 0
+        self._loaded = False
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def _payload(self, changes=None) -> Dict[str, Any]:
+        return snapshot_payload(self.draw_date, self.prizes, self.version, changes)
+
+    def load(self):
+        """อ่านผลรางวัลที่บันทึกไว้เป็นสถานะเริ่มต้น (ครั้งแรกครั้งเดียว)"""
+        if self._loaded:
+            return
+        stored = LottoResult.objects.filter(draw_date=self.draw_date).first()
+        with self._lock:
+            if not self._loaded:
+                self.prizes = prize_snapshot(stored.result_data if stored else None)
+                self._loaded = True
+
+    def subscribe(self) -> queue.Queue:
+        """รับ client ใหม่ คืนค่า queue ที่มีผลรางวัลปัจจุบันเป็น event แรก"""
+        self.load()
+
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            subscriber.put_nowait(format_event('snapshot', self._payload(), self.version))
+            self._subscribers.add(subscriber)
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name=f"live-results-{self.draw_date}", daemon=True
+                )
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    @property
+    def is_idle(self) -> bool:
+        """ไม่มี client และ poller หยุดแล้ว"""
+        with self._lock:
+            return not self._subscribers and self._thread is None
+
+    def publish(self, prizes: Dict[str, List[str]]) -> Optional[str]:
+        """ส่ง event ให้ทุก client ถ้ามีเลขใหม่ (client ที่รับไม่ทันถูกตัดออก)"""
+        with self._lock:
+            changes = diff_prizes(self.prizes, prizes)
+            if not changes:
+                return None
+            self.prizes = prizes
+            self.version += 1
+            message = format_event('update', self._payload(changes), self.version)
+
+            for subscriber in list(self._subscribers):
+                try:
+                    subscriber.put_nowait(message)
+                except queue.Full:
+                    logger.warning("⚠️ ตัด client ที่รับ event ไม่ทันออกจาก live stream")
+                    self._subscribers.discard(subscriber)
+        return message
+
+    def poll(self) -> Optional[str]:
+        """
+        ตรวจผลหนึ่งรอบ: อ่าน LottoResult ที่บันทึกไว้ ถ้าเป็นงวดวันนี้ ยังไม่ครบ และเป็นผู้ถามในรอบนี้ให้ถาม GLO
+        ผลที่ต่างจากที่บันทึกไว้จะถูกบันทึก แล้วส่งเฉพาะเลขที่เพิ่มขึ้นให้ client
+        """
+        stored = LottoResult.objects.filter(draw_date=self.draw_date).first()
+        prizes = prize_snapshot(stored.result_data if stored else None)
+
+        if (
+            self.draw_date == timezone.localdate()
+            and not is_complete(prizes)
+            and cache.add(poll_lock_key(self.draw_date), True, timeout=self.poll_interval)
+        ):
+            api_result = self.service.fetch_from_api(self.draw_date.day, self.draw_date.month, self.draw_date.year)
+            fetched = prize_snapshot(api_result)
+            if fetched and diff_prizes(prizes, fetched):
+                logger.info(f"📣 มีผลรางวัลใหม่ของงวด {self.draw_date.strftime('%d/%m/%Y')}")
+                self.service.save_to_database(api_result, self.draw_date)
+                prizes = fetched
+
+        return self.publish(prizes)
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                with self._lock:
+                    if not self._subscribers:
+                        self._thread = None
+                        return
+                close_old_connections()
+                try:
+                    self.poll()
+                except Exception as e:
+                    logger.error(f"❌ เกิดข้อผิดพลาดในการตรวจผลรางวัลสด: {e}")
+                self._stop.wait(self.poll_interval)
+        finally:
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+            connection.close()
+
+    def stop(self):
+        self._stop.set()
+
+
+_hubs: Dict[Any, LiveResultHub] = {}
+_hubs_lock = threading.Lock()
+
+
+def get_live_hub(draw_date, poll_interval: float = 10.0) -> LiveResultHub:
+    """hub ของงวดนี้ที่ใช้ร่วมกันทั้ง process (ล้าง hub ของงวดอื่นที่ไม่มี client แล้วไปด้วย)"""
+    with _hubs_lock:
+        for key in [key for key, hub in _hubs.items() if key != draw_date and hub.is_idle]:
+            del _hubs[key]
+        hub = _hubs.get(draw_date)
+        if hub is None:
+            hub = _hubs[draw_date] = LiveResultHub(draw_date, poll_interval)
+        return hub
+
+
+def subscribe_live(draw_date, poll_interval: float = 10.0):
+    """
+    รับ client ใหม่ของงวดนี้ คืนค่า (hub, queue)
+    สมัครภายใต้ lock ของรายการ hub เพื่อไม่ให้ hub ถูกล้างออกระหว่างที่กำลังสมัคร
+    """
+    hub = get_live_hub(draw_date, poll_interval)
+    hub.load()
+    with _hubs_lock:
+        # ถ้า hub ถูกล้างไประหว่างนี้ ใช้ตัวที่อยู่ในรายการ (หรือใส่กลับ)
+        hub = _hubs.setdefault(draw_date, hub)
+        return hub, hub.subscribe()
+
+
+def stored_snapshot_event(draw_date) -> str:
+    """event snapshot ของผลรางวัลที่บันทึกไว้ (สำหรับงวดที่ผ่านมาแล้ว ไม่ต้องมี poller)"""
+    stored = LottoResult.objects.filter(draw_date=draw_date).first()
+    prizes = prize_snapshot(stored.result_data if stored else None)
+    return format_event('snapshot', snapshot_payload(draw_date, prizes), 0)
+
+
+def reset_live_hubs():
+    """หยุด poller และล้าง hub ทั้งหมด"""
+    with _hubs_lock:
+        for hub in _hubs.values():
+            hub.stop()
+        _hubs.clear()
@@ -4,24 +4,65 @@
 Lotto Service - บริการดึงข้อมูลหวยจาก GLO API และจัดการฐานข้อมูล
 """
 
-import json
-import requests
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
+from django.core.cache import cache
 from django.utils import timezone
 
-from .models import LottoResult
+from .models import LottoResult, NoDrawDate, payload_digest
+from .glo_client import GLO_API_URL, get_glo_client
+from .single_flight import SingleFlight, session_lock
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+CACHE_PREFIX = 'lottery_checker'
+# วันที่ที่ไม่มีการออกรางวัล: วันที่ผ่านมานานแล้วจำไว้นาน ส่วนวันนี้/เมื่อวานอาจยังประกาศผลไม่ครบ
+NO_DRAW_TIMEOUT = 60 * 60 * 24 * 7
+NO_DRAW_RECENT_TIMEOUT = 60 * 2
+
+# การดึงผลรางวัลจาก API ที่กำลังทำอยู่ใน process นี้ (key = วันที่)
+glo_fetch_flights = SingleFlight()
+
+
+def has_valid_lottery_data(result_data) -> bool:
+    """ตรวจสอบว่าข้อมูลจาก GLO API มีผลรางวัลที่ 1 จริงหรือไม่"""
+    if not isinstance(result_data, dict):
+        return False
+
+    response_data = result_data.get('response')
+    if isinstance(response_data, dict):
+        result = response_data.get('result')
+        if isinstance(result, dict) and isinstance(result.get('data'), dict):
+            first_data = result['data'].get('first')
+            if isinstance(first_data, dict):
+                numbers = first_data.get('number')
+                return isinstance(numbers, list) and len(numbers) > 0
+
+    return False
+
+
+def result_cache_key(draw_date) -> str:
+    return f"{CACHE_PREFIX}:result:{draw_date:%Y-%m-%d}"
+
+
+def no_draw_cache_key(draw_date) -> str:
+    return f"{CACHE_PREFIX}:no_draw:{draw_date:%Y-%m-%d}"
+
+
+def invalidate_result_cache(draw_date):
+    """ล้างแคชของวันที่นี้ (เรียกเมื่อบันทึกหรือลบ LottoResult)"""
+    cache.delete_many([result_cache_key(draw_date), no_draw_cache_key(draw_date)])
+
+
 class LottoService:
     """บริการจัดการข้อมูลหวย"""
     
-    def __init__(self):
-        self.api_url = "https://www.glo.or.th/api/checking/getLotteryResult"
-        self.timeout = 10
+    def __init__(self, client=None):
+        self.api_url = GLO_API_URL
+        # ใช้ connection pool ร่วมกันทั้ง process (timeout/retry กำหนดที่ client)
+        self.client = client or get_glo_client()
     
     def fetch_from_api(self, date, month, year) -> Optional[Dict[str, Any]]:
         """ดึงข้อมูลจาก GLO API"""
@@ -40,30 +81,12 @@ class LottoService:
             "year": year
         }
         
-        try:
-            logger.info(f"🌐 กำลังดึงข้อมูลจาก GLO API สำหรับวันที่ {date}/{month}/{year}")
-            
-            response = requests.post(
-                self.api_url,
-                json=payload,
-                headers={'Content-Type': 'application/json'},
-                timeout=self.timeout
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                logger.info("✅ ดึงข้อมูลจาก API สำเร็จ")
-                return data
-            else:
-                logger.error(f"❌ API ส่งคืน status code: {response.status_code}")
-                return None
-                
-        except requests.exceptions.RequestException as e:
-            logger.error(f"❌ เกิดข้อผิดพลาดในการเรียก API: {e}")
-            return None
-        except json.JSONDecodeError as e:
-            logger.error(f"❌ ไม่สามารถแปลง JSON ได้: {e}")
-            return None
+        logger.info(f"🌐 กำลังดึงข้อมูลจาก GLO API สำหรับวันที่ {date}/{month}/{year}")
+        
+        data = self.client.post_json(self.api_url, payload)
+        if data is not None:
+            logger.info("✅ ดึงข้อมูลจาก API สำเร็จ")
+        return data
     
     def get_or_fetch_result(self, date, month, year) -> Dict[str, Any]:
         """ดึงข้อมูลหวยจากฐานข้อมูล หรือดึงจาก API ถ้ายังไม่มี"""
@@ -81,24 +104,68 @@ class LottoService:
             
             # สร้างวันที่
             draw_date = datetime(year, month, date).date()
+            today = timezone.localdate()
+            
+            if draw_date > today:
+                return self._no_draw_response(draw_date, "ยังไม่ถึงวันออกรางวัล")
+            
+            # ผลรางวัลของงวดที่ผ่านมาแล้วไม่เปลี่ยน เก็บในแคชแบบไม่หมดอายุ (ล้างเมื่อบันทึกใหม่)
+            cached = cache.get(result_cache_key(draw_date))
+            if cached is not None:
+                return {**cached, "source": "cache"}
+            
+            if cache.get(no_draw_cache_key(draw_date)):
+                return self._no_draw_response(draw_date, "ไม่มีการออกรางวัลในวันที่นี้", source="cache")
             
             # ตรวจสอบว่ามีข้อมูลในฐานข้อมูลแล้วหรือไม่
-            existing_result = LottoResult.objects.filter(draw_date=draw_date).first()
+            stored = self._stored_response(draw_date, today)
+            if stored is not None:
+                return stored
             
-            if existing_result:
-                logger.info(f"📋 ดึงข้อมูลจากฐานข้อมูลสำหรับวันที่ {draw_date.strftime('%d/%m/%Y')}")
-                return {
-                    "success": True,
-                    "source": "database",
-                    "data": existing_result.result_data,
-                    "message": "ข้อมูลจากฐานข้อมูล",
-                    "draw_date": existing_result.draw_date,
-                    "updated_at": existing_result.updated_at
-                }
+            # ถ้าไม่มีในฐานข้อมูล ให้ดึงจาก API (ทั้งระบบดึงวันที่เดียวกันพร้อมกันได้ครั้งเดียว)
+            return glo_fetch_flights.do(draw_date, lambda: self._fetch_and_store(draw_date, today))
+            
+        except Exception as e:
+            logger.error(f"❌ เกิดข้อผิดพลาดใน get_or_fetch_result: {e}")
+            return {
+                "success": False,
+                "error": f"เกิดข้อผิดพลาด: {str(e)}"
+            }
+    
+    def _stored_response(self, draw_date, today) -> Optional[Dict[str, Any]]:
+        """ผลรางวัลที่บันทึกไว้แล้ว (งวดที่ผ่านมาแล้วเก็บในแคชแบบไม่หมดอายุ)"""
+        existing_result = LottoResult.objects.filter(draw_date=draw_date).first()
+        if not existing_result:
+            return None
+        
+        logger.info(f"📋 ดึงข้อมูลจากฐานข้อมูลสำหรับวันที่ {draw_date.strftime('%d/%m/%Y')}")
+        response = {
+            "success": True,
+            "source": "database",
+            "data": existing_result.result_data,
+            "message": "ข้อมูลจากฐานข้อมูล",
+            "draw_date": existing_result.draw_date,
+            "updated_at": existing_result.updated_at
+        }
+        if existing_result.is_valid and draw_date < today:
+            cache.set(result_cache_key(draw_date), response, timeout=None)
+        return response
+    
+    def _fetch_and_store(self, draw_date, today) -> Dict[str, Any]:
+        """
+        ดึงจาก API แล้วบันทึก โดยถือ lock ระดับ session ของวันที่นี้ตลอดการตรวจ ดึง และบันทึก
+        ทั้งระบบจึงเรียก API ของวันที่เดียวกันได้ครั้งละหนึ่ง process ผู้ที่รอ lock จะพบผลในฐานข้อมูล
+        lock ไม่ผูกกับ transaction จึงไม่มี transaction ค้างระหว่างเรียก API
+        """
+        with session_lock(f"glo_fetch:{draw_date:%Y-%m-%d}"):
+            stored = self._stored_response(draw_date, today)
+            if stored is not None:
+                return stored
+            if self._has_no_draw_marker(draw_date):
+                return self._no_draw_response(draw_date, "ไม่มีการออกรางวัลในวันที่นี้", source="cache")
             
-            # ถ้าไม่มีในฐานข้อมูล ให้ดึงจาก API
             logger.info(f"🔍 ไม่พบข้อมูลในฐานข้อมูล ดึงจาก API สำหรับวันที่ {draw_date.strftime('%d/%m/%Y')}")
-            api_result = self.fetch_from_api(date, month, year)
+            api_result = self.fetch_from_api(draw_date.day, draw_date.month, draw_date.year)
             
             if not api_result:
                 return {
@@ -106,25 +173,58 @@ class LottoService:
                     "error": "ไม่สามารถดึงข้อมูลจาก API ได้"
                 }
             
+            if not has_valid_lottery_data(api_result):
+                # ไม่บันทึกวันที่ที่ไม่มีผลรางวัล จำไว้ในตาราง NoDrawDate และแคชแทน
+                self._mark_no_draw(draw_date, today)
+                return self._no_draw_response(draw_date, "ไม่มีการออกรางวัลในวันที่นี้", source="api")
+            
             # บันทึกลงฐานข้อมูล
             db_saved = self.save_to_database(api_result, draw_date)
-            
-            return {
-                "success": True,
-                "source": "api",
-                "data": api_result,
-                "message": "ข้อมูลจาก API และบันทึกลงฐานข้อมูลแล้ว",
-                "database_saved": db_saved,
-                "draw_date": draw_date,
-                "updated_at": timezone.now()
-            }
-            
-        except Exception as e:
-            logger.error(f"❌ เกิดข้อผิดพลาดใน get_or_fetch_result: {e}")
-            return {
-                "success": False,
-                "error": f"เกิดข้อผิดพลาด: {str(e)}"
-            }
+        
+        return {
+            "success": True,
+            "source": "api",
+            "data": api_result,
+            "message": "ข้อมูลจาก API และบันทึกลงฐานข้อมูลแล้ว",
+            "database_saved": db_saved,
+            "draw_date": draw_date,
+            "updated_at": timezone.now()
+        }
+    
+    def _has_no_draw_marker(self, draw_date) -> bool:
+        """มีการบันทึกว่าวันที่นี้ไม่มีการออกรางวัล (ยังไม่หมดอายุ) หรือไม่ จากแคชหรือฐานข้อมูล"""
+        if cache.get(no_draw_cache_key(draw_date)):
+            return True
+        expires_at = (
+            NoDrawDate.objects.filter(draw_date=draw_date, expires_at__gt=timezone.now())
+            .values_list('expires_at', flat=True)
+            .first()
+        )
+        if expires_at is None:
+            return False
+        # เก็บในแคชของ process นี้จนถึงเวลาที่หมดอายุ
+        cache.set(no_draw_cache_key(draw_date), True, timeout=(expires_at - timezone.now()).total_seconds())
+        return True
+    
+    def _mark_no_draw(self, draw_date, today):
+        """จำวันที่ที่ไม่มีการออกรางวัลไว้ในฐานข้อมูล (ใช้ร่วมกันทุก process) และแคช"""
+        recent = draw_date >= today - timedelta(days=1)
+        timeout = NO_DRAW_RECENT_TIMEOUT if recent else NO_DRAW_TIMEOUT
+        NoDrawDate.objects.update_or_create(
+            draw_date=draw_date, defaults={'expires_at': timezone.now() + timedelta(seconds=timeout)}
+        )
+        cache.set(no_draw_cache_key(draw_date), True, timeout=timeout)
+    
+    def _no_draw_response(self, draw_date, error, source=None) -> Dict[str, Any]:
+        response = {
+            "success": False,
+            "no_draw": True,
+            "error": f"{error} ({draw_date.strftime('%d/%m/%Y')})",
+            "draw_date": draw_date
+        }
+        if source:
+            response["source"] = source
+        return response
     
     def save_to_database(self, lotto_data: Dict[str, Any], draw_date: datetime.date) -> bool:
         """บันทึกข้อมูลหวยลงฐานข้อมูล"""
@@ -133,9 +233,18 @@ class LottoService:
             existing_result = LottoResult.objects.filter(draw_date=draw_date).first()
             
             if existing_result:
+                if existing_result.payload_hash == payload_digest(lotto_data):
+                    # ข้อมูลเหมือนเดิม ไม่ต้องเขียนซ้ำ
+                    logger.info(f"⏭️ ข้อมูลวันที่ {draw_date.strftime('%d/%m/%Y')} ไม่เปลี่ยนแปลง ข้ามการบันทึก")
+                    return True
+                
                 logger.info(f"📝 อัปเดตข้อมูลหวยที่มีอยู่แล้วสำหรับวันที่ {draw_date.strftime('%d/%m/%Y')}")
                 # อัปเดตข้อมูลที่มีอยู่
+                # ผลรางวัลที่ทยอยประกาศอาจเพิ่งครบ ตรวจความถูกต้องใหม่ทุกครั้ง
+                validation_result = self.validate_lotto_data(lotto_data)
                 existing_result.result_data = lotto_data
+                existing_result.is_valid = validation_result.get('is_valid', False)
+                existing_result.validation_errors = validation_result.get('error', '') if not existing_result.is_valid else ""
                 existing_result.updated_at = timezone.now()
                 existing_result.save()
             else:
@@ -151,7 +260,6 @@ class LottoService:
                     source="GLO API",
                     is_valid=validation_result.get('is_valid', False),
                     last_checked=timezone.now(),
-                    raw_api_response=lotto_data,
                     validation_errors=validation_result.get('error', '') if not validation_result.get('is_valid') else ""
                 )
             
@@ -219,7 +327,8 @@ class LottoService:
                     "today_records": today_records,
                     "recent_records": recent_records,
                     "last_updated": timezone.now()
-                }
+                },
+                "api_client": self.client.metrics()
             }
         except Exception as e:
             logger.error(f"❌ เกิดข้อผิดพลาดในการดึงสถิติ: {e}")
@@ -0,0 +1,36 @@
+import time
+from django.core.management.base import BaseCommand
+from lottery_checker.prize_history import backfill_prize_numbers
+
+
+class Command(BaseCommand):
+    help = 'สร้างดัชนีเลขรางวัลย้อนหลัง (PrizeNumber) จากผลรางวัล LottoResult ทั้งหมด'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='จำนวนแถวต่อการเขียนหนึ่งครั้ง (default: 500)'
+        )
+        parser.add_argument(
+            '--only-missing',
+            action='store_true',
+            help='สร้างเฉพาะงวดที่ยังไม่มีข้อมูลในดัชนี'
+        )
+    
+    def handle(self, *args, **options):
+        self.stdout.write("🔄 เริ่มสร้างดัชนีเลขรางวัลย้อนหลัง...")
+        
+        start = time.perf_counter()
+        result_count, row_count = backfill_prize_numbers(
+            batch_size=options['batch_size'],
+            only_missing=options['only_missing']
+        )
+        elapsed = time.perf_counter() - start
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ บันทึก {row_count} แถว จาก {result_count} งวด เสร็จใน {elapsed:.2f} วินาที"
+            )
+        )
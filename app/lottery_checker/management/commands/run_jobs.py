@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from lottery_checker.jobs import JOB_HANDLERS, run_worker
+
+
+class Command(BaseCommand):
+    help = 'รัน worker สำหรับงานเบื้องหลัง (ดึงข้อมูลย้อนหลัง/ซิงค์) ที่อยู่ในคิว'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='จำนวนวินาทีที่รอก่อนตรวจคิวใหม่เมื่อคิวว่าง (ค่าเริ่มต้น: 2)',
+        )
+        parser.add_argument(
+            '--max-jobs',
+            type=int,
+            default=None,
+            help='หยุดหลังรันครบจำนวนงานนี้',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='รันงานที่ค้างอยู่ในคิวจนหมดแล้วหยุด',
+        )
+        parser.add_argument(
+            '--stale-timeout',
+            type=int,
+            default=600,
+            help='คืนงานที่ไม่รายงานความคืบหน้าเกินจำนวนวินาทีนี้กลับเข้าคิว (ค่าเริ่มต้น: 600)',
+        )
+    
+    def handle(self, *args, **options):
+        self.stdout.write(f"👷 เริ่ม worker (งานที่รองรับ: {', '.join(sorted(JOB_HANDLERS))})")
+        
+        completed = run_worker(
+            poll_interval=options['poll_interval'],
+            max_jobs=options['max_jobs'],
+            once=options['once'],
+            stale_timeout=options['stale_timeout'],
+        )
+        
+        self.stdout.write(self.style.SUCCESS(f"✅ worker หยุดทำงาน รันไปทั้งหมด {completed} งาน"))
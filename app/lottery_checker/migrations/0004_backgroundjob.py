@@ -0,0 +1,39 @@
+# Generated by Django 4.2.13 on 2026-10-16 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lottery_checker', '0003_lottoresult_api_url_lottoresult_draw_period_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackgroundJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=100, verbose_name='ประเภทงาน')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='พารามิเตอร์')),
+                ('status', models.CharField(choices=[('pending', 'รอดำเนินการ'), ('running', 'กำลังทำงาน'), ('succeeded', 'สำเร็จ'), ('failed', 'ล้มเหลว')], default='pending', max_length=20, verbose_name='สถานะ')),
+                ('total_items', models.PositiveIntegerField(default=0, verbose_name='จำนวนรายการทั้งหมด')),
+                ('processed_items', models.PositiveIntegerField(default=0, verbose_name='ทำแล้ว')),
+                ('failed_items', models.PositiveIntegerField(default=0, verbose_name='ไม่สำเร็จ')),
+                ('item_statuses', models.JSONField(blank=True, default=dict, verbose_name='สถานะรายวันที่')),
+                ('result', models.JSONField(blank=True, default=dict, verbose_name='ผลลัพธ์')),
+                ('error', models.TextField(blank=True, default='', verbose_name='ข้อผิดพลาด')),
+                ('worker', models.CharField(blank=True, default='', max_length=100, verbose_name='worker')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='วันที่สร้าง')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='เริ่มทำงาน')),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True, verbose_name='รายงานความคืบหน้าล่าสุด')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='เสร็จสิ้น')),
+            ],
+            options={
+                'verbose_name': 'งานเบื้องหลัง',
+                'verbose_name_plural': 'งานเบื้องหลัง',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='lotto_job_status_created')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.13 on 2026-10-16 22:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lottery_checker', '0004_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrizeNumber',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('draw_date', models.DateField(verbose_name='วันที่ออกรางวัล')),
+                ('prize', models.CharField(max_length=10, verbose_name='ประเภทรางวัล')),
+                ('number', models.CharField(max_length=6, verbose_name='เลขรางวัล')),
+                ('suffix3', models.CharField(max_length=3, verbose_name='3 ตัวท้าย')),
+                ('suffix2', models.CharField(max_length=2, verbose_name='2 ตัวท้าย')),
+                ('result', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prize_numbers', to='lottery_checker.lottoresult', verbose_name='ผลรางวัล')),
+            ],
+            options={
+                'verbose_name': 'เลขรางวัลย้อนหลัง',
+                'verbose_name_plural': 'เลขรางวัลย้อนหลัง',
+                'ordering': ['-draw_date'],
+                'indexes': [models.Index(fields=['number', 'draw_date'], name='lotto_prizenum_number_date'), models.Index(fields=['suffix3', 'draw_date'], name='lotto_prizenum_suffix3_date'), models.Index(fields=['suffix2', 'draw_date'], name='lotto_prizenum_suffix2_date')],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.13 on 2026-10-16 23:40
+
+import hashlib
+import json
+
+from django.db import migrations, models
+
+
+# คัดลอกจาก models ณ เวลาที่สร้าง migration นี้ (migration ต้องไม่ขึ้นกับโค้ดที่เปลี่ยนภายหลัง)
+def payload_digest(payload) -> str:
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def fill_payload_hashes(apps, schema_editor):
+    """คำนวณ hash ของ result_data ให้แถวเดิม"""
+    LottoResult = apps.get_model('lottery_checker', 'LottoResult')
+    batch = []
+    for result in LottoResult.objects.only('id', 'result_data').iterator(chunk_size=500):
+        result.payload_hash = payload_digest(result.result_data)
+        batch.append(result)
+        if len(batch) >= 500:
+            LottoResult.objects.bulk_update(batch, ['payload_hash'])
+            batch = []
+    LottoResult.objects.bulk_update(batch, ['payload_hash'])
+
+
+def restore_raw_responses(apps, schema_editor):
+    """ย้อนกลับ: raw_api_response เดิมเป็นสำเนาของ result_data เสมอ"""
+    LottoResult = apps.get_model('lottery_checker', 'LottoResult')
+    LottoResult.objects.update(raw_api_response=models.F('result_data'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lottery_checker', '0005_prizenumber'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lottoresult',
+            name='payload_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64, verbose_name='hash ของข้อมูล'),
+        ),
+        migrations.RunPython(fill_payload_hashes, restore_raw_responses),
+        migrations.RemoveField(
+            model_name='lottoresult',
+            name='raw_api_response',
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.13 on 2026-10-16 23:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lottery_checker', '0006_lottoresult_payload_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoDrawDate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('draw_date', models.DateField(unique=True, verbose_name='วันที่')),
+                ('checked_at', models.DateTimeField(auto_now=True, verbose_name='ตรวจสอบล่าสุด')),
+                ('expires_at', models.DateTimeField(verbose_name='หมดอายุ')),
+            ],
+            options={
+                'verbose_name': 'วันที่ไม่มีการออกรางวัล',
+                'verbose_name_plural': 'วันที่ไม่มีการออกรางวัล',
+                'ordering': ['-draw_date'],
+            },
+        ),
+    ]
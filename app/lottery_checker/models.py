@@ -1,6 +1,17 @@
+import hashlib
+import json
+
 from django.db import models
+from django.urls import reverse
 from django.utils import timezone
 
+
+def payload_digest(payload) -> str:
+    """sha256 ของ JSON ในรูปแบบมาตรฐาน (ลำดับ key ไม่มีผล) ใช้ตรวจว่าข้อมูลเปลี่ยนหรือไม่"""
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
 class LottoResult(models.Model):
     """ข้อมูลผลรางวัลหวยจาก API"""
     
@@ -13,7 +24,7 @@ class LottoResult(models.Model):
     draw_period = models.CharField("งวดที่", max_length=20, blank=True, null=True)
     is_valid = models.BooleanField("ข้อมูลถูกต้อง", default=True, db_index=True)
     last_checked = models.DateTimeField("ตรวจสอบล่าสุด", auto_now=True)
-    raw_api_response = models.JSONField("ข้อมูลดิบจาก API", default=dict)
+    payload_hash = models.CharField("hash ของข้อมูล", max_length=64, default="", blank=True, editable=False)
     validation_errors = models.TextField("ข้อผิดพลาดในการตรวจสอบ", default="", blank=True)
     
     class Meta:
@@ -28,6 +39,17 @@ class LottoResult(models.Model):
     def __str__(self):
         return f"ผลรางวัลหวยวันที่ {self.draw_date.strftime('%d/%m/%Y')}"
     
+    def save(self, *args, **kwargs):
+        """เก็บ hash ของ result_data ให้ตรงกับข้อมูลเสมอ"""
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            if 'result_data' not in self.get_deferred_fields():
+                self.payload_hash = payload_digest(self.result_data)
+        elif 'result_data' in update_fields:
+            self.payload_hash = payload_digest(self.result_data)
+            kwargs['update_fields'] = {*update_fields, 'payload_hash'}
+        super().save(*args, **kwargs)
+    
     @property
     def formatted_date(self):
         """วันที่ในรูปแบบไทย"""
@@ -59,3 +81,133 @@ class LottoResult(models.Model):
                 elif isinstance(numbers, str):
                     all_numbers.append(numbers)
         return all_numbers
+
+
+class PrizeNumber(models.Model):
+    """
+    ดัชนีย้อนกลับของเลขรางวัล: หนึ่งแถวต่อเลขรางวัลหนึ่งเลขในงวด
+    เก็บ 3 และ 2 ตัวท้ายแยกไว้ เพื่อค้น "เลขนี้เคยถูกรางวัลไหม" ด้วย index แทนการอ่าน JSON ทุกงวด
+    """
+    
+    result = models.ForeignKey(
+        LottoResult, on_delete=models.CASCADE, related_name='prize_numbers', verbose_name="ผลรางวัล"
+    )
+    draw_date = models.DateField("วันที่ออกรางวัล")
+    prize = models.CharField("ประเภทรางวัล", max_length=10)
+    number = models.CharField("เลขรางวัล", max_length=6)
+    suffix3 = models.CharField("3 ตัวท้าย", max_length=3)
+    suffix2 = models.CharField("2 ตัวท้าย", max_length=2)
+    
+    class Meta:
+        verbose_name = "เลขรางวัลย้อนหลัง"
+        verbose_name_plural = "เลขรางวัลย้อนหลัง"
+        ordering = ['-draw_date']
+        indexes = [
+            models.Index(fields=['number', 'draw_date'], name='lotto_prizenum_number_date'),
+            models.Index(fields=['suffix3', 'draw_date'], name='lotto_prizenum_suffix3_date'),
+            models.Index(fields=['suffix2', 'draw_date'], name='lotto_prizenum_suffix2_date'),
+        ]
+    
+    def __str__(self):
+        return f"{self.number} ({self.prize}) {self.draw_date.strftime('%d/%m/%Y')}"
+
+
+class NoDrawDate(models.Model):
+    """
+    วันที่ที่ถาม GLO API แล้วไม่มีผลรางวัล เก็บในฐานข้อมูลเพื่อให้ทุก process ใช้ร่วมกัน
+    หมดอายุตาม expires_at (วันที่ใกล้ปัจจุบันอาจยังประกาศผลไม่ครบ)
+    """
+
+    draw_date = models.DateField("วันที่", unique=True)
+    checked_at = models.DateTimeField("ตรวจสอบล่าสุด", auto_now=True)
+    expires_at = models.DateTimeField("หมดอายุ")
+
+    class Meta:
+        verbose_name = "วันที่ไม่มีการออกรางวัล"
+        verbose_name_plural = "วันที่ไม่มีการออกรางวัล"
+        ordering = ['-draw_date']
+
+    def __str__(self):
+        return f"ไม่มีการออกรางวัล {self.draw_date.strftime('%d/%m/%Y')}"
+
+
+class BackgroundJob(models.Model):
+    """งานที่ใช้เวลานาน (ดึงข้อมูลย้อนหลัง/ซิงค์) ที่รันใน worker แยกจาก web process"""
+    
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'รอดำเนินการ'),
+        (STATUS_RUNNING, 'กำลังทำงาน'),
+        (STATUS_SUCCEEDED, 'สำเร็จ'),
+        (STATUS_FAILED, 'ล้มเหลว'),
+    ]
+    
+    kind = models.CharField("ประเภทงาน", max_length=100)
+    params = models.JSONField("พารามิเตอร์", default=dict, blank=True)
+    status = models.CharField("สถานะ", max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    total_items = models.PositiveIntegerField("จำนวนรายการทั้งหมด", default=0)
+    processed_items = models.PositiveIntegerField("ทำแล้ว", default=0)
+    failed_items = models.PositiveIntegerField("ไม่สำเร็จ", default=0)
+    item_statuses = models.JSONField("สถานะรายวันที่", default=dict, blank=True)
+    result = models.JSONField("ผลลัพธ์", default=dict, blank=True)
+    error = models.TextField("ข้อผิดพลาด", default="", blank=True)
+    worker = models.CharField("worker", max_length=100, default="", blank=True)
+    created_at = models.DateTimeField("วันที่สร้าง", auto_now_add=True)
+    started_at = models.DateTimeField("เริ่มทำงาน", null=True, blank=True)
+    heartbeat_at = models.DateTimeField("รายงานความคืบหน้าล่าสุด", null=True, blank=True)
+    finished_at = models.DateTimeField("เสร็จสิ้น", null=True, blank=True)
+    
+    class Meta:
+        verbose_name = "งานเบื้องหลัง"
+        verbose_name_plural = "งานเบื้องหลัง"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='lotto_job_status_created'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.get_status_display()})"
+    
+    def get_absolute_url(self):
+        return reverse('lottery_checker:job_progress_api', args=[self.pk])
+    
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED)
+    
+    def progress(self):
+        """ความคืบหน้า อัตราการทำงาน (รายการ/วินาที) และเวลาที่คาดว่าจะเสร็จ"""
+        elapsed = None
+        throughput = None
+        eta_seconds = None
+        
+        if self.started_at:
+            elapsed = ((self.finished_at or timezone.now()) - self.started_at).total_seconds()
+            if elapsed > 0 and self.processed_items:
+                throughput = self.processed_items / elapsed
+            if self.status == self.STATUS_RUNNING and throughput:
+                eta_seconds = max(self.total_items - self.processed_items, 0) / throughput
+        
+        return {
+            'job_id': self.pk,
+            'kind': self.kind,
+            'status': self.status,
+            'total': self.total_items,
+            'processed': self.processed_items,
+            'failed': self.failed_items,
+            'percent': round(self.processed_items / self.total_items * 100, 2) if self.total_items else 0,
+            'elapsed_seconds': round(elapsed, 2) if elapsed is not None else None,
+            'throughput_per_second': round(throughput, 3) if throughput else None,
+            'eta_seconds': round(eta_seconds, 1) if eta_seconds is not None else None,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'error': self.error,
+            'result': self.result,
+            'items': [
+                {'key': key, **status} for key, status in sorted(self.item_statuses.items())
+            ],
+        }
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prize History - ดัชนีย้อนกลับ PrizeNumber สำหรับค้นว่าเลขใดเคยถูกรางวัลงวดไหนบ้าง
+อัปเดตทีละงวดเมื่อบันทึก LottoResult และค้นด้วย index ของเลข/เลขท้าย แทนการอ่าน JSON ทุกงวด
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import LottoResult, PrizeNumber
+from .prize_index import PRIZE_NAMES, PRIZE_ORDER, PRIZES, PrizeIndex
+
+logger = logging.getLogger(__name__)
+
+# ประเภทรางวัลที่เทียบกับส่วนต่างๆ ของเลขสลาก
+FULL_PRIZES = [prize for prize, (_, part) in PRIZES.items() if part == 'full']
+
+
+def build_prize_numbers(lotto_result: LottoResult) -> List[PrizeNumber]:
+    """แยกเลขรางวัลของงวดเป็นแถว PrizeNumber (ยังไม่บันทึก)"""
+    index = PrizeIndex.from_result(lotto_result)
+    rows = []
+    for prize, numbers in index.prizes.items():
+        for number in dict.fromkeys(numbers):
+            if not number.isdigit() or len(number) > 6:
+                continue
+            rows.append(PrizeNumber(
+                result=lotto_result, draw_date=lotto_result.draw_date, prize=prize,
+                number=number, suffix3=number[-3:], suffix2=number[-2:]
+            ))
+    return rows
+
+
+def sync_prize_numbers(lotto_result: LottoResult):
+    """เขียนแถว PrizeNumber ของงวดใหม่ทั้งหมด"""
+    with transaction.atomic():
+        PrizeNumber.objects.filter(result=lotto_result).delete()
+        PrizeNumber.objects.bulk_create(build_prize_numbers(lotto_result))
+
+
+def backfill_prize_numbers(batch_size: int = 500, only_missing: bool = False):
+    """
+    สร้างดัชนีจาก LottoResult ทั้งหมด
+    only_missing: สร้างเฉพาะงวดที่ยังไม่มีแถวในดัชนี
+    คืนค่า (จำนวนงวด, จำนวนแถว)
+    """
+    results = LottoResult.objects.order_by('draw_date')
+    if only_missing:
+        results = results.filter(prize_numbers__isnull=True)
+
+    result_count = 0
+    row_count = 0
+    batch = []
+
+    with transaction.atomic():
+        if not only_missing:
+            PrizeNumber.objects.all().delete()
+
+        for lotto_result in results.iterator(chunk_size=batch_size):
+            batch.extend(build_prize_numbers(lotto_result))
+            result_count += 1
+            if len(batch) >= batch_size:
+                PrizeNumber.objects.bulk_create(batch, batch_size=batch_size)
+                row_count += len(batch)
+                batch = []
+
+        PrizeNumber.objects.bulk_create(batch, batch_size=batch_size)
+        row_count += len(batch)
+
+    logger.info(f"สร้างดัชนีเลขรางวัล {row_count} แถว จาก {result_count} งวด")
+    return result_count, row_count
+
+
+def history_filter(number: str) -> Q:
+    """
+    เงื่อนไขค้นหาตามความยาวของเลข
+    6 หลัก: สลากใบนี้เคยถูกรางวัลอะไร (เลขตรง, 3 ตัวหน้า, 3 ตัวท้าย, 2 ตัวท้าย)
+    3 หลัก: เลขหน้า/ท้าย 3 ตัวที่ตรง และรางวัลเลข 6 หลักที่ลงท้ายด้วยเลขนี้
+    2 หลัก: เลขท้าย 2 ตัวที่ตรง และรางวัลเลข 6 หลักที่ลงท้ายด้วยเลขนี้
+    """
+    if len(number) == 6:
+        return (
+            Q(number=number, prize__in=FULL_PRIZES)
+            | Q(number=number[:3], prize='last3f')
+            | Q(number=number[-3:], prize='last3b')
+            | Q(number=number[-2:], prize='last2')
+        )
+    if len(number) == 3:
+        return Q(number=number) | Q(suffix3=number, prize__in=FULL_PRIZES)
+    if len(number) == 2:
+        return Q(number=number, prize='last2') | Q(suffix2=number, prize__in=FULL_PRIZES)
+    raise ValueError('เลขต้องมี 2, 3 หรือ 6 หลัก')
+
+
+def prize_history(number: str, limit: Optional[int] = None) -> Dict[str, Any]:
+    """ประวัติการถูกรางวัลของเลข เรียงจากงวดล่าสุด"""
+    number = str(number).strip()
+    if not number.isdigit():
+        raise ValueError('กรุณาระบุเฉพาะตัวเลข')
+
+    rows = (
+        PrizeNumber.objects.filter(history_filter(number))
+        .order_by('-draw_date')
+        .values_list('draw_date', 'prize', 'number')
+    )
+
+    wins = {}
+    for draw_date, prize, prize_number in rows.iterator():
+        if draw_date not in wins and limit is not None and len(wins) >= limit:
+            break
+        wins.setdefault(draw_date, []).append((prize, prize_number))
+
+    draws = []
+    for draw_date, prizes in wins.items():
+        prizes.sort(key=lambda item: PRIZE_ORDER[item[0]])
+        draws.append({
+            'draw_date': draw_date.isoformat(),
+            'prizes': [
+                {'prize': prize, 'prize_name': PRIZE_NAMES[prize], 'number': prize_number}
+                for prize, prize_number in prizes
+            ],
+        })
+
+    return {
+        'number': number,
+        'ever_won': bool(draws),
+        'draw_count': len(draws),
+        'last_won': draws[0]['draw_date'] if draws else None,
+        'draws': draws,
+    }
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prize Index - ตารางค้นหารางวัลของแต่ละงวดที่คอมไพล์ไว้ในหน่วยความจำ
+แปลงผลรางวัลจาก GLO API ครั้งเดียวเมื่อบันทึก LottoResult เป็น hash map ของ
+เลข 6 หลัก, 3 ตัวหน้า, 3 ตัวท้าย และ 2 ตัวท้าย การตรวจสลากหนึ่งใบจึงเป็นการค้น dict ไม่กี่ครั้ง
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .models import LottoResult
+
+logger = logging.getLogger(__name__)
+
+# ประเภทรางวัลของ GLO API -> (ชื่อรางวัล, ส่วนของเลขสลากที่ใช้เทียบ)
+PRIZES = {
+    'first': ('รางวัลที่ 1', 'full'),
+    'near1': ('รางวัลข้างเคียงรางวัลที่ 1', 'full'),
+    'second': ('รางวัลที่ 2', 'full'),
+    'third': ('รางวัลที่ 3', 'full'),
+    'fourth': ('รางวัลที่ 4', 'full'),
+    'fifth': ('รางวัลที่ 5', 'full'),
+    'last3f': ('เลขหน้า 3 ตัว', 'front3'),
+    'last3b': ('เลขท้าย 3 ตัว', 'back3'),
+    'last2': ('เลขท้าย 2 ตัว', 'last2'),
+}
+
+# จำนวนเลขของแต่ละรางวัลเมื่อประกาศครบ
+PRIZE_COUNTS = {
+    'first': 1, 'near1': 2, 'second': 5, 'third': 10, 'fourth': 50,
+    'fifth': 100, 'last3f': 2, 'last3b': 2, 'last2': 1,
+}
+
+PRIZE_NAMES = {prize: name for prize, (name, _) in PRIZES.items()}
+PRIZE_ORDER = {prize: i for i, prize in enumerate(PRIZES)}
+
+# ความยาวของเลขรางวัลในแต่ละส่วน
+PART_LENGTHS = {'full': 6, 'front3': 3, 'back3': 3, 'last2': 2}
+
+# แยกส่วนของเลขสลากที่เก็บเป็นจำนวนเต็ม (ใช้กับ array ของสลากหลายใบ)
+PART_OF_TICKETS = {
+    'full': lambda tickets: tickets,
+    'front3': lambda tickets: tickets // 1000,
+    'back3': lambda tickets: tickets % 1000,
+    'last2': lambda tickets: tickets % 100,
+}
+
+
+def ticket_parts(number: str) -> Dict[str, str]:
+    """แยกเลขสลาก 6 หลักเป็นส่วนที่ใช้เทียบรางวัล"""
+    return {'full': number, 'front3': number[:3], 'back3': number[-3:], 'last2': number[-2:]}
+
+
+def is_complete(prizes: Dict[str, List[str]]) -> bool:
+    """ประกาศครบทุกรางวัลแล้วหรือไม่ (prizes = ประเภทรางวัล -> รายการเลข)"""
+    return all(len(prizes.get(prize, ())) >= count for prize, count in PRIZE_COUNTS.items())
+
+
+def prize_data_of(result_data) -> Dict[str, Any]:
+    """หา dict ของรางวัลในข้อมูลที่บันทึกไว้ (response.result.data ของ GLO API หรือรูปแบบแบน)"""
+    if not isinstance(result_data, dict):
+        return {}
+
+    response = result_data.get('response')
+    if isinstance(response, dict):
+        result = response.get('result')
+        if isinstance(result, dict) and isinstance(result.get('data'), dict):
+            return result['data']
+        if any(prize in response for prize in PRIZES):
+            return response
+
+    if isinstance(result_data.get('data'), dict):
+        return result_data['data']
+    return result_data
+
+
+def parse_prize(prize_data) -> Tuple[List[str], Optional[int]]:
+    """แปลงข้อมูลรางวัลหนึ่งประเภทเป็น (รายการเลข, เงินรางวัลต่อใบ)"""
+    amount = None
+    numbers = prize_data
+
+    if isinstance(prize_data, dict):
+        try:
+            amount = int(float(prize_data.get('price'))) if prize_data.get('price') else None
+        except (TypeError, ValueError):
+            amount = None
+        numbers = prize_data.get('number', [])
+
+    if isinstance(numbers, (str, int)):
+        numbers = [numbers]
+    if not isinstance(numbers, list):
+        return [], amount
+
+    values = []
+    for item in numbers:
+        if isinstance(item, dict):
+            item = item.get('value', item.get('number'))
+        if item not in (None, ''):
+            values.append(str(item).strip())
+    return values, amount
+
+
+class PrizeIndex:
+    """ตารางค้นหารางวัลของงวดเดียว (สร้างครั้งเดียว ใช้ได้หลาย thread เพราะอ่านอย่างเดียว)"""
+
+    def __init__(self, draw_date, prizes: Dict[str, List[str]], amounts: Optional[Dict[str, int]] = None,
+                 updated_at=None):
+        self.draw_date = draw_date
+        self.updated_at = updated_at
+        self.prizes = prizes
+        self.amounts = amounts or {}
+        self._arrays = None
+        # ส่วนของเลข -> {เลข: (ประเภทรางวัล, ...)}
+        self.lookup = {part: {} for part in PART_LENGTHS}
+
+        for prize, numbers in prizes.items():
+            part = PRIZES[prize][1]
+            for number in numbers:
+                if len(number) != PART_LENGTHS[part] or not number.isdigit():
+                    continue
+                won = self.lookup[part].setdefault(number, ())
+                if prize not in won:
+                    self.lookup[part][number] = won + (prize,)
+
+    @classmethod
+    def from_result(cls, lotto_result: LottoResult) -> 'PrizeIndex':
+        """คอมไพล์จาก LottoResult ที่บันทึกไว้"""
+        data = prize_data_of(lotto_result.result_data)
+        prizes = {}
+        amounts = {}
+        for prize in PRIZES:
+            if prize not in data:
+                continue
+            numbers, amount = parse_prize(data[prize])
+            if numbers:
+                prizes[prize] = numbers
+            if amount:
+                amounts[prize] = amount
+        return cls(lotto_result.draw_date, prizes, amounts, updated_at=lotto_result.updated_at)
+
+    def __bool__(self):
+        return bool(self.prizes)
+
+    def check(self, number: str) -> List[str]:
+        """ประเภทรางวัลที่เลขสลาก 6 หลักนี้ถูก เรียงตามลำดับใน PRIZES"""
+        won = []
+        for part, value in ticket_parts(number).items():
+            won.extend(self.lookup[part].get(value, ()))
+        return sorted(won, key=PRIZE_ORDER.__getitem__)
+
+    def amount_of(self, prizes: List[str]) -> int:
+        """เงินรางวัลรวมของประเภทรางวัลที่ถูก (ถ้า API ระบุไว้)"""
+        return sum(self.amounts.get(prize, 0) for prize in prizes)
+
+    @property
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """เลขรางวัลแต่ละประเภทเป็น array ของจำนวนเต็ม (สร้างเมื่อเรียกใช้ครั้งแรก)"""
+        if self._arrays is None:
+            self._arrays = {
+                prize: np.array(
+                    [int(number) for number in numbers
+                     if len(number) == PART_LENGTHS[PRIZES[prize][1]] and number.isdigit()],
+                    dtype=np.int64
+                )
+                for prize, numbers in self.prizes.items()
+            }
+        return self._arrays
+
+    def check_many(self, tickets: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        ตรวจสลากหลายใบพร้อมกัน (tickets = array ของเลข 6 หลักเป็นจำนวนเต็ม)
+        คืนค่า ประเภทรางวัล -> mask ของสลากที่ถูกรางวัลนั้น (เฉพาะรางวัลที่มีผู้ถูก)
+        """
+        parts = {}
+        masks = {}
+        for prize, numbers in self.arrays.items():
+            part = PRIZES[prize][1]
+            if part not in parts:
+                parts[part] = PART_OF_TICKETS[part](tickets)
+            mask = np.isin(parts[part], numbers)
+            if mask.any():
+                masks[prize] = mask
+        return masks
+
+
+def check_tickets(numbers: List[str], indexes: Dict[Any, PrizeIndex]) -> List[Dict[str, Any]]:
+    """
+    ตรวจสลากหลายใบกับหลายงวดแบบ vectorized (numbers ต้องเป็นเลข 6 หลักที่ตรวจรูปแบบแล้ว)
+    คืนค่ารายการที่ถูกรางวัล เรียงจากงวดล่าสุด แล้วตามลำดับสลากที่ส่งมา
+    """
+    tickets = np.array([int(number) for number in numbers], dtype=np.int64)
+    wins = []
+
+    for draw_date in sorted(indexes, reverse=True):
+        index = indexes[draw_date]
+        won = {}
+        for prize, mask in sorted(index.check_many(tickets).items(), key=lambda item: PRIZE_ORDER[item[0]]):
+            for position in np.flatnonzero(mask):
+                won.setdefault(int(position), []).append(prize)
+
+        for position in sorted(won):
+            prizes = won[position]
+            wins.append({
+                'number': numbers[position],
+                'draw_date': draw_date.isoformat(),
+                'prizes': prizes,
+                'prize_amount': index.amount_of(prizes),
+            })
+
+    return wins
+
+
+class PrizeIndexStore:
+    """
+    เก็บ PrizeIndex ของแต่ละงวดใน process (เฉพาะงวดที่ประกาศครบแล้ว)
+    ตารางที่เก็บไว้ตรวจ updated_at กับฐานข้อมูลใหม่ไม่เกินหนึ่งครั้งต่อ ttl วินาที และงวดล่าสุด
+    ตรวจไม่เกินหนึ่งครั้งต่อ latest_ttl วินาที (กรณีบันทึกจาก process อื่น)
+    """
+
+    def __init__(self, latest_ttl: float = 60.0, ttl: float = 60.0):
+        self.latest_ttl = latest_ttl
+        self.ttl = ttl
+        self._indexes = {}
+        self._checked = {}
+        self._latest_date = None
+        self._latest_checked = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, lotto_result: LottoResult) -> PrizeIndex:
+        """คอมไพล์ตารางของงวดที่บันทึก (เก็บไว้เฉพาะเมื่อประกาศครบทุกรางวัลแล้ว)"""
+        index = PrizeIndex.from_result(lotto_result)
+        draw_date = lotto_result.draw_date
+        with self._lock:
+            if is_complete(index.prizes):
+                self._indexes[draw_date] = index
+                self._checked[draw_date] = time.monotonic()
+            else:
+                # ผลที่ยังประกาศไม่ครบจะเปลี่ยนอีก ไม่เก็บไว้
+                self._indexes.pop(draw_date, None)
+                self._checked.pop(draw_date, None)
+            if lotto_result.is_valid and (self._latest_date is None or draw_date >= self._latest_date):
+                self._latest_date = draw_date
+        return index
+
+    def discard(self, draw_date):
+        with self._lock:
+            self._indexes.pop(draw_date, None)
+            self._checked.pop(draw_date, None)
+            if draw_date == self._latest_date:
+                self._latest_date = None
+                self._latest_checked = 0.0
+
+    def _split_fresh(self, draw_dates) -> Tuple[Dict[Any, PrizeIndex], Dict[Any, PrizeIndex], List[Any]]:
+        """แยกวันที่เป็น (ตารางที่ยังสด, ตารางที่ต้องตรวจ updated_at, วันที่ที่ยังไม่มีตาราง)"""
+        now = time.monotonic()
+        fresh, stale, missing = {}, {}, []
+        with self._lock:
+            for draw_date in draw_dates:
+                index = self._indexes.get(draw_date)
+                if index is None:
+                    missing.append(draw_date)
+                elif now - self._checked.get(draw_date, 0.0) < self.ttl:
+                    fresh[draw_date] = index
+                else:
+                    stale[draw_date] = index
+        return fresh, stale, missing
+
+    def _revalidate(self, stale: Dict[Any, PrizeIndex]) -> Tuple[Dict[Any, PrizeIndex], List[Any]]:
+        """
+        ตรวจ updated_at ของตารางที่เก็บไว้นานเกิน ttl ด้วย query เดียว
+        คืนค่า (ตารางที่ยังตรงกับฐานข้อมูล, วันที่ที่ต้องโหลดใหม่)
+        """
+        if not stale:
+            return {}, []
+        updated = dict(
+            LottoResult.objects.filter(draw_date__in=list(stale)).values_list('draw_date', 'updated_at')
+        )
+        now = time.monotonic()
+        valid, reload = {}, []
+        for draw_date, index in stale.items():
+            if draw_date not in updated:
+                self.discard(draw_date)
+            elif updated[draw_date] == index.updated_at:
+                valid[draw_date] = index
+                with self._lock:
+                    self._checked[draw_date] = now
+            else:
+                reload.append(draw_date)
+        return valid, reload
+
+    def get(self, draw_date) -> Optional[PrizeIndex]:
+        """ตารางของวันที่ที่ระบุ (None ถ้ายังไม่มีผลรางวัลในฐานข้อมูล)"""
+        return self.get_many([draw_date]).get(draw_date)
+
+    def get_many(self, draw_dates) -> Dict[Any, PrizeIndex]:
+        """ตารางของหลายวันที่ (ตรวจตารางที่เก็บไว้และโหลดงวดที่ขาดไม่เกินสอง query)"""
+        draw_dates = list(draw_dates)
+        indexes, stale, missing = self._split_fresh(draw_dates)
+        valid, reload = self._revalidate(stale)
+        indexes.update(valid)
+
+        load = missing + reload
+        if load:
+            for lotto_result in LottoResult.objects.filter(draw_date__in=load):
+                indexes[lotto_result.draw_date] = self.record(lotto_result)
+        return {draw_date: indexes[draw_date] for draw_date in draw_dates if draw_date in indexes}
+
+    def latest(self) -> Optional[PrizeIndex]:
+        """ตารางของงวดล่าสุดที่ข้อมูลถูกต้อง"""
+        now = time.monotonic()
+        if self._latest_date is None or now - self._latest_checked >= self.latest_ttl:
+            row = (
+                LottoResult.objects.filter(is_valid=True)
+                .order_by('-draw_date')
+                .values_list('draw_date', 'updated_at')
+                .first()
+            )
+            if row is None:
+                self._latest_date = None
+                return None
+
+            draw_date, updated_at = row
+            cached = self._indexes.get(draw_date)
+            if cached is None or cached.updated_at != updated_at:
+                self.discard(draw_date)
+            else:
+                with self._lock:
+                    self._checked[draw_date] = now
+            self._latest_date = draw_date
+            self._latest_checked = now
+
+        return self.get(self._latest_date)
+
+    def clear(self):
+        with self._lock:
+            self._indexes = {}
+            self._checked = {}
+            self._latest_date = None
+            self._latest_checked = 0.0
+
+
+prize_indexes = PrizeIndexStore()
+
+
+def reset_prize_indexes():
+    """ล้างตารางที่เก็บไว้ทั้งหมด"""
+    prize_indexes.clear()
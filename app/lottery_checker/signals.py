@@ -0,0 +1,35 @@
+"""
+Signals - ดูแลข้อมูลที่ได้จาก LottoResult เมื่อผลรางวัลเปลี่ยน
+- ดัชนีเลขรางวัลย้อนหลัง (PrizeNumber) เขียนใน transaction เดียวกับการบันทึก
+- ตารางค้นหารางวัลในหน่วยความจำ (prize_index) คอมไพล์หลัง commit เพื่อไม่ให้เก็บข้อมูลที่ถูก rollback
+- แคชผลรางวัล/วันที่ไม่มีการออกรางวัลของ LottoService และเวอร์ชันที่ใช้ทำ ETag ถูกล้าง
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .http_cache import invalidate_results_version
+from .lotto_service import invalidate_result_cache
+from .models import LottoResult
+from .prize_history import sync_prize_numbers
+from .prize_index import prize_indexes
+
+
+@receiver(post_save, sender=LottoResult, dispatch_uid='lottery_checker_compile_prize_index')
+def lotto_result_saved(sender, instance, raw=False, **kwargs):
+    """อัปเดตดัชนีและคอมไพล์ตารางของงวดที่บันทึก (ข้ามการโหลด fixture)"""
+    if raw:
+        return
+    sync_prize_numbers(instance)
+    invalidate_result_cache(instance.draw_date)
+    invalidate_results_version()
+    transaction.on_commit(lambda: prize_indexes.record(instance))
+
+
+@receiver(post_delete, sender=LottoResult, dispatch_uid='lottery_checker_discard_prize_index')
+def lotto_result_deleted(sender, instance, **kwargs):
+    draw_date = instance.draw_date
+    invalidate_result_cache(draw_date)
+    invalidate_results_version()
+    transaction.on_commit(lambda: prize_indexes.discard(draw_date))
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Single Flight - ให้งานที่มี key เดียวกันทำงานจริงเพียงครั้งเดียวในขณะหนึ่ง
+- ภายใน process: caller แรกเป็นผู้ทำงาน caller อื่นรอรับผลเดียวกัน
+- ข้าม process (gunicorn หลาย worker): ใช้ advisory lock ระดับ session ของ PostgreSQL
+"""
+
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable
+
+from django.db import connection
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """รวมการเรียกที่ซ้อนกันของ key เดียวกันให้เหลือครั้งเดียว (ใช้ร่วมกันได้หลาย thread)"""
+
+    def __init__(self, wait_timeout: float = 60.0):
+        self.wait_timeout = wait_timeout
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """เรียก fn() ถ้ายังไม่มีใครกำลังทำ key นี้ ไม่เช่นนั้นรอผลของผู้ที่ทำอยู่"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            if not flight.done.wait(self.wait_timeout):
+                raise TimeoutError(f"รอผลของ {key} นานเกิน {self.wait_timeout} วินาที")
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def in_flight(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._flights
+
+
+def advisory_lock_id(name: str) -> int:
+    """แปลงชื่อ lock เป็นจำนวนเต็ม 63 บิตสำหรับ pg_advisory_lock"""
+    return int(hashlib.md5(name.encode()).hexdigest()[:15], 16)
+
+
+@contextmanager
+def session_lock(name: str):
+    """
+    lock ระหว่าง process ที่ผูกกับ connection ไม่ใช่ transaction (pg_advisory_lock ของ PostgreSQL)
+    ถือไว้ระหว่างเรียก API ภายนอกได้โดยไม่เปิด transaction ค้าง และปลดเมื่อออกจาก block
+    ฐานข้อมูลอื่น (เช่น SQLite ที่ใช้ตอนพัฒนา) ไม่มี lock ข้าม process
+    """
+    if connection.vendor != 'postgresql':
+        yield
+        return
+
+    lock_id = advisory_lock_id(name)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_lock(%s)", [lock_id])
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [lock_id])
@@ -0,0 +1,1080 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import requests
+import threading
+
+from lottery_checker.glo_client import CircuitBreaker, GLOClient
+from lottery_checker.glo_fetcher import GLOBulkFetcher, TokenBucket, candidate_draw_dates
+from lottery_checker.jobs import (
+    JOB_HANDLERS, JobProgress, claim_next_job, enqueue_job, requeue_stale_jobs, run_worker
+)
+from lottery_checker import live_results
+from lottery_checker.live_results import LiveResultHub, diff_prizes, get_live_hub, is_complete, reset_live_hubs
+from lottery_checker.lotto_service import LottoService
+from lottery_checker.models import BackgroundJob, LottoResult, NoDrawDate, PrizeNumber, payload_digest
+from lottery_checker.prize_history import backfill_prize_numbers, prize_history
+from lottery_checker.prize_index import (
+    PART_LENGTHS, PRIZE_COUNTS, PRIZES, PrizeIndex, PrizeIndexStore, check_tickets, prize_indexes,
+    reset_prize_indexes
+)
+from lottery_checker.single_flight import SingleFlight, advisory_lock_id, session_lock
+from lottery_checker.views import BULK_FETCH_MAX_RATE_PER_SECOND, BULK_FETCH_MAX_WORKERS
+
+
+def glo_payload(first='123456'):
+    """ข้อมูลตัวอย่างในรูปแบบ GLO API"""
+    return {'response': {'result': {'data': {'first': {'number': [{'value': first}]}}}}}
+
+
+def glo_full_payload():
+    """ผลรางวัลครบทุกประเภทในรูปแบบ GLO API"""
+    def prize(price, *values):
+        return {'price': price, 'number': [{'round': 1, 'value': value} for value in values]}
+
+    return {'response': {'result': {'data': {
+        'first': prize('6000000', '123456'),
+        'near1': prize('100000', '123455', '123457'),
+        'second': prize('200000', '222222', '333333'),
+        'fifth': prize('20000', '456456'),
+        'last3f': prize('4000', '123', '777'),
+        'last3b': prize('4000', '456', '888'),
+        'last2': prize('2000', '56'),
+    }}}}
+
+
+def glo_complete_payload():
+    """ผลรางวัลที่ประกาศครบทุกรางวัล (เลขที่ไม่ได้ระบุเติมด้วยเลขที่ไม่ซ้ำกับ glo_full_payload)"""
+    payload = glo_full_payload()
+    data = payload['response']['result']['data']
+    filler = iter(range(900000, 999999))
+    for prize, count in PRIZE_COUNTS.items():
+        numbers = data.setdefault(prize, {'number': []})['number']
+        length = PART_LENGTHS[PRIZES[prize][1]]
+        while len(numbers) < count:
+            numbers.append({'value': str(next(filler))[-length:]})
+    return payload
+
+
+class FakeGLOService(LottoService):
+    """LottoService ที่ตอบจากข้อมูลในหน่วยความจำแทนการเรียก GLO API"""
+
+    def __init__(self, results, failures=0):
+        super().__init__()
+        self.results = results
+        self.failures = failures
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def fetch_from_api(self, date, month, year):
+        with self._lock:
+            self.calls.append((date, month, year))
+            if self.failures:
+                self.failures -= 1
+                return None
+        return self.results.get((date, month, year), {'response': {'result': {'data': None}}})
+
+
+@patch('lottery_checker.glo_fetcher.LOTTERY_DATES')
+class GLOBulkFetcherTests(TestCase):
+    """Test the calendar-aware concurrent GLO fetcher"""
+
+    def test_candidates_come_from_calendar(self, mock_dates):
+        """Test only calendar draw dates inside the range are requested"""
+        mock_dates.get_all_draw_dates.return_value = ['2023-12-30', '2024-01-17', '2024-02-01', '2024-05-02']
+        self.assertEqual(
+            candidate_draw_dates(date(2024, 1, 1), date(2024, 3, 1)),
+            [date(2024, 1, 17), date(2024, 2, 1)]
+        )
+
+    def test_candidates_fall_back_to_1st_and_16th(self, mock_dates):
+        """Test the 1st/16th rule when the calendar does not cover the range"""
+        mock_dates.get_all_draw_dates.return_value = []
+        candidates = candidate_draw_dates(date(2024, 1, 1), date(2025, 12, 31))
+        self.assertEqual(len(candidates), 48)
+        self.assertEqual(candidates[-1], date(2025, 12, 16))
+
+    def test_fetch_saves_only_missing_dates(self, mock_dates):
+        """Test existing dates are skipped and results are saved"""
+        mock_dates.get_all_draw_dates.return_value = ['2024-01-01', '2024-01-17', '2024-02-01']
+        LottoResult.objects.create(draw_date=date(2024, 1, 1), result_data=glo_payload(), is_valid=False)
+        service = FakeGLOService({(17, 1, 2024): glo_payload('654321')})
+
+        result = GLOBulkFetcher(service=service, rate_per_second=0, backoff_seconds=0).fetch(
+            date(2024, 1, 1), date(2024, 2, 15)
+        )
+
+        self.assertEqual(sorted(service.calls), [(1, 2, 2024), (17, 1, 2024)])
+        self.assertEqual(result['valid_dates'], ['2024-01-17'])
+        self.assertEqual(result['candidate_dates'], 3)
+        self.assertEqual(result['results'][0], '⏭️ 2024-01-01: มีข้อมูลอยู่แล้ว')
+        self.assertTrue(LottoResult.objects.filter(draw_date=date(2024, 1, 17)).exists())
+        self.assertFalse(LottoResult.objects.filter(draw_date=date(2024, 2, 1)).exists())
+
+    def test_retry_after_failures(self, mock_dates):
+        """Test failed calls are retried with backoff"""
+        mock_dates.get_all_draw_dates.return_value = ['2024-01-17']
+        service = FakeGLOService({(17, 1, 2024): glo_payload()}, failures=2)
+
+        result = GLOBulkFetcher(service=service, max_retries=2, rate_per_second=0, backoff_seconds=0).fetch(
+            date(2024, 1, 1), date(2024, 1, 31)
+        )
+
+        self.assertEqual(result['api_calls'], 3)
+        self.assertEqual(result['fetched_count'], 1)
+
+    def test_progress_reports_each_date(self, mock_dates):
+        """Test per-date statuses are written to the job while fetching"""
+        mock_dates.get_all_draw_dates.return_value = ['2024-01-17', '2024-02-01']
+        service = FakeGLOService({(17, 1, 2024): glo_payload()}, failures=1)
+        job = BackgroundJob.objects.create(kind='glo_bulk_fetch')
+
+        GLOBulkFetcher(service=service, max_retries=0, rate_per_second=0).fetch(
+            date(2024, 1, 1), date(2024, 2, 15), progress=JobProgress(job)
+        )
+
+        job.refresh_from_db()
+        self.assertEqual((job.total_items, job.processed_items, job.failed_items), (2, 2, 1))
+        self.assertTrue(job.item_statuses['2024-01-17']['ok'] ^ job.item_statuses['2024-02-01']['ok'])
+
+    def test_token_bucket_limits_rate(self, mock_dates):
+        """Test the token bucket spaces calls after the burst"""
+        bucket = TokenBucket(rate=50, capacity=2)
+        with patch('lottery_checker.glo_fetcher.time.sleep') as mock_sleep:
+            # จำลองเวลาที่ผ่านไประหว่างรอ
+            mock_sleep.side_effect = lambda seconds: setattr(
+                bucket, '_updated', bucket._updated - seconds * 1.01
+            )
+            for _ in range(3):
+                bucket.acquire()
+        self.assertEqual(mock_sleep.call_count, 1)
+
+
+class StubGLOServer:
+    """HTTP server ในเครื่องที่ตอบ status ตามลำดับที่กำหนด (ตัวสุดท้ายใช้ซ้ำ)"""
+
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                stub.requests.append(json.loads(self.rfile.read(length) or b'null'))
+                status = stub.statuses.pop(0) if len(stub.statuses) > 1 else stub.statuses[0]
+                body = json.dumps(glo_payload()).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/api/checking/getLotteryResult'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class GLOClientTests(TestCase):
+    """Test the pooled GLO client against a local stub server"""
+
+    def make(self, statuses, **kwargs):
+        server = StubGLOServer(statuses)
+        self.addCleanup(server.close)
+        client = GLOClient(backoff_seconds=0, **kwargs)
+        self.addCleanup(client.close)
+        return server, client
+
+    def test_retries_server_errors(self):
+        """Test 5xx responses are retried until the call succeeds"""
+        server, client = self.make([503, 502, 200])
+
+        data = client.post_json(server.url, {'date': 1, 'month': 2, 'year': 2024})
+
+        self.assertEqual(data, glo_payload())
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(server.requests[0], {'date': 1, 'month': 2, 'year': 2024})
+        metrics = client.metrics()
+        self.assertEqual((metrics['calls'], metrics['attempts'], metrics['retries'], metrics['errors']), (1, 3, 2, 0))
+        self.assertEqual(metrics['latency']['samples'], 3)
+        self.assertEqual(metrics['circuit_state'], CircuitBreaker.CLOSED)
+
+    def test_client_errors_are_not_retried(self):
+        """Test 4xx responses fail immediately"""
+        server, client = self.make([404])
+
+        self.assertIsNone(client.post_json(server.url, {}))
+        self.assertEqual(len(server.requests), 1)
+        self.assertEqual(client.metrics()['errors'], 1)
+
+    def test_circuit_opens_after_repeated_failures(self):
+        """Test the breaker rejects calls once the failure threshold is reached"""
+        server, client = self.make([500], max_retries=1, failure_threshold=2, reset_timeout=60)
+
+        self.assertIsNone(client.post_json(server.url, {}))
+        self.assertIsNone(client.post_json(server.url, {}))
+
+        self.assertEqual(len(server.requests), 2)
+        metrics = client.metrics()
+        self.assertEqual(metrics['circuit_state'], CircuitBreaker.OPEN)
+        self.assertEqual(metrics['rejected'], 1)
+
+    def test_half_open_trial_closes_circuit(self):
+        """Test a successful trial call after the reset timeout closes the breaker"""
+        server, client = self.make([500, 200], max_retries=0, failure_threshold=1, reset_timeout=0)
+
+        self.assertIsNone(client.post_json(server.url, {}))
+        self.assertEqual(client.breaker.state, CircuitBreaker.OPEN)
+
+        self.assertEqual(client.post_json(server.url, {}), glo_payload())
+        self.assertEqual(client.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_trial_resolves_on_any_exception(self):
+        """Test a trial that raises an unexpected or non-retryable error reopens the breaker"""
+        _, client = self.make([200], max_retries=0, failure_threshold=1, reset_timeout=0)
+        errors = [requests.exceptions.InvalidURL('bad url'), RuntimeError('boom')]
+
+        for error in errors:
+            client.breaker.record_failure()
+            with patch.object(client.session, 'post', side_effect=error):
+                if isinstance(error, requests.exceptions.RequestException):
+                    self.assertIsNone(client.post_json('http://glo.invalid', {}))
+                else:
+                    with self.assertRaises(RuntimeError):
+                        client.post_json('http://glo.invalid', {})
+            # ผลของการลองถูกบันทึก ไม่ค้างอยู่ใน half-open
+            self.assertEqual(client.breaker.state, CircuitBreaker.OPEN)
+
+    def test_stuck_half_open_trial_expires(self):
+        """Test a half-open trial without a result allows a new trial after the reset timeout"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+        breaker.record_failure()
+
+        with patch('lottery_checker.glo_client.time.monotonic', return_value=breaker._opened_at + 31):
+            self.assertTrue(breaker.allow())
+            self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+            self.assertFalse(breaker.allow())
+        with patch('lottery_checker.glo_client.time.monotonic', return_value=breaker._opened_at + 62):
+            self.assertTrue(breaker.allow())
+
+
+class BackgroundJobTests(TestCase):
+    """Test the database-backed job queue and its progress API"""
+
+    def setUp(self):
+        """Register a job kind that reports three dates"""
+        def handler(progress, fail=False):
+            if fail:
+                raise RuntimeError('boom')
+            progress.start(3)
+            for day in (1, 16):
+                progress.item(f'2024-01-{day:02d}', 'ok')
+            return {'success': True, 'fetched_count': 2, 'results': ['ok', 'ok']}
+
+        patcher = patch.dict(JOB_HANDLERS, {'test.job': handler})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_enqueue_rejects_unknown_kind(self):
+        """Test only registered job kinds can be queued"""
+        with self.assertRaises(ValueError):
+            enqueue_job('missing.job')
+
+    def test_job_is_claimed_once(self):
+        """Test a pending job can only be claimed by one worker"""
+        job = enqueue_job('test.job')
+
+        claimed = claim_next_job('worker-a')
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual((claimed.status, claimed.worker), (BackgroundJob.STATUS_RUNNING, 'worker-a'))
+        self.assertIsNone(claim_next_job('worker-b'))
+
+    def test_worker_runs_pending_jobs(self):
+        """Test the worker records progress, result and failures"""
+        ok_job = enqueue_job('test.job')
+        failed_job = enqueue_job('test.job', fail=True)
+
+        self.assertEqual(run_worker(once=True, worker='test'), 2)
+
+        ok_job.refresh_from_db()
+        self.assertEqual(ok_job.status, BackgroundJob.STATUS_SUCCEEDED)
+        self.assertEqual((ok_job.total_items, ok_job.processed_items), (3, 2))
+        self.assertEqual(ok_job.result, {'success': True, 'fetched_count': 2})
+        failed_job.refresh_from_db()
+        self.assertEqual((failed_job.status, failed_job.error), (BackgroundJob.STATUS_FAILED, 'boom'))
+
+    def test_stale_jobs_are_requeued(self):
+        """Test running jobs without a recent heartbeat go back to the queue"""
+        job = enqueue_job('test.job')
+        claim_next_job('worker-a')
+        BackgroundJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(requeue_stale_jobs(timeout_seconds=60), 1)
+        self.assertEqual(BackgroundJob.objects.get(pk=job.pk).status, BackgroundJob.STATUS_PENDING)
+
+    def test_progress_reports_throughput_and_eta(self):
+        """Test progress derives throughput and ETA from processed items"""
+        job = enqueue_job('test.job')
+        BackgroundJob.objects.filter(pk=job.pk).update(
+            status=BackgroundJob.STATUS_RUNNING, total_items=10, processed_items=4,
+            started_at=timezone.now() - timedelta(seconds=8)
+        )
+
+        response = self.client.get(reverse('lottery_checker:job_progress_api', args=[job.pk]))
+
+        data = response.json()
+        self.assertEqual(data['percent'], 40)
+        self.assertAlmostEqual(data['throughput_per_second'], 0.5, places=1)
+        self.assertAlmostEqual(data['eta_seconds'], 12, delta=1)
+
+    def login_staff(self):
+        staff = User.objects.create_user('staff', password='pw', is_staff=True)
+        self.client.force_login(staff)
+
+    def test_bulk_fetch_api_enqueues_job(self):
+        """Test the bulk fetch endpoint returns a job id instead of fetching inline"""
+        self.login_staff()
+        response = self.client.post(
+            reverse('lottery_checker:bulk_fetch_api'),
+            data='{"start_date": "2024-01-01", "end_date": "2024-02-01"}',
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 202)
+        job = BackgroundJob.objects.get(pk=response.json()['job_id'])
+        self.assertEqual((job.kind, job.status), ('glo_bulk_fetch', BackgroundJob.STATUS_PENDING))
+        self.assertEqual(job.params['end_date'], '2024-02-01')
+        self.assertEqual(response.json()['progress_url'], job.get_absolute_url())
+
+    def test_bulk_fetch_api_requires_staff(self):
+        """Test anonymous clients cannot start a GLO crawl"""
+        response = self.client.post(
+            reverse('lottery_checker:bulk_fetch_api'),
+            data='{"start_date": "2024-01-01"}',
+            content_type='application/json'
+        )
+
+        self.assertNotEqual(response.status_code, 202)
+        self.assertFalse(BackgroundJob.objects.filter(kind='glo_bulk_fetch').exists())
+
+    def test_bulk_fetch_api_clamps_crawl_settings(self):
+        """Test worker count and rate are clamped and a zero rate is rejected"""
+        self.login_staff()
+        url = reverse('lottery_checker:bulk_fetch_api')
+
+        response = self.client.post(
+            url, data='{"max_workers": 500, "rate_per_second": 1000}', content_type='application/json'
+        )
+        job = BackgroundJob.objects.get(pk=response.json()['job_id'])
+        self.assertEqual(job.params['max_workers'], BULK_FETCH_MAX_WORKERS)
+        self.assertEqual(job.params['rate_per_second'], BULK_FETCH_MAX_RATE_PER_SECOND)
+
+        response = self.client.post(url, data='{"rate_per_second": 0}', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class PrizeIndexTests(TestCase):
+    """Test the compiled per-draw prize lookup"""
+
+    def setUp(self):
+        reset_prize_indexes()
+        self.draw_date = date(2024, 3, 16)
+
+    def tearDown(self):
+        reset_prize_indexes()
+
+    def test_lookup_matches_every_prize_part(self):
+        """Test full numbers, front/back 3 digits and last 2 digits are all matched"""
+        result = LottoResult(draw_date=self.draw_date, result_data=glo_full_payload())
+        index = PrizeIndex.from_result(result)
+
+        self.assertEqual(index.check('123456'), ['first', 'last3f', 'last3b', 'last2'])
+        self.assertEqual(index.check('123457'), ['near1', 'last3f'])
+        self.assertEqual(index.check('456456'), ['fifth', 'last3b', 'last2'])
+        self.assertEqual(index.check('777000'), ['last3f'])
+        self.assertEqual(index.check('000000'), [])
+        self.assertEqual(index.amount_of(['near1', 'last3f']), 104000)
+
+    def test_flat_payload(self):
+        """Test results stored as flat prize lists are indexed too"""
+        result = LottoResult(draw_date=self.draw_date, result_data={'first': '654321', 'last2': ['21']})
+
+        self.assertEqual(PrizeIndex.from_result(result).check('654321'), ['first', 'last2'])
+
+    def test_saved_result_is_compiled_after_commit(self):
+        """Test saving a complete result compiles its index without another query"""
+        with self.captureOnCommitCallbacks(execute=True):
+            LottoResult.objects.create(draw_date=self.draw_date, result_data=glo_complete_payload())
+
+        with self.assertNumQueries(0):
+            self.assertEqual(prize_indexes.get(self.draw_date).check('222222'), ['second'])
+
+    def test_incomplete_result_is_not_kept(self):
+        """Test a partially announced draw is read from the database on every lookup"""
+        with self.captureOnCommitCallbacks(execute=True):
+            LottoResult.objects.create(draw_date=self.draw_date, result_data=glo_full_payload())
+
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.assertEqual(prize_indexes.get(self.draw_date).check('222222'), ['second'])
+
+    def test_stored_index_is_revalidated(self):
+        """Test a kept index is reloaded once the row changes in another process"""
+        store = PrizeIndexStore(ttl=0)
+        result = LottoResult.objects.create(draw_date=self.draw_date, result_data=glo_complete_payload())
+        self.assertEqual(store.get(self.draw_date).check('222222'), ['second'])
+
+        # ตรงกับฐานข้อมูล ใช้ตารางเดิมหลังตรวจ updated_at
+        with self.assertNumQueries(1):
+            self.assertEqual(store.get_many([self.draw_date])[self.draw_date].check('222222'), ['second'])
+
+        # process อื่นแก้ผลรางวัล (ไม่ผ่าน signal ของ process นี้)
+        payload = glo_complete_payload()
+        payload['response']['result']['data']['second']['number'][0]['value'] = '212121'
+        LottoResult.objects.filter(pk=result.pk).update(
+            result_data=payload, updated_at=result.updated_at + timedelta(seconds=1)
+        )
+        with self.assertNumQueries(2):
+            self.assertEqual(store.get(self.draw_date).check('222222'), [])
+        self.assertEqual(store.get(self.draw_date).check('212121'), ['second'])
+
+        LottoResult.objects.filter(pk=result.pk).delete()
+        self.assertIsNone(store.get(self.draw_date))
+
+    def test_check_lottery_quick_uses_latest_draw(self):
+        """Test the quick check answers from the latest compiled draw"""
+        LottoResult.objects.create(draw_date=date(2024, 3, 1), result_data=glo_payload('999999'))
+        LottoResult.objects.create(draw_date=self.draw_date, result_data=glo_full_payload())
+
+        response = self.client.post(
+            reverse('lottery_checker:check_lottery_quick'),
+            data='{"lottery_number": "555456"}', content_type='application/json'
+        )
+
+        result = response.json()['result']
+        self.assertTrue(result['is_winner'])
+        self.assertEqual(result['prizes_won'], ['last3b', 'last2'])
+        self.assertEqual(result['prize_amount'], 6000)
+        self.assertEqual(result['draw_date'], '16/03/2024')
+
+    def test_check_number_reads_stored_draw(self):
+        """Test checking a stored draw does not call the GLO API"""
+        LottoResult.objects.create(draw_date=self.draw_date, result_data=glo_full_payload())
+
+        with patch.object(LottoService, 'fetch_from_api') as mock_fetch:
+            response = self.client.post(
+                reverse('lottery_checker:check_number'),
+                data='{"date": 16, "month": 3, "year": 2024, "number": "333333"}',
+                content_type='application/json'
+            )
+
+        mock_fetch.assert_not_called()
+        data = response.json()
+        self.assertEqual((data['is_winner'], data['prize_type'], data['source']), (True, 'second', 'database'))
+
+
+class BatchCheckTests(TestCase):
+    """Test checking many tickets against many draws in one request"""
+
+    def setUp(self):
+        reset_prize_indexes()
+        LottoResult.objects.create(draw_date=date(2024, 3, 1), result_data=glo_payload('555456'))
+        LottoResult.objects.create(draw_date=date(2024, 3, 16), result_data=glo_full_payload())
+
+    def tearDown(self):
+        reset_prize_indexes()
+
+    def test_vectorized_check_matches_single_lookup(self):
+        """Test the array check returns the same prizes as PrizeIndex.check"""
+        index = prize_indexes.get(date(2024, 3, 16))
+        numbers = ['123456', '123457', '456456', '777000', '000000', '222222', '999956']
+
+        wins = check_tickets(numbers, {index.draw_date: index})
+
+        expected = [(number, index.check(number)) for number in numbers if index.check(number)]
+        self.assertEqual([(win['number'], win['prizes']) for win in wins], expected)
+
+    def test_batch_api_checks_several_draws(self):
+        """Test one request reports wins per draw, missing draws and invalid numbers"""
+        response = self.client.post(
+            reverse('lottery_checker:check_batch_api'),
+            data=json.dumps({
+                'numbers': ['555456', '000000', '12345x'],
+                'draw_dates': ['2024-03-16', '2024-03-01', '2024-02-16'],
+            }),
+            content_type='application/json'
+        )
+
+        data = response.json()
+        self.assertEqual(data['checked'], 2)
+        self.assertEqual(data['draw_dates'], ['2024-03-16', '2024-03-01'])
+        self.assertEqual(data['missing_dates'], ['2024-02-16'])
+        self.assertEqual(data['invalid_numbers'], ['12345x'])
+        self.assertEqual(
+            [(win['draw_date'], win['prizes']) for win in data['wins']],
+            [('2024-03-16', ['last3b', 'last2']), ('2024-03-01', ['first'])]
+        )
+        self.assertEqual(data['total_amount'], 6000)
+
+    def test_batch_api_defaults_to_latest_draw(self):
+        """Test the latest draw is used when no dates are given"""
+        response = self.client.post(
+            reverse('lottery_checker:check_batch_api'),
+            data=json.dumps({'numbers': ['222222']}),
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.json()['wins'][0]['prizes'], ['second'])
+
+    def test_batch_api_limits_size(self):
+        """Test oversized batches are rejected"""
+        response = self.client.post(
+            reverse('lottery_checker:check_batch_api'),
+            data=json.dumps({'numbers': ['123456'] * 10001}),
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+
+class PrizeHistoryTests(TestCase):
+    """Test the PrizeNumber inverted index and history lookups"""
+
+    def setUp(self):
+        reset_prize_indexes()
+        self.old = LottoResult.objects.create(draw_date=date(2024, 3, 1), result_data=glo_payload('555456'))
+        self.new = LottoResult.objects.create(draw_date=date(2024, 3, 16), result_data=glo_full_payload())
+
+    def tearDown(self):
+        reset_prize_indexes()
+
+    def test_rows_follow_saved_results(self):
+        """Test saving a result rewrites its index rows"""
+        self.assertEqual(PrizeNumber.objects.filter(result=self.new).count(), 11)
+
+        self.old.result_data = glo_payload('111111')
+        self.old.save()
+
+        self.assertEqual(
+            list(PrizeNumber.objects.filter(result=self.old).values_list('number', flat=True)), ['111111']
+        )
+
+    def test_ticket_history(self):
+        """Test a 6-digit lookup reports every prize the ticket would have won"""
+        history = prize_history('555456')
+
+        self.assertTrue(history['ever_won'])
+        self.assertEqual(history['last_won'], '2024-03-16')
+        self.assertEqual(
+            [(draw['draw_date'], [p['prize'] for p in draw['prizes']]) for draw in history['draws']],
+            [('2024-03-16', ['last3b', 'last2']), ('2024-03-01', ['first'])]
+        )
+        self.assertFalse(prize_history('000001')['ever_won'])
+
+    def test_suffix_history(self):
+        """Test 3 and 2 digit lookups match prizes ending with the number"""
+        self.assertEqual(
+            [p['prize'] for p in prize_history('456')['draws'][0]['prizes']], ['first', 'fifth', 'last3b']
+        )
+        self.assertEqual(
+            [p['prize'] for p in prize_history('56')['draws'][0]['prizes']], ['first', 'fifth', 'last2']
+        )
+        self.assertEqual(prize_history('56', limit=1)['draw_count'], 1)
+        # 2 ตัวท้ายของเลขหน้า/ท้าย 3 ตัวไม่ใช่รางวัลเลขท้าย 2 ตัว
+        self.assertFalse(prize_history('23')['ever_won'])
+        with self.assertRaises(ValueError):
+            prize_history('1234')
+
+    def test_backfill_rebuilds_index(self):
+        """Test the backfill recreates rows from stored results"""
+        PrizeNumber.objects.all().delete()
+
+        self.assertEqual(backfill_prize_numbers(), (2, 12))
+        self.assertEqual(backfill_prize_numbers(only_missing=True), (0, 0))
+
+    def test_history_api(self):
+        """Test the history endpoint answers from the index"""
+        response = self.client.get(reverse('lottery_checker:prize_history_api', args=['123456']))
+
+        self.assertEqual(response.json()['draws'][0]['prizes'][0]['prize_name'], 'รางวัลที่ 1')
+        self.assertEqual(
+            self.client.get(reverse('lottery_checker:prize_history_api', args=['12a'])).status_code, 400
+        )
+        url = reverse('lottery_checker:prize_history_api', args=['56'])
+        for limit in ('0', '-3', 'x'):
+            self.assertEqual(self.client.get(url, {'limit': limit}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'limit': '1'}).json()['draw_count'], 1)
+
+
+class LottoServiceCacheTests(TestCase):
+    """Test result and no-draw caching in get_or_fetch_result"""
+
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.localdate()
+
+    def tearDown(self):
+        cache.clear()
+
+    def fetch(self, service, day):
+        return service.get_or_fetch_result(day.day, day.month, day.year)
+
+    def test_no_draw_dates_are_cached(self):
+        """Test a date without results calls the API once and is not stored"""
+        service = FakeGLOService({})
+        day = self.today - timedelta(days=20)
+
+        first = self.fetch(service, day)
+        second = self.fetch(service, day)
+
+        self.assertTrue(first['no_draw'])
+        self.assertEqual((second['no_draw'], second['source']), (True, 'cache'))
+        self.assertEqual(len(service.calls), 1)
+        self.assertFalse(LottoResult.objects.exists())
+
+    def test_future_dates_skip_the_api(self):
+        """Test dates after today are answered without an API call"""
+        service = FakeGLOService({})
+
+        result = self.fetch(service, self.today + timedelta(days=1))
+
+        self.assertTrue(result['no_draw'])
+        self.assertEqual(service.calls, [])
+
+    def test_past_draws_are_cached_until_saved(self):
+        """Test stored past draws are served from cache and invalidated on save"""
+        day = self.today - timedelta(days=20)
+        result = LottoResult.objects.create(draw_date=day, result_data=glo_payload('123456'))
+        service = FakeGLOService({})
+
+        self.assertEqual(self.fetch(service, day)['source'], 'database')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.fetch(service, day)['source'], 'cache')
+
+        result.result_data = glo_payload('654321')
+        result.save()
+        self.assertEqual(self.fetch(service, day)['data'], glo_payload('654321'))
+        self.assertEqual(service.calls, [])
+
+    def test_latest_results_warm_cache_has_no_upstream_calls(self):
+        """Test the 7-day listing only calls the API on a cold cache"""
+        day = self.today - timedelta(days=3)
+        LottoResult.objects.create(draw_date=day, result_data=glo_payload())
+        service = FakeGLOService({})
+
+        cold = service.get_latest_results(7)
+        calls = len(service.calls)
+        warm = service.get_latest_results(7)
+
+        self.assertEqual(calls, 6)
+        self.assertEqual(len(service.calls), calls)
+        self.assertEqual((cold['total_results'], warm['total_results']), (1, 1))
+
+
+class SingleFlightTests(TestCase):
+    """Test coalescing of concurrent GLO fetches for the same draw date"""
+
+    def run_concurrently(self, flight, fn, count=8):
+        results = []
+        errors = []
+
+        def call():
+            try:
+                results.append(flight.do('2024-01-16', fn))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def test_concurrent_callers_share_one_call(self):
+        """Test callers that arrive while a fetch is running get the same result"""
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            release.wait(5)
+            return {'success': True}
+
+        thread = threading.Thread(target=lambda: flight.do('2024-01-16', fetch))
+        thread.start()
+        while not flight.in_flight('2024-01-16'):
+            pass
+        threading.Timer(0.2, release.set).start()
+        results, errors = self.run_concurrently(flight, fetch)
+        thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(errors, [])
+        self.assertEqual(results, [{'success': True}] * 8)
+        self.assertFalse(flight.in_flight('2024-01-16'))
+
+    def test_errors_reach_every_waiter(self):
+        """Test a failed fetch is raised to waiters and the next call retries"""
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def fail():
+            release.wait(5)
+            raise RuntimeError('GLO down')
+
+        thread = threading.Thread(target=lambda: self.assertRaises(RuntimeError, flight.do, '2024-01-16', fail))
+        thread.start()
+        while not flight.in_flight('2024-01-16'):
+            pass
+        threading.Timer(0.2, release.set).start()
+        results, errors = self.run_concurrently(flight, fail, count=4)
+        thread.join()
+
+        self.assertEqual(results, [])
+        self.assertEqual([str(e) for e in errors], ['GLO down'] * 4)
+        self.assertEqual(flight.do('2024-01-16', lambda: 'ok'), 'ok')
+
+    def test_fetch_rechecks_database_under_lock(self):
+        """Test a result stored by another worker while waiting is not fetched again"""
+        cache.clear()
+        today = timezone.localdate()
+        day = today - timedelta(days=20)
+        LottoResult.objects.create(draw_date=day, result_data=glo_payload())
+        service = FakeGLOService({})
+
+        result = service._fetch_and_store(day, today)
+
+        self.assertEqual(result['source'], 'database')
+        self.assertEqual(service.calls, [])
+        cache.clear()
+
+    def test_api_call_holds_the_lock_outside_a_transaction(self):
+        """Test the GLO request and the save happen under the session lock with no open transaction"""
+        today = timezone.localdate()
+        day = today - timedelta(days=20)
+        service = FakeGLOService({(day.day, day.month, day.year): glo_payload()})
+        depth = len(connection.atomic_blocks)
+        held = []
+        seen = []
+        fetch = service.fetch_from_api
+
+        @contextmanager
+        def recording_lock(name):
+            held.append(name)
+            yield
+            held.remove(name)
+
+        def fetch_and_record(*args):
+            seen.append((list(held), len(connection.atomic_blocks)))
+            return fetch(*args)
+
+        with patch('lottery_checker.lotto_service.session_lock', recording_lock), \
+                patch.object(service, 'fetch_from_api', side_effect=fetch_and_record):
+            result = service._fetch_and_store(day, today)
+
+        self.assertEqual(seen, [([f'glo_fetch:{day:%Y-%m-%d}'], depth)])
+        self.assertEqual(held, [])
+        self.assertEqual(result['source'], 'api')
+        self.assertTrue(LottoResult.objects.filter(draw_date=day).exists())
+
+    def test_session_lock_is_released_on_error(self):
+        """Test the PostgreSQL session lock is taken and released even when the block raises"""
+        db = MagicMock(vendor='postgresql')
+        cursor = db.cursor.return_value.__enter__.return_value
+        lock_id = advisory_lock_id('glo_fetch:2024-01-16')
+
+        with patch('lottery_checker.single_flight.connection', db):
+            with self.assertRaises(RuntimeError):
+                with session_lock('glo_fetch:2024-01-16'):
+                    raise RuntimeError('GLO down')
+
+        self.assertEqual(
+            [c.args for c in cursor.execute.call_args_list],
+            [("SELECT pg_advisory_lock(%s)", [lock_id]), ("SELECT pg_advisory_unlock(%s)", [lock_id])]
+        )
+
+    def test_no_draw_marker_is_shared_across_processes(self):
+        """Test a no-draw date found by one worker is not fetched again by another"""
+        cache.clear()
+        today = timezone.localdate()
+        day = today - timedelta(days=20)
+        service = FakeGLOService({})
+
+        self.assertEqual(service._fetch_and_store(day, today)['source'], 'api')
+        # แคชในหน่วยความจำของ process อื่นว่างเปล่า
+        cache.clear()
+        self.assertEqual(service._fetch_and_store(day, today)['source'], 'cache')
+
+        self.assertEqual(len(service.calls), 1)
+        self.assertTrue(NoDrawDate.objects.filter(draw_date=day).exists())
+        cache.clear()
+
+
+@patch.object(LiveResultHub, '_run')
+class LiveResultStreamTests(TestCase):
+    """Test the shared live results poller and its SSE endpoint"""
+
+    def setUp(self):
+        cache.clear()
+        self.day = timezone.localdate()
+        self.past_day = self.day - timedelta(days=16)
+        patcher = patch('lottery_checker.glo_fetcher.LOTTERY_DATES')
+        calendar = patcher.start()
+        self.addCleanup(patcher.stop)
+        calendar.get_all_draw_dates.return_value = [self.past_day.isoformat(), self.day.isoformat()]
+
+    def tearDown(self):
+        reset_live_hubs()
+        cache.clear()
+
+    def partial_payload(self, *prizes):
+        data = glo_full_payload()['response']['result']['data']
+        return {'response': {'result': {'data': {prize: data[prize] for prize in prizes}}}}
+
+    def api_key(self):
+        return (self.day.day, self.day.month, self.day.year)
+
+    def test_poll_saves_and_sends_only_new_numbers(self, mock_run):
+        """Test a poll stores newly announced prizes and pushes just the difference"""
+        LottoResult.objects.create(draw_date=self.day, result_data=self.partial_payload('last2'))
+        service = FakeGLOService({self.api_key(): self.partial_payload('last2', 'last3b')})
+        hub = LiveResultHub(self.day, service=service)
+
+        subscriber = hub.subscribe()
+        snapshot = subscriber.get_nowait()
+        message = hub.poll()
+        cache.clear()
+
+        self.assertIn('event: snapshot', snapshot)
+        self.assertIn('"last2": ["56"]', snapshot)
+        self.assertEqual(subscriber.get_nowait(), message)
+        payload = json.loads(message.split('data: ', 1)[1])
+        self.assertEqual(payload['changes'], {'last3b': ['456', '888']})
+        self.assertEqual(payload['version'], 1)
+        self.assertIn('last3b', LottoResult.objects.get(draw_date=self.day).result_data['response']['result']['data'])
+        self.assertIsNone(hub.poll())
+        self.assertEqual(len(service.calls), 2)
+
+    def test_one_upstream_poll_per_interval(self, mock_run):
+        """Test hubs sharing a cache make one GLO call per poll interval"""
+        service = FakeGLOService({self.api_key(): self.partial_payload('first')})
+        first = LiveResultHub(self.day, service=service)
+        second = LiveResultHub(self.day, service=service)
+
+        first.poll()
+        second.poll()
+
+        self.assertEqual(len(service.calls), 1)
+        self.assertEqual(second.prizes, {'first': ['123456']})
+
+    def test_complete_results_are_not_polled(self, mock_run):
+        """Test no upstream call is made once every prize is announced"""
+        data = {prize: {'number': [{'value': f'{i:06d}'} for i in range(count)]}
+                for prize, count in [('first', 1), ('near1', 2), ('second', 5), ('third', 10), ('fourth', 50),
+                                     ('fifth', 100), ('last3f', 2), ('last3b', 2), ('last2', 1)]}
+        LottoResult.objects.create(draw_date=self.day, result_data={'response': {'result': {'data': data}}})
+        service = FakeGLOService({})
+
+        LiveResultHub(self.day, service=service).poll()
+
+        self.assertEqual(service.calls, [])
+        self.assertFalse(is_complete({'first': ['123456']}))
+        self.assertEqual(diff_prizes({'last2': ['56']}, {'last2': ['56']}), {})
+
+    def test_stream_starts_with_snapshot(self, mock_run):
+        """Test the SSE endpoint sends a snapshot first and unsubscribes on close"""
+        LottoResult.objects.create(draw_date=self.day, result_data=self.partial_payload('first'))
+
+        response = self.client.get(
+            reverse('lottery_checker:live_results_stream'), {'date': self.day.isoformat()}
+        )
+        stream = iter(response.streaming_content)
+        retry = next(stream)
+        snapshot = next(stream)
+        hub = get_live_hub(self.day)
+        subscribers = hub.subscriber_count
+        response.close()
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(retry, b'retry: 5000\n\n')
+        self.assertIn(b'"first": ["123456"]', snapshot)
+        self.assertEqual((subscribers, hub.subscriber_count), (1, 0))
+
+    def test_stream_rejects_future_dates(self, mock_run):
+        """Test the stream only follows draws up to today"""
+        response = self.client.get(
+            reverse('lottery_checker:live_results_stream'),
+            {'date': (self.day + timedelta(days=1)).isoformat()}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_stream_rejects_non_draw_dates(self, mock_run):
+        """Test dates that are not in the draw calendar are refused"""
+        response = self.client.get(
+            reverse('lottery_checker:live_results_stream'),
+            {'date': (self.day - timedelta(days=3)).isoformat()}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_past_draw_sends_stored_snapshot_and_closes(self, mock_run):
+        """Test a past draw is answered from the database without a hub or GLO call"""
+        LottoResult.objects.create(draw_date=self.past_day, result_data=self.partial_payload('first'))
+
+        with patch.object(LottoService, 'fetch_from_api') as mock_fetch:
+            response = self.client.get(
+                reverse('lottery_checker:live_results_stream'), {'date': self.past_day.isoformat()}
+            )
+            chunks = list(response.streaming_content)
+
+        mock_fetch.assert_not_called()
+        self.assertEqual(len(chunks), 2)
+        self.assertIn(b'event: snapshot', chunks[1])
+        self.assertIn(b'"first": ["123456"]', chunks[1])
+        self.assertEqual(live_results._hubs, {})
+
+    def test_past_draw_is_not_polled(self, mock_run):
+        """Test only today's draw asks GLO for new numbers"""
+        service = FakeGLOService({})
+
+        LiveResultHub(self.past_day, service=service).poll()
+
+        self.assertEqual(service.calls, [])
+
+    def test_idle_hubs_are_evicted(self, mock_run):
+        """Test hubs without clients are dropped when another draw's hub is requested"""
+        idle = get_live_hub(self.past_day)
+        busy = get_live_hub(self.past_day - timedelta(days=15))
+        subscriber = busy.subscribe()
+
+        get_live_hub(self.day)
+
+        self.assertNotIn(idle.draw_date, live_results._hubs)
+        self.assertIs(live_results._hubs[busy.draw_date], busy)
+        busy.unsubscribe(subscriber)
+
+
+class ConditionalCacheTests(TestCase):
+    """Test ETag/Last-Modified revalidation of the result endpoints"""
+
+    def setUp(self):
+        cache.clear()
+        self.day = timezone.localdate() - timedelta(days=20)
+        self.result = LottoResult.objects.create(draw_date=self.day, result_data=glo_payload())
+
+    def tearDown(self):
+        cache.clear()
+
+    def date_url(self, day):
+        return reverse('lottery_checker:specific_date_api', args=[day.year, day.month, day.day])
+
+    def test_past_date_answers_not_modified(self):
+        """Test a stored past draw revalidates without rebuilding the body"""
+        first = self.client.get(self.date_url(self.day))
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('Last-Modified', first)
+        self.assertIn('public', first['Cache-Control'])
+
+        with self.assertNumQueries(0):
+            repeat = self.client.get(self.date_url(self.day), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(repeat['ETag'], first['ETag'])
+
+        since = self.client.get(self.date_url(self.day), HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(since.status_code, 304)
+
+    def test_saving_changes_the_etag(self):
+        """Test refreshed results are sent in full again"""
+        etag = self.client.get(self.date_url(self.day))['ETag']
+        self.result.result_data = glo_payload('654321')
+        self.result.save()
+
+        response = self.client.get(self.date_url(self.day), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_unstored_dates_are_not_cacheable(self):
+        """Test today and dates without a stored result carry no validators"""
+        with patch.object(LottoService, 'fetch_from_api', return_value=None):
+            response = self.client.get(self.date_url(timezone.localdate()))
+        self.assertNotIn('ETag', response)
+
+    @patch('lottery_checker.views.LottoService')
+    @patch('lottery_checker.views.candidate_draw_dates')
+    def test_latest_results_skip_validators_on_pending_draw_day(self, mock_dates, mock_service):
+        """Test the latest listing is only cached once recent draws are stored"""
+        mock_service.return_value.get_latest_results.return_value = {'success': True, 'results': []}
+        url = reverse('lottery_checker:latest_results_api')
+
+        mock_dates.return_value = [timezone.localdate()]
+        self.assertNotIn('ETag', self.client.get(url))
+
+        mock_dates.return_value = []
+        first = self.client.get(url)
+        repeat = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(mock_service.return_value.get_latest_results.call_count, 2)
+
+        LottoResult.objects.create(draw_date=self.day - timedelta(days=16), result_data=glo_payload())
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+
+
+class LottoResultStorageTests(TestCase):
+    """Test the single stored payload and hash-based write skipping"""
+
+    def setUp(self):
+        self.day = date(2024, 1, 16)
+        self.service = LottoService()
+
+    def test_payload_is_stored_once(self):
+        """Test the API response is kept only as result_data with its hash"""
+        payload = glo_full_payload()
+        self.service.save_to_database(payload, self.day)
+
+        result = LottoResult.objects.get(draw_date=self.day)
+
+        self.assertFalse(hasattr(result, 'raw_payload'))
+        self.assertEqual(result.result_data, payload)
+        self.assertEqual(result.payload_hash, payload_digest(payload))
+
+    def test_unchanged_payload_is_not_rewritten(self):
+        """Test refreshing with an identical payload skips the write"""
+        payload = glo_full_payload()
+        self.service.save_to_database(payload, self.day)
+        updated_at = LottoResult.objects.get(draw_date=self.day).updated_at
+
+        reordered = json.loads(json.dumps(payload, sort_keys=True))
+        with self.assertNumQueries(1):
+            self.assertTrue(self.service.save_to_database(reordered, self.day))
+        self.assertEqual(LottoResult.objects.get(draw_date=self.day).updated_at, updated_at)
+
+        self.service.save_to_database(glo_payload('654321'), self.day)
+        result = LottoResult.objects.get(draw_date=self.day)
+        self.assertEqual(result.result_data, glo_payload('654321'))
+        self.assertEqual(result.payload_hash, payload_digest(glo_payload('654321')))
+
+    def test_model_save_keeps_hash_in_sync(self):
+        """Test edits made outside the service update the payload hash"""
+        result = LottoResult.objects.create(draw_date=self.day, result_data=glo_payload())
+        result.result_data = glo_payload('111111')
+        result.save(update_fields=['result_data'])
+
+        result.refresh_from_db()
+        self.assertEqual(result.payload_hash, payload_digest(glo_payload('111111')))
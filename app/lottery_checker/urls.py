@@ -11,7 +11,11 @@ urlpatterns = [
     path('api/lotto/clear/', views.clear_data_api, name='clear_data_api'),
     path('api/lotto/statistics/', views.statistics_api, name='statistics_api'),
     path('api/lotto/check/', views.check_number, name='check_number'),
+    path('api/lotto/live/', views.live_results_stream, name='live_results_stream'),
+    path('api/lotto/history/<str:number>/', views.prize_history_api, name='prize_history_api'),
     path('api/check/', views.check_lottery_quick, name='check_lottery_quick'),
+    path('api/check/batch/', views.check_batch_api, name='check_batch_api'),
     path('api/lotto/refresh/', views.refresh_lotto_data_api, name='refresh_lotto_data_api'),
     path('api/lotto/bulk-fetch/', views.bulk_fetch_api, name='bulk_fetch_api'),
+    path('api/jobs/<int:job_id>/', views.job_progress_api, name='job_progress_api'),
 ]
@@ -1,19 +1,47 @@
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import cache
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
-from datetime import datetime, date, timedelta
+from datetime import date, datetime, timedelta
 import json
 import logging
+import math
+import queue
 import time
 
-from .models import LottoResult
-from .lotto_service import LottoService
+from .models import BackgroundJob, LottoResult
+from .lotto_service import LottoService, result_cache_key
+from .glo_fetcher import candidate_draw_dates, is_draw_date
+from .http_cache import CachePolicy, conditional_cache, get_results_version, make_etag
+from .jobs import enqueue_job
+from .live_results import stored_snapshot_event, subscribe_live
+from .prize_history import prize_history
+from .prize_index import PRIZE_NAMES, check_tickets, prize_indexes
 from utils.lottery_dates import LOTTERY_DATES
 
 logger = logging.getLogger(__name__)
 
+# จำนวนสลากและจำนวนงวดสูงสุดต่อการตรวจแบบชุดหนึ่งครั้ง
+MAX_BATCH_TICKETS = 10000
+MAX_BATCH_DRAWS = 48
+
+# ขีดจำกัดของการดึงข้อมูลย้อนหลังจาก GLO (ค่าที่ส่งมาเกินนี้จะถูกลดลงมา)
+BULK_FETCH_MAX_WORKERS = 8
+BULK_FETCH_MAX_RATE_PER_SECOND = 5.0
+
+# live stream: ส่ง comment ทุก 15 วินาทีกันการเชื่อมต่อถูกตัด และปิดหลัง 30 นาทีให้ client เชื่อมต่อใหม่
+# งวดที่ผ่านมาแล้วส่ง snapshot แล้วปิดทันที โดยให้ browser รอหนึ่งวันก่อนเชื่อมต่อใหม่
+LIVE_KEEPALIVE_SECONDS = 15
+LIVE_STREAM_MAX_SECONDS = 30 * 60
+LIVE_PAST_RETRY_MS = 24 * 60 * 60 * 1000
+
+# ผลของงวดที่ผ่านมาแล้วแทบไม่เปลี่ยน ให้ CDN เก็บได้นาน (ETag ใช้ตรวจซ้ำเมื่อหมดอายุ)
+PAST_RESULT_CACHE_CONTROL = {'public': True, 'max_age': 3600, 's_maxage': 86400}
+LATEST_RESULTS_CACHE_CONTROL = {'public': True, 'max_age': 60, 's_maxage': 300}
+
 def index(request):
     """หน้าแรกสำหรับตรวจสอบหวย"""
     # ดึงข้อมูลหวยล่าสุด 5 วัน
@@ -76,6 +104,22 @@ def lotto_result_api(request):
             'success': False
         }, status=500)
 
+def _latest_results_policy(request):
+    """
+    รายการล่าสุดเปลี่ยนเมื่อ LottoResult เปลี่ยนหรือข้ามวัน
+    งวดเมื่อวาน/วันนี้ที่ยังไม่มีผลครบต้องถาม GLO ทุกครั้ง จึงไม่แคช
+    """
+    today = timezone.localdate()
+    recent = candidate_draw_dates(today - timedelta(days=1), today)
+    if recent and LottoResult.objects.filter(draw_date__in=recent, is_valid=True).count() < len(recent):
+        return None
+    
+    version, modified = get_results_version()
+    return CachePolicy(
+        make_etag('latest', request.GET.get('days', 7), today, version), modified, LATEST_RESULTS_CACHE_CONTROL
+    )
+
+@conditional_cache(_latest_results_policy)
 def latest_results_api(request):
     """API endpoint สำหรับดึงข้อมูลหวยล่าสุด"""
     try:
@@ -92,6 +136,32 @@ def latest_results_api(request):
             'success': False
         }, status=500)
 
+def _specific_date_policy(request, year, month, day):
+    """ผลของงวดที่ผ่านมาแล้วและบันทึกไว้ถูกต้อง ใช้ updated_at เป็นตัวตรวจสอบ"""
+    try:
+        draw_date = date(year, month, day)
+    except ValueError:
+        return None
+    if draw_date >= timezone.localdate():
+        return None
+    
+    cached = cache.get(result_cache_key(draw_date))
+    if cached is not None:
+        updated_at = cached['updated_at']
+    else:
+        updated_at = (
+            LottoResult.objects.filter(draw_date=draw_date, is_valid=True)
+            .values_list('updated_at', flat=True)
+            .first()
+        )
+        if updated_at is None:
+            return None
+    
+    return CachePolicy(
+        make_etag('date', draw_date, updated_at.timestamp()), updated_at, PAST_RESULT_CACHE_CONTROL
+    )
+
+@conditional_cache(_specific_date_policy)
 def specific_date_api(request, year, month, day):
     """API endpoint สำหรับดึงข้อมูลหวยวันที่เฉพาะ"""
     try:
@@ -107,6 +177,32 @@ def specific_date_api(request, year, month, day):
             'success': False
         }, status=500)
 
+def prize_history_api(request, number):
+    """
+    API สำหรับดูว่าเลขนี้เคยถูกรางวัลงวดไหนบ้าง
+    รองรับเลข 6 หลัก (สลากทั้งใบ), 3 หลัก และ 2 หลัก (?limit= จำกัดจำนวนงวด)
+    """
+    try:
+        limit = request.GET.get('limit') or None
+        if limit is not None:
+            limit = int(limit)
+            if limit < 1:
+                raise ValueError('limit ต้องมากกว่า 0')
+            limit = min(limit, 500)
+        return JsonResponse({'success': True, **prize_history(number, limit=limit)})
+        
+    except ValueError as e:
+        return JsonResponse({
+            'error': str(e),
+            'success': False
+        }, status=400)
+    except Exception as e:
+        logger.error(f"Error in prize_history_api: {e}")
+        return JsonResponse({
+            'error': 'Internal server error',
+            'success': False
+        }, status=500)
+
 def clear_data_api(request):
     """API endpoint สำหรับล้างข้อมูลทั้งหมด"""
     try:
@@ -162,46 +258,39 @@ def check_number(request):
                     'success': False
                 }, status=400)
             
-            # ใช้ LottoService ดึงข้อมูล
-            service = LottoService()
-            result = service.get_or_fetch_result(check_date, check_month, check_year)
+            check_date, check_month, check_year = int(check_date), int(check_month), int(check_year)
+            draw_date = date(check_year, check_month, check_date)
+            check_number = str(check_number).strip()
             
-            if not result['success']:
-                return JsonResponse(result)
-            
-            # ตรวจสอบเลข
-            lotto_data = result['data']
-            all_numbers = []
-            
-            # ดึงเลขรางวัลทั้งหมด
-            if isinstance(lotto_data, dict):
-                for prize_type, numbers in lotto_data.items():
-                    if isinstance(numbers, list):
-                        all_numbers.extend(numbers)
-                    elif isinstance(numbers, str):
-                        all_numbers.append(numbers)
-            
-            # ตรวจสอบว่าเลขที่ตรวจสอบอยู่ในรายการหรือไม่
-            is_winner = str(check_number) in all_numbers
+            # ใช้ตารางค้นหารางวัลที่คอมไพล์ไว้ ดึงจาก API เฉพาะงวดที่ยังไม่มีในฐานข้อมูล
+            source = 'database'
+            index = prize_indexes.get(draw_date)
+            if index is None:
+                service = LottoService()
+                result = service.get_or_fetch_result(check_date, check_month, check_year)
+                
+                if not result['success']:
+                    return JsonResponse(result)
+                
+                source = result['source']
+                index = prize_indexes.get(draw_date)
+                if index is None:
+                    return JsonResponse({
+                        'error': 'ไม่พบข้อมูลผลรางวัลของงวดนี้',
+                        'success': False
+                    })
             
-            # หาประเภทรางวัล
-            prize_type = None
-            if is_winner:
-                for prize_type_name, numbers in lotto_data.items():
-                    if isinstance(numbers, list) and str(check_number) in numbers:
-                        prize_type = prize_type_name
-                        break
-                    elif isinstance(numbers, str) and str(check_number) == numbers:
-                        prize_type = prize_type_name
-                        break
+            prizes_won = index.check(check_number)
             
             return JsonResponse({
                 'success': True,
-                'is_winner': is_winner,
-                'prize_type': prize_type,
+                'is_winner': bool(prizes_won),
+                'prize_type': prizes_won[0] if prizes_won else None,
+                'prizes_won': prizes_won,
+                'prize_amount': index.amount_of(prizes_won),
                 'check_number': check_number,
                 'draw_date': f"{check_date:02d}/{check_month:02d}/{check_year}",
-                'source': result['source']
+                'source': source
             })
             
         except json.JSONDecodeError:
@@ -209,6 +298,11 @@ def check_number(request):
                 'error': 'Invalid JSON',
                 'success': False
             }, status=400)
+        except (TypeError, ValueError):
+            return JsonResponse({
+                'error': 'วันที่ไม่ถูกต้อง',
+                'success': False
+            }, status=400)
         except Exception as e:
             logger.error(f"Error in check_number: {e}")
             return JsonResponse({
@@ -293,72 +387,25 @@ def check_lottery_quick(request):
                 'error': 'กรุณากรอกเลข 6 หลัก'
             })
         
-        # ดึงผลหวยงวดล่าสุด
-        latest_result = LottoResult.objects.filter(is_valid=True).order_by('-draw_date').first()
+        # ตารางค้นหารางวัลของงวดล่าสุด (คอมไพล์ไว้ในหน่วยความจำแล้ว)
+        index = prize_indexes.latest()
         
-        if not latest_result:
+        if not index:
             return JsonResponse({
                 'success': False,
                 'error': 'ไม่พบข้อมูลผลหวยล่าสุด'
             })
         
-        # ตรวจสอบเลข
-        result_data = latest_result.result_data
-        if not isinstance(result_data, dict):
-            return JsonResponse({
-                'success': False,
-                'error': 'ข้อมูลผลหวยไม่ถูกต้อง'
-            })
-        
-        # เก็บผลการตรวจสอบ
-        prizes_won = []
-        is_winner = False
-        
-        # ตรวจสอบรางวัลต่างๆ
-        for prize_type, numbers in result_data.items():
-            if isinstance(numbers, list):
-                for number in numbers:
-                    if str(number) == lottery_number:
-                        prizes_won.append(prize_type)
-                        is_winner = True
-            elif isinstance(numbers, str):
-                if numbers == lottery_number:
-                    prizes_won.append(prize_type)
-                    is_winner = True
-        
-        # ตรวจสอบเลข 2 ตัวท้าย และ 3 ตัวท้าย
-        last_2_digits = lottery_number[-2:]
-        last_3_digits = lottery_number[-3:]
-        
-        # ตรวจสอบกับรางวัลที่ 1 สำหรับเลข 2 ตัวและ 3 ตัวท้าย
-        if 'first' in result_data and isinstance(result_data['first'], list):
-            for first_prize in result_data['first']:
-                if str(first_prize)[-2:] == last_2_digits:
-                    prizes_won.append('เลข 2 ตัวท้าย')
-                    is_winner = True
-                if str(first_prize)[-3:] == last_3_digits:
-                    prizes_won.append('เลข 3 ตัวท้าย')
-                    is_winner = True
+        prizes_won = index.check(lottery_number)
+        is_winner = bool(prizes_won)
+        formatted_date = index.draw_date.strftime('%d/%m/%Y')
         
         # สร้างข้อความผลลัพธ์
         if is_winner:
-            prize_names = {
-                'first': 'รางวัลที่ 1',
-                'second': 'รางวัลที่ 2', 
-                'third': 'รางวัลที่ 3',
-                'fourth': 'รางวัลที่ 4',
-                'fifth': 'รางวัลที่ 5',
-                'เลข 2 ตัวท้าย': 'เลข 2 ตัวท้าย',
-                'เลข 3 ตัวท้าย': 'เลข 3 ตัวท้าย'
-            }
-            
-            won_prizes = []
-            for prize in prizes_won:
-                won_prizes.append(prize_names.get(prize, prize))
-            
+            won_prizes = [PRIZE_NAMES[prize] for prize in prizes_won]
             message = f"🎉 ยินดีด้วย! เลข {lottery_number} ถูกรางวัล: {', '.join(won_prizes)}"
         else:
-            message = f"เลข {lottery_number} ไม่ถูกรางวัล งวดวันที่ {latest_result.formatted_date}"
+            message = f"เลข {lottery_number} ไม่ถูกรางวัล งวดวันที่ {formatted_date}"
         
         return JsonResponse({
             'success': True,
@@ -366,8 +413,9 @@ def check_lottery_quick(request):
                 'is_winner': is_winner,
                 'message': message,
                 'lottery_number': lottery_number,
-                'draw_date': latest_result.formatted_date,
-                'prizes_won': prizes_won
+                'draw_date': formatted_date,
+                'prizes_won': prizes_won,
+                'prize_amount': index.amount_of(prizes_won)
             }
         })
         
@@ -385,90 +433,146 @@ def check_lottery_quick(request):
 
 @csrf_exempt
 @require_http_methods(["POST"])
-def bulk_fetch_api(request):
-    """API สำหรับดึงข้อมูลจาก GLO API ตั้งแต่ 1 มกราคม 2567 (2024)"""
+def check_batch_api(request):
+    """
+    API สำหรับตรวจสลากหลายใบกับหลายงวดในครั้งเดียว
+    body: {"numbers": ["123456", ...], "draw_dates": ["2024-03-16", ...]} (ไม่ระบุ draw_dates = งวดล่าสุด)
+    """
     try:
+        started = time.perf_counter()
         data = json.loads(request.body)
-        start_date_str = data.get('start_date', '2024-01-01')
-        end_date_str = data.get('end_date', None)
-        force_update = data.get('force_update', False)
-        delay_seconds = data.get('delay_seconds', 1)  # หน่วงเวลาระหว่างการเรียก API
+        numbers = data.get('numbers') or []
+        draw_date_strs = data.get('draw_dates') or []
         
-        # แปลงวันที่
-        start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+        if not isinstance(numbers, list) or not numbers:
+            return JsonResponse({
+                'success': False,
+                'error': 'กรุณาระบุรายการเลขสลาก (numbers)'
+            }, status=400)
         
-        if end_date_str:
-            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
+        if len(numbers) > MAX_BATCH_TICKETS or len(draw_date_strs) > MAX_BATCH_DRAWS:
+            return JsonResponse({
+                'success': False,
+                'error': f'ตรวจได้ครั้งละไม่เกิน {MAX_BATCH_TICKETS} ใบ และ {MAX_BATCH_DRAWS} งวด'
+            }, status=400)
+        
+        valid_numbers = []
+        invalid_numbers = []
+        for number in numbers:
+            number = str(number).strip()
+            if len(number) == 6 and number.isdigit():
+                valid_numbers.append(number)
+            else:
+                invalid_numbers.append(number)
+        
+        if draw_date_strs:
+            draw_dates = sorted({datetime.strptime(value, '%Y-%m-%d').date() for value in draw_date_strs})
+            indexes = {
+                draw_date: index for draw_date, index in prize_indexes.get_many(draw_dates).items() if index
+            }
         else:
-            end_date = date.today()
+            latest = prize_indexes.latest()
+            draw_dates = [latest.draw_date] if latest else []
+            indexes = {latest.draw_date: latest} if latest else {}
         
-        service = LottoService()
-        valid_dates = []
-        fetched_count = 0
-        error_count = 0
-        results = []
+        if not indexes:
+            return JsonResponse({
+                'success': False,
+                'error': 'ไม่พบข้อมูลผลรางวัลของงวดที่ระบุ'
+            })
         
-        current_date = start_date
-        
-        while current_date <= end_date:
-            try:
-                # ตรวจสอบว่ามีข้อมูลอยู่แล้วหรือไม่
-                existing = LottoResult.objects.filter(draw_date=current_date).exists()
-                
-                if not existing or force_update:
-                    logger.info(f"Fetching data for {current_date}")
-                    
-                    # เรียก API ดึงข้อมูล
-                    result = service.get_or_fetch_result(
-                        current_date.day, 
-                        current_date.month, 
-                        current_date.year
-                    )
-                    
-                    # ตรวจสอบว่าได้ข้อมูลรางวัลจริงหรือไม่
-                    if result.get('success') and result.get('data'):
-                        result_data = result['data']
-                        has_lottery_data = _has_valid_lottery_data(result_data)
-                        
-                        if has_lottery_data:
-                            valid_dates.append(current_date.strftime('%Y-%m-%d'))
-                            fetched_count += 1
-                            results.append(f"✅ {current_date}: พบข้อมูลรางวัล")
-                        else:
-                            results.append(f"⚠️ {current_date}: ไม่มีข้อมูลรางวัล")
-                    else:
-                        error_count += 1
-                        results.append(f"❌ {current_date}: {result.get('error', 'ไม่สามารถดึงข้อมูลได้')}")
-                    
-                    # หน่วงเวลาเพื่อไม่ให้ request มากเกินไป
-                    if delay_seconds > 0:
-                        time.sleep(delay_seconds)
-                else:
-                    results.append(f"⏭️ {current_date}: มีข้อมูลอยู่แล้ว")
-                
-            except Exception as e:
-                error_count += 1
-                results.append(f"❌ {current_date}: เกิดข้อผิดพลาด - {str(e)}")
-                logger.error(f"Error fetching {current_date}: {e}")
-            
-            # เลื่อนไปวันถัดไป
-            current_date += timedelta(days=1)
+        wins = check_tickets(valid_numbers, indexes) if valid_numbers else []
         
         return JsonResponse({
             'success': True,
-            'message': f'ดึงข้อมูลเสร็จสิ้น: {fetched_count} สำเร็จ, {error_count} ไม่สำเร็จ',
-            'fetched_count': fetched_count,
-            'error_count': error_count,
-            'valid_dates': valid_dates,
-            'total_days': (end_date - start_date).days + 1,
-            'results': results[:50]  # จำกัดผลลัพธ์เพื่อไม่ให้ response ใหญ่เกินไป
+            'checked': len(valid_numbers),
+            'draw_dates': [draw_date.isoformat() for draw_date in sorted(indexes, reverse=True)],
+            'missing_dates': [draw_date.isoformat() for draw_date in draw_dates if draw_date not in indexes],
+            'invalid_numbers': invalid_numbers,
+            'win_count': len(wins),
+            'total_amount': sum(win['prize_amount'] for win in wins),
+            'wins': wins,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
         })
         
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'success': False,
+            'error': 'Invalid JSON'
+        }, status=400)
+    except (TypeError, ValueError):
+        return JsonResponse({
+            'success': False,
+            'error': 'รูปแบบวันที่ไม่ถูกต้อง (YYYY-MM-DD)'
+        }, status=400)
+    except Exception as e:
+        logger.error(f"Error in check_batch_api: {e}")
+        return JsonResponse({
+            'success': False,
+            'error': 'เกิดข้อผิดพลาดในระบบ'
+        }, status=500)
+
+@require_http_methods(["POST"])
+@staff_member_required
+def bulk_fetch_api(request):
+    """
+    API สำหรับดึงข้อมูลจาก GLO API ตั้งแต่ 1 มกราคม 2567 (2024) เฉพาะวันที่หวยออก (เฉพาะ staff)
+    สร้างงานในคิวแล้วตอบกลับทันที (worker: python manage.py run_jobs) ดูความคืบหน้าที่ progress_url
+    max_workers และ rate_per_second ถูกจำกัดไม่ให้เกิน BULK_FETCH_MAX_WORKERS/BULK_FETCH_MAX_RATE_PER_SECOND
+    """
+    try:
+        data = json.loads(request.body)
+        start_date_str = data.get('start_date', '2024-01-01')
+        end_date_str = data.get('end_date', None)
+        force_update = bool(data.get('force_update', False))
+        max_workers = int(data.get('max_workers', 4))
+        rate_per_second = float(data.get('rate_per_second', 2))
+        
+        # รองรับพารามิเตอร์เดิม: หน่วงเวลาระหว่างการเรียก API
+        delay_seconds = data.get('delay_seconds')
+        if delay_seconds and 'rate_per_second' not in data:
+            if float(delay_seconds) <= 0:
+                raise ValueError('delay_seconds ต้องมากกว่า 0')
+            rate_per_second = 1 / float(delay_seconds)
+        
+        # rate 0 หรือติดลบจะปิด TokenBucket จึงไม่รับ
+        if not math.isfinite(rate_per_second) or rate_per_second <= 0:
+            raise ValueError('rate_per_second ต้องมากกว่า 0')
+        rate_per_second = min(rate_per_second, BULK_FETCH_MAX_RATE_PER_SECOND)
+        max_workers = min(max(1, max_workers), BULK_FETCH_MAX_WORKERS)
+        
+        # ตรวจสอบรูปแบบวันที่ก่อนเข้าคิว
+        datetime.strptime(start_date_str, '%Y-%m-%d')
+        if end_date_str:
+            datetime.strptime(end_date_str, '%Y-%m-%d')
+        
+        job = enqueue_job(
+            'glo_bulk_fetch',
+            start_date=start_date_str,
+            end_date=end_date_str,
+            force_update=force_update,
+            max_workers=max_workers,
+            rate_per_second=rate_per_second,
+        )
+        
+        return JsonResponse({
+            'success': True,
+            'message': 'เพิ่มงานเข้าคิวแล้ว',
+            'job_id': job.pk,
+            'status': job.status,
+            'progress_url': job.get_absolute_url(),
+        }, status=202)
+        
     except json.JSONDecodeError:
         return JsonResponse({
             'error': 'Invalid JSON',
             'success': False
         }, status=400)
+    except ValueError as e:
+        return JsonResponse({
+            'error': str(e),
+            'success': False
+        }, status=400)
     except Exception as e:
         logger.error(f"Error in bulk_fetch_api: {e}")
         return JsonResponse({
@@ -476,23 +580,72 @@ def bulk_fetch_api(request):
             'success': False
         }, status=500)
 
-def _has_valid_lottery_data(result_data):
-    """ตรวจสอบว่าข้อมูลมีรางวัลจริงหรือไม่"""
-    if not isinstance(result_data, dict):
-        return False
+def job_progress_api(request, job_id):
+    """API สำหรับดูความคืบหน้าของงานเบื้องหลัง (สถานะรายวันที่, อัตราการทำงาน และเวลาที่คาดว่าจะเสร็จ)"""
+    job = BackgroundJob.objects.filter(pk=job_id).first()
+    if job is None:
+        return JsonResponse({
+            'error': 'ไม่พบงานที่ระบุ',
+            'success': False
+        }, status=404)
+    
+    return JsonResponse({'success': True, **job.progress()})
+
+def live_results_stream(request):
+    """
+    Server-Sent Events ของผลรางวัลที่ทยอยประกาศ (?date=YYYY-MM-DD ค่าเริ่มต้นคืองวดล่าสุดถึงวันนี้)
+    event แรกคือ snapshot ของผลปัจจุบัน จากนั้นเป็น update ที่มีเฉพาะเลขที่เพิ่งประกาศใน changes
+    ติดตามสดได้เฉพาะงวดของวันนี้ งวดที่ผ่านมาแล้วส่ง snapshot ที่บันทึกไว้แล้วปิด stream
+    """
+    date_str = request.GET.get('date')
+    today = timezone.localdate()
+    try:
+        if date_str:
+            draw_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        else:
+            draw_date = candidate_draw_dates(today - timedelta(days=31), today)[-1]
+    except (ValueError, IndexError):
+        return JsonResponse({
+            'error': 'รูปแบบวันที่ไม่ถูกต้อง ใช้ YYYY-MM-DD',
+            'success': False
+        }, status=400)
     
-    # ตรวจสอบรูปแบบต่างๆ
-    if 'response' in result_data and result_data['response']:
-        response_data = result_data['response']
-        if isinstance(response_data, dict) and 'result' in response_data:
-            result = response_data['result']
-            if isinstance(result, dict) and 'data' in result and result['data']:
-                data = result['data']
-                if isinstance(data, dict) and 'first' in data and data['first']:
-                    first_data = data['first']
-                    if isinstance(first_data, dict) and 'number' in first_data:
-                        numbers = first_data['number']
-                        if isinstance(numbers, list) and len(numbers) > 0:
-                            return True
+    if draw_date > today:
+        return JsonResponse({
+            'error': 'ยังไม่ถึงวันออกรางวัล',
+            'success': False
+        }, status=400)
+    
+    if not is_draw_date(draw_date):
+        return JsonResponse({
+            'error': 'ไม่มีการออกรางวัลในวันที่นี้',
+            'success': False
+        }, status=400)
+    
+    if draw_date < today:
+        # ผลของงวดที่ผ่านมาแล้วไม่เปลี่ยน ไม่ต้องมี poller (retry นานเพื่อไม่ให้ browser เชื่อมต่อใหม่ถี่ๆ)
+        snapshot = stored_snapshot_event(draw_date)
+        response = StreamingHttpResponse(
+            iter([f"retry: {LIVE_PAST_RETRY_MS}\n\n", snapshot]), content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        return response
+    
+    hub, subscriber = subscribe_live(draw_date)
+    
+    def events():
+        deadline = time.monotonic() + LIVE_STREAM_MAX_SECONDS
+        try:
+            yield "retry: 5000\n\n"
+            while time.monotonic() < deadline:
+                try:
+                    yield subscriber.get(timeout=LIVE_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+        finally:
+            hub.unsubscribe(subscriber)
     
-    return False
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
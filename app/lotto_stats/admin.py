@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import LotteryDraw, NumberStatistics, HotColdNumber
+from .models import DrawNumber, LotteryDraw, NumberStatistics, HotColdNumber
 
 @admin.register(LotteryDraw)
 class LotteryDrawAdmin(admin.ModelAdmin):
@@ -17,6 +17,14 @@ class LotteryDrawAdmin(admin.ModelAdmin):
         }),
     )
 
+@admin.register(DrawNumber)
+class DrawNumberAdmin(admin.ModelAdmin):
+    list_display = ['number', 'draw_date', 'slot', 'position']
+    list_filter = ['digits', 'slot']
+    search_fields = ['number']
+    ordering = ['-draw_date']
+    raw_id_fields = ['draw']
+
 @admin.register(NumberStatistics)
 class NumberStatisticsAdmin(admin.ModelAdmin):
     list_display = ['number', 'number_type', 'total_appearances', 'last_appeared', 'days_since_last']
@@ -0,0 +1,121 @@
+"""
+Appearance Index - ดัชนีวันที่ออกของแต่ละเลข (2D/3D)
+สร้างครั้งเดียวจาก DrawMatrix แล้วใช้ค้นหาวันที่ออกล่าสุด/ระยะห่างได้ทันที
+"""
+
+from datetime import date
+
+import numpy as np
+
+from .draw_matrix import DrawMatrix
+
+
+class AppearanceIndex:
+    """map เลข -> array ของวันที่ออก (ordinal เรียงจากล่าสุดไปเก่าสุด งวดละครั้ง)"""
+
+    NUMBER_TYPES = {'2D': 2, '3D': 3}
+
+    def __init__(self, matrix):
+        self._index = {}
+        self.latest = int(matrix.ordinals[0]) if len(matrix) else None
+
+        for number_type, width in self.NUMBER_TYPES.items():
+            self._index[number_type] = self._build(matrix, number_type, width)
+
+    @staticmethod
+    def _build(matrix, number_type, width):
+        """สร้างดัชนีของประเภทเลขหนึ่งด้วยการเรียงครั้งเดียว"""
+        values = matrix.numbers(number_type)
+        if values.size == 0:
+            return {}
+
+        rows = np.repeat(np.arange(values.shape[0]), values.shape[1])
+        flat = values.ravel()
+        valid = flat >= 0
+        numbers, rows = flat[valid], rows[valid]
+
+        # เรียงตามเลขแล้วตามงวด และตัดงวดซ้ำ (เลขเดียวกันออกหลายช่องในงวดเดียว)
+        order = np.lexsort((rows, numbers))
+        numbers, rows = numbers[order], rows[order]
+        keep = np.ones(len(numbers), dtype=bool)
+        keep[1:] = (numbers[1:] != numbers[:-1]) | (rows[1:] != rows[:-1])
+        numbers, rows = numbers[keep], rows[keep]
+
+        unique_numbers, starts = np.unique(numbers, return_index=True)
+        ordinals = matrix.ordinals[rows]
+        return {
+            str(number).zfill(width): group
+            for number, group in zip(unique_numbers, np.split(ordinals, starts[1:]))
+        }
+
+    @classmethod
+    def number_type_of(cls, number):
+        """ประเภทของเลขจากความยาว (ไม่ใช่เลข 2/3 หลักคืน None)"""
+        if not number.isdigit():
+            return None
+        for number_type, width in cls.NUMBER_TYPES.items():
+            if len(number) == width:
+                return number_type
+        return None
+
+    def ordinals(self, number):
+        """วันที่ออกของเลข (ordinal) เรียงจากล่าสุด"""
+        number_type = self.number_type_of(number)
+        if number_type is None:
+            return np.empty(0, dtype=np.int64)
+        return self._index[number_type].get(number, np.empty(0, dtype=np.int64))
+
+    def appearance_dates(self, number):
+        """วันที่ออกของเลขเป็น date เรียงจากล่าสุด"""
+        return [date.fromordinal(int(o)) for o in self.ordinals(number)]
+
+    def last_appeared(self, number):
+        """วันที่ออกล่าสุดของเลข (ไม่เคยออกคืน None)"""
+        ordinals = self.ordinals(number)
+        return date.fromordinal(int(ordinals[0])) if len(ordinals) else None
+
+    def items(self, number_type='2D'):
+        """(เลข, ordinals) ของทุกเลขที่เคยออกในประเภทที่กำหนด"""
+        return self._index[number_type].items()
+
+    def last_appearances(self, number_type='2D'):
+        """วันที่ออกล่าสุดของทุกเลขที่เคยออก"""
+        return {
+            number: date.fromordinal(int(ordinals[0]))
+            for number, ordinals in self.items(number_type)
+        }
+
+
+def draw_numbers(matrix, number_type, row=0):
+    """เลขที่ไม่ซ้ำกันของงวดหนึ่งในรูปแบบสตริง"""
+    values = matrix.numbers(number_type)[row]
+    width = AppearanceIndex.NUMBER_TYPES[number_type]
+    return [str(value).zfill(width) for value in np.unique(values[values >= 0])]
+
+
+_shared_index = None
+# เวอร์ชันของประวัติการออกรางวัล (stats_cache.get_draw_version) ที่ใช้สร้าง _shared_index
+_shared_version = None
+
+
+def get_appearance_index():
+    """
+    ดัชนีที่ใช้ร่วมกันทั้ง process
+    สร้างใหม่เมื่อเวอร์ชันของประวัติการออกรางวัลเปลี่ยน จึงเห็นงวดที่ process อื่นบันทึกด้วย
+    """
+    global _shared_index, _shared_version
+    from .stats_cache import get_draw_version
+
+    version = get_draw_version()
+    if _shared_index is None or _shared_version != version:
+        from .models import LotteryDraw
+        _shared_index = AppearanceIndex(DrawMatrix.from_queryset(LotteryDraw.objects.all()))
+        _shared_version = version
+    return _shared_index
+
+
+def reset_appearance_index():
+    """ล้างดัชนีที่ใช้ร่วมกัน"""
+    global _shared_index, _shared_version
+    _shared_index = None
+    _shared_version = None
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class LottoStatsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'lotto_stats'
+
+    def ready(self):
+        # ส่งต่อผลรางวัลจาก lottery_checker มายัง lotto_stats อัตโนมัติ
+        from . import signals  # noqa: F401
+        # ลงทะเบียนงานเบื้องหลังให้ worker ของ lottery_checker รู้จัก
+        from . import jobs  # noqa: F401
@@ -0,0 +1,133 @@
+"""
+Count Matrix - ตารางผลรวมสะสมของจำนวนครั้งที่ออก (งวด x เลข) สำหรับ 2D/3D
+ความถี่ในช่วงวันที่ใดๆ = ผลต่างของสองแถว จึงไม่ต้องนับใหม่ทุกครั้งที่เปลี่ยนช่วงเวลา
+"""
+
+import numpy as np
+
+from .draw_matrix import DrawMatrix
+
+
+class CountMatrix:
+    """
+    ผลรวมสะสมเรียงตามเวลา (เก่าสุดไปล่าสุด): แถว k = จำนวนครั้งที่ออกใน k งวดแรก
+    นับทุกช่องเหมือน StatsCalculator.get_hot_numbers (เลขซ้ำหลายช่องในงวดเดียวนับหลายครั้ง)
+    """
+
+    SIZES = {'2D': 100, '3D': 1000}
+
+    def __init__(self, matrix):
+        size = len(matrix)
+        self._length = size
+        # เรียงจากเก่าไปใหม่
+        self._ordinals = np.ascontiguousarray(matrix.ordinals[::-1], dtype=np.int64)
+        self._cumulative = {}
+        # ตำแหน่งที่พบล่าสุดของแต่ละเลข (ลำดับงวดตามเวลา, ช่อง) ใช้เรียงเลขที่จำนวนเท่ากัน
+        self._latest_row = {}
+        self._latest_slot = {}
+
+        for number_type, width in self.SIZES.items():
+            values = matrix.numbers(number_type)[::-1]
+            counts = np.zeros((size + 1, width), dtype=np.int32)
+            latest_row = np.full(width, -1, dtype=np.int64)
+            latest_slot = np.zeros(width, dtype=np.int64)
+
+            if values.size:
+                rows, slots = np.nonzero(values >= 0)
+                numbers = values[rows, slots]
+                np.add.at(counts, (rows + 1, numbers), 1)
+                # งวดล่าสุดที่พบ และช่องแรกในงวดนั้น (เรียงงวดจากใหม่ แล้วช่องจากน้อย)
+                order = np.lexsort((slots, -rows))
+                unique_numbers, first = np.unique(numbers[order], return_index=True)
+                latest_row[unique_numbers] = rows[order][first]
+                latest_slot[unique_numbers] = slots[order][first]
+
+            self._cumulative[number_type] = np.cumsum(counts, axis=0, out=counts)
+            self._latest_row[number_type] = latest_row
+            self._latest_slot[number_type] = latest_slot
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def ordinals(self):
+        """วันที่ (ordinal) ของทุกงวด เรียงจากเก่าไปใหม่"""
+        return self._ordinals
+
+    @property
+    def latest(self):
+        return int(self._ordinals[-1]) if self._length else None
+
+    def cumulative(self, number_type):
+        return self._cumulative[number_type]
+
+    def _row(self, day, side='left'):
+        """จำนวนงวดที่อยู่ก่อนวันที่ day (side='right' รวมวันนั้นด้วย)"""
+        return int(np.searchsorted(self.ordinals, day.toordinal(), side=side))
+
+    def window_counts(self, number_type, start=None, end=None):
+        """จำนวนครั้งที่ออกของทุกเลขในช่วง [start, end] (None = ไม่จำกัด)"""
+        cumulative = self.cumulative(number_type)
+        first = self._row(start) if start else 0
+        last = self._row(end, side='right') if end else self._length
+        return cumulative[max(last, first)] - cumulative[first]
+
+    def rank_since(self, number_type, start, limit=None):
+        """
+        เลขที่ออกบ่อยตั้งแต่วันที่ start ถึงงวดล่าสุด เรียงแบบเดียวกับ DrawMatrix.rank
+        (จำนวนเท่ากันให้เลขที่พบในงวดใหม่กว่า แล้วช่องที่มาก่อน มาก่อน)
+        คืนค่า (list ของ (เลข, จำนวนครั้ง), จำนวนงวดในช่วง)
+        """
+        first = self._row(start)
+        window = self._length - first
+        counts = self.window_counts(number_type, start)
+        present = np.flatnonzero(counts)
+        order = np.lexsort((
+            self._latest_slot[number_type][present],
+            -self._latest_row[number_type][present],
+            -counts[present]
+        ))
+        if limit is not None:
+            order = order[:limit]
+        return [(int(present[i]), int(counts[present[i]])) for i in order], window
+
+    def series(self, number_type, numbers, days, points=None):
+        """
+        ความถี่ย้อนหลัง days วัน ณ แต่ละงวดของเลขที่ระบุ (สำหรับกราฟ)
+        คืนค่า (ordinals ของงวด, array ขนาด len(numbers) x จำนวนงวด)
+        """
+        ordinals = self.ordinals
+        if points is not None:
+            ordinals = ordinals[max(self._length - points, 0):]
+        ends = np.searchsorted(self.ordinals, ordinals, side='right')
+        starts = np.searchsorted(self.ordinals, ordinals - days, side='left')
+        cumulative = self.cumulative(number_type)[:, numbers]
+        return ordinals, (cumulative[ends] - cumulative[starts]).T
+
+
+_shared_counts = None
+# เวอร์ชันของประวัติการออกรางวัล (stats_cache.get_draw_version) ที่ใช้สร้าง _shared_counts
+_shared_version = None
+
+
+def get_count_matrix():
+    """
+    ตารางผลรวมสะสมที่ใช้ร่วมกันทั้ง process
+    สร้างใหม่เมื่อเวอร์ชันของประวัติการออกรางวัลเปลี่ยน จึงเห็นงวดที่ process อื่นบันทึกด้วย
+    """
+    global _shared_counts, _shared_version
+    from .stats_cache import get_draw_version
+
+    version = get_draw_version()
+    if _shared_counts is None or _shared_version != version:
+        from .models import LotteryDraw
+        _shared_counts = CountMatrix(DrawMatrix.from_queryset(LotteryDraw.objects.all()))
+        _shared_version = version
+    return _shared_counts
+
+
+def reset_count_matrix():
+    """ล้างตารางที่ใช้ร่วมกัน"""
+    global _shared_counts, _shared_version
+    _shared_counts = None
+    _shared_version = None
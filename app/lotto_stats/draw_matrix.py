@@ -0,0 +1,150 @@
+"""
+Draw Matrix - เครื่องคำนวณสถิติหวยแบบ vectorized
+โหลดประวัติ LotteryDraw ครั้งเดียวเป็น NumPy array แล้วคำนวณทุกสถิติด้วย bincount/masking
+"""
+
+import numpy as np
+
+# ลำดับช่องของเลข 2 ตัวในแต่ละงวด (ตรงกับลำดับที่ StatsCalculator เดิมวนนับ)
+# ช่อง 0 = เลขท้าย 2 ตัว, ช่อง 1-5 = เลข 2 ตัวจากรางวัลที่ 1 ตำแหน่ง 1-2 ถึง 5-6
+PAIR_SLOTS = 6
+EMPTY = -1
+
+
+def _parse_digits(value, length):
+    """แปลงสตริงตัวเลขความยาวที่กำหนดเป็นรายการเลขหลักเดียว (ไม่ถูกต้องคืน None)"""
+    value = (value or '').strip()
+    if len(value) != length or not value.isdigit():
+        return None
+    return [int(ch) for ch in value]
+
+
+def _parse_three_digits(value):
+    """แยกเลข 3 ตัวที่คั่นด้วยจุลภาค (เก็บเฉพาะเลข 3 หลัก)"""
+    numbers = []
+    for token in (value or '').split(','):
+        token = token.strip()
+        if len(token) == 3 and token.isdigit():
+            numbers.append(int(token))
+    return numbers
+
+
+class DrawMatrix:
+    """ประวัติผลรางวัลในรูปแบบ array เรียงจากงวดล่าสุดไปเก่าสุด"""
+
+    FIELDS = ('draw_date', 'first_prize', 'two_digit', 'three_digit_front', 'three_digit_back')
+
+    def __init__(self, rows):
+        """
+        rows: ลำดับของ (draw_date, first_prize, two_digit, three_digit_front, three_digit_back)
+        เรียงจากงวดล่าสุดไปเก่าสุด
+        """
+        rows = list(rows)
+        size = len(rows)
+        # เก็บข้อมูลดิบไว้สำหรับแสดงผลงวดล่าสุดโดยไม่ต้อง query ซ้ำ
+        self.rows = rows
+
+        self.dates = [row[0] for row in rows]
+        self.ordinals = np.array([d.toordinal() for d in self.dates], dtype=np.int64)
+        self.months = np.array([d.month for d in self.dates], dtype=np.int8)
+
+        # รางวัลที่ 1 แยกเป็นหลัก (N x 6)
+        self.first_prize_digits = np.full((size, 6), EMPTY, dtype=np.int8)
+        # เลขท้าย 2 ตัวแยกเป็นหลัก (N x 2)
+        self.two_digit_digits = np.full((size, 2), EMPTY, dtype=np.int8)
+
+        front_lists = []
+        back_lists = []
+
+        for i, (_, first_prize, two_digit, front, back) in enumerate(rows):
+            digits = _parse_digits(first_prize, 6)
+            if digits:
+                self.first_prize_digits[i] = digits
+            digits = _parse_digits(two_digit, 2)
+            if digits:
+                self.two_digit_digits[i] = digits
+            front_lists.append(_parse_three_digits(front))
+            back_lists.append(_parse_three_digits(back))
+
+        self.three_front = self._pad(front_lists)
+        self.three_back = self._pad(back_lists)
+        # เลข 3 ตัวทั้งหมด เรียงแบบ get_all_three_digits (หน้าก่อนแล้วตามด้วยท้าย)
+        self.three_digits = self._pad([f + b for f, b in zip(front_lists, back_lists)])
+
+        # เลข 2 ตัวทุกช่อง (N x 6) ตามลำดับ PAIR_SLOTS
+        self.pairs = np.full((size, PAIR_SLOTS), EMPTY, dtype=np.int16)
+        tail = self.two_digit_digits.astype(np.int16)
+        self.pairs[:, 0] = np.where(tail[:, 0] >= 0, tail[:, 0] * 10 + tail[:, 1], EMPTY)
+        prize = self.first_prize_digits.astype(np.int16)
+        valid_prize = prize[:, 0] >= 0
+        for i in range(5):
+            self.pairs[:, i + 1] = np.where(valid_prize, prize[:, i] * 10 + prize[:, i + 1], EMPTY)
+
+    @classmethod
+    def from_queryset(cls, queryset):
+        """โหลดจาก QuerySet ของ LotteryDraw ด้วย query เดียว"""
+        return cls(queryset.order_by('-draw_date').values_list(*cls.FIELDS))
+
+    @classmethod
+    def from_draw(cls, draw):
+        """สร้าง matrix หนึ่งแถวจาก LotteryDraw หนึ่งงวด"""
+        return cls([tuple(getattr(draw, field) for field in cls.FIELDS)])
+
+    @staticmethod
+    def _pad(lists):
+        width = max((len(item) for item in lists), default=0)
+        matrix = np.full((len(lists), width), EMPTY, dtype=np.int16)
+        for i, item in enumerate(lists):
+            matrix[i, :len(item)] = item
+        return matrix
+
+    def __len__(self):
+        return len(self.dates)
+
+    def rows_since(self, cutoff_date):
+        """จำนวนงวดตั้งแต่ cutoff_date (งวดเรียงจากล่าสุด จึงเป็นช่วงต้นของ array)"""
+        return int(np.count_nonzero(self.ordinals >= cutoff_date.toordinal()))
+
+    def numbers(self, number_type, rows=None):
+        """เลขทุกช่องของงวดที่เลือก ตามประเภท 2D/3D"""
+        matrix = self.pairs if number_type == '2D' else self.three_digits
+        return matrix if rows is None else matrix[rows]
+
+    @staticmethod
+    def rank(values, size, limit=None):
+        """
+        นับความถี่และเรียงแบบเดียวกับ Counter.most_common
+        (จำนวนเท่ากันให้เลขที่พบก่อนตามลำดับการวนงวดมาก่อน)
+        คืนค่า list ของ (เลข, จำนวนครั้ง)
+        """
+        flat = values.ravel()
+        flat = flat[flat >= 0]
+        if flat.size == 0:
+            return []
+        counts = np.bincount(flat, minlength=size)
+        present, first_seen = np.unique(flat, return_index=True)
+        order = np.lexsort((first_seen, -counts[present]))
+        if limit is not None:
+            order = order[:limit]
+        return [(int(present[i]), int(counts[present[i]])) for i in order]
+
+    def hits(self, matrix, targets):
+        """ตำแหน่ง (งวด, ช่อง) ที่พบเลขใน targets เรียงตามลำดับการวนงวด"""
+        if matrix.size == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        return np.nonzero(np.isin(matrix, targets))
+
+    def digit_presence(self):
+        """
+        นับเลขวิ่ง 0-9 จากเลขท้าย 2 ตัวและรางวัลที่ 1
+        คืนค่า (จำนวนในเลขท้าย 2 ตัว, จำนวนในรางวัลที่ 1, งวดแรกที่พบ หรือ -1)
+        """
+        tail = self.two_digit_digits
+        prize = self.first_prize_digits
+        tail_counts = np.bincount(tail[tail >= 0], minlength=10)
+        prize_counts = np.bincount(prize[prize >= 0], minlength=10)
+
+        all_digits = np.concatenate([tail, prize], axis=1)
+        presence = (all_digits[:, :, None] == np.arange(10)).any(axis=1)
+        first_row = np.where(presence.any(axis=0), presence.argmax(axis=0), EMPTY)
+        return tail_counts, prize_counts, first_row
@@ -0,0 +1,113 @@
+"""
+Draw Numbers - ดูแลตาราง DrawNumber (เลขที่ออกในงวด แยกแถวต่อช่องรางวัล)
+แยกเลขด้วย DrawMatrix เพื่อให้ตรงกับสถิติที่คำนวณจาก array
+"""
+
+import logging
+
+from django.db import transaction
+
+from .draw_matrix import DrawMatrix
+from .models import DrawNumber, LotteryDraw
+
+logger = logging.getLogger(__name__)
+
+# ลำดับความสำคัญของช่องรางวัล (ใช้เลือกประเภทเมื่อเลขออกหลายช่องในงวดเดียว)
+SLOT_PRIORITY = {slot: i for i, (slot, _) in enumerate(DrawNumber.SLOT_CHOICES)}
+
+
+def build_draw_numbers(draw):
+    """แยกเลขของงวดเป็นแถว DrawNumber (ยังไม่บันทึก)"""
+    matrix = DrawMatrix.from_draw(draw)
+    entries = []
+
+    # ช่อง 0 ของ pairs = เลขท้าย 2 ตัว, ช่อง 1-5 = เลข 2 ตัวในรางวัลที่ 1
+    for i, value in enumerate(matrix.pairs[0]):
+        if value >= 0:
+            slot, position = ('two_digit', 0) if i == 0 else ('first_prize', i - 1)
+            entries.append((str(value).zfill(2), 2, slot, position))
+
+    for slot, values in (('three_digit_front', matrix.three_front), ('three_digit_back', matrix.three_back)):
+        row = values[0] if len(values) else []
+        for position, value in enumerate(row):
+            if value >= 0:
+                entries.append((str(value).zfill(3), 3, slot, position))
+
+    return [
+        DrawNumber(
+            draw=draw, draw_date=draw.draw_date, number=number,
+            digits=digits, slot=slot, position=position
+        )
+        for number, digits, slot, position in entries
+    ]
+
+
+def sync_draw_numbers(draw):
+    """เขียนแถว DrawNumber ของงวดใหม่ทั้งหมด (เรียกภายใน transaction ของการบันทึกงวด)"""
+    with transaction.atomic():
+        DrawNumber.objects.filter(draw=draw).delete()
+        DrawNumber.objects.bulk_create(build_draw_numbers(draw))
+
+
+def backfill_draw_numbers(batch_size=500, only_missing=False):
+    """
+    สร้างตาราง DrawNumber จากประวัติ LotteryDraw ทั้งหมด
+    only_missing: สร้างเฉพาะงวดที่ยังไม่มีแถวในตาราง
+    คืนค่า (จำนวนงวด, จำนวนแถว)
+    """
+    draws = LotteryDraw.objects.order_by('draw_date')
+    if only_missing:
+        draws = draws.filter(numbers__isnull=True)
+
+    draw_count = 0
+    row_count = 0
+    batch = []
+
+    with transaction.atomic():
+        if not only_missing:
+            DrawNumber.objects.all().delete()
+
+        for draw in draws.iterator(chunk_size=batch_size):
+            batch.extend(build_draw_numbers(draw))
+            draw_count += 1
+            if len(batch) >= batch_size:
+                DrawNumber.objects.bulk_create(batch, batch_size=batch_size)
+                row_count += len(batch)
+                batch = []
+
+        DrawNumber.objects.bulk_create(batch, batch_size=batch_size)
+        row_count += len(batch)
+
+    logger.info(f"สร้างเลขที่ออกในงวด {row_count} แถว จาก {draw_count} งวด")
+    return draw_count, row_count
+
+
+def draws_containing(number, limit=None):
+    """
+    งวดที่มีเลขนี้ออก (ค้นหาด้วย index ของ number, draw_date)
+    คืนค่า list ของ (วันที่, รางวัลที่ 1, ช่องรางวัลที่สำคัญที่สุด) เรียงจากล่าสุด
+    """
+    rows = DrawNumber.objects.filter(number=number).order_by('-draw_date').values_list(
+        'draw_date', 'draw__first_prize', 'slot'
+    )
+
+    draws = {}
+    for draw_date, first_prize, slot in rows.iterator():
+        if draw_date not in draws:
+            if limit is not None and len(draws) >= limit:
+                break
+            draws[draw_date] = (first_prize, slot)
+        elif SLOT_PRIORITY[slot] < SLOT_PRIORITY[draws[draw_date][1]]:
+            draws[draw_date] = (first_prize, slot)
+
+    return [(draw_date, first_prize, slot) for draw_date, (first_prize, slot) in draws.items()]
+
+
+def appearance_dates(number):
+    """วันที่ที่เลขนี้ออก (งวดละครั้ง) เรียงจากล่าสุด สำหรับคำนวณระยะห่าง"""
+    return list(
+        DrawNumber.objects.filter(number=number)
+        .order_by('-draw_date')
+        .values_list('draw_date', flat=True)
+        .distinct()
+    )
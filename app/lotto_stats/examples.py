@@ -123,6 +123,10 @@ def example_api_usage():
         "days_back": 7,
         "force_update": false
     }
+    # -> {"job_id": 1, "progress_url": "/lottery_checker/api/jobs/1/"} (รันโดย python manage.py run_jobs)
+    
+    # ความคืบหน้าของงานซิงค์
+    GET /lottery_checker/api/jobs/1/
     
     # ซิงค์วันที่เฉพาะ
     POST /lotto_stats/api/sync/date/
@@ -0,0 +1,13 @@
+"""
+Jobs - งานเบื้องหลังของ lotto_stats ที่รันผ่านคิวของ lottery_checker.jobs
+"""
+
+from lottery_checker.jobs import register_job
+
+from .lotto_sync_service import LottoSyncService
+
+
+@register_job('lotto_stats.sync_recent')
+def sync_recent_job(progress, days_back=7, force_update=False):
+    """ซิงค์ข้อมูลล่าสุดจาก lottery_checker (งานของ api_sync_data)"""
+    return LottoSyncService().sync_recent_data(days_back, force_update, progress=progress)
@@ -1,9 +1,16 @@
 from django.utils import timezone
 from datetime import datetime, timedelta
 import logging
+import time
 from django.db import transaction
+from django.db.models import Count, Max, Min
 
-from .models import LotteryDraw
+from .models import DrawNumber, LotteryDraw
+from .appearance_index import reset_appearance_index
+from .count_matrix import reset_count_matrix
+from .draw_numbers import build_draw_numbers, sync_draw_numbers
+from .number_stats import NumberStatsUpdater
+from .stats_cache import invalidate_stats_cache
 from lottery_checker.models import LottoResult
 from utils.lottery_dates import LOTTERY_DATES
 
@@ -15,8 +22,12 @@ class LottoSyncService:
     def __init__(self):
         self.last_sync_time = None
     
-    def sync_recent_data(self, days_back=30, force_update=False):
-        """ซิงค์ข้อมูลล่าสุดตามจำนวนวันที่ระบุ"""
+    def sync_recent_data(self, days_back=30, force_update=False, bulk=True, progress=None):
+        """
+        ซิงค์ข้อมูลล่าสุดตามจำนวนวันที่ระบุ
+        bulk: อ่าน/เขียนทุกวันที่ในครั้งเดียว (False = ซิงค์ทีละวันที่)
+        progress: ตัวรับความคืบหน้ารายวันที่ (ดู sync_dates_bulk)
+        """
         try:
             # ใช้ LotteryDates แทนการคำนวณแบบเดิม
             recent_draw_dates = LOTTERY_DATES.get_recent_draw_dates(days_back)
@@ -27,6 +38,11 @@ class LottoSyncService:
                     'error': f'ไม่พบวันที่หวยออกใน {days_back} วันล่าสุด'
                 }
             
+            if bulk:
+                return self.sync_dates_bulk(recent_draw_dates, force_update, progress=progress)
+            
+            if progress is not None:
+                progress.start(len(recent_draw_dates))
             synced_count = 0
             error_count = 0
             results = []
@@ -49,7 +65,12 @@ class LottoSyncService:
                 except Exception as e:
                     error_count += 1
                     results.append(f"❌ {date_str}: เกิดข้อผิดพลาด - {str(e)}")
+                
+                if progress is not None:
+                    progress.item(date_str, results[-1], ok=results[-1].startswith('✅'))
             
+            if progress is not None:
+                progress.flush()
             return {
                 'success': True,
                 'message': f'ซิงค์ข้อมูลเสร็จสิ้น: {synced_count} สำเร็จ, {error_count} ไม่สำเร็จ',
@@ -66,11 +87,20 @@ class LottoSyncService:
                 'error': str(e)
             }
     
-    def sync_all_draw_dates(self, force_update=False):
-        """ซิงค์ข้อมูลทั้งหมดตามวันที่หวยออกที่กำหนด"""
+    def sync_all_draw_dates(self, force_update=False, bulk=True, progress=None):
+        """
+        ซิงค์ข้อมูลทั้งหมดตามวันที่หวยออกที่กำหนด
+        bulk: อ่าน/เขียนทุกวันที่ในครั้งเดียว (False = ซิงค์ทีละวันที่)
+        progress: ตัวรับความคืบหน้ารายวันที่ (ดู sync_dates_bulk)
+        """
         try:
             all_draw_dates = LOTTERY_DATES.get_all_draw_dates()
             
+            if bulk:
+                return self.sync_dates_bulk(all_draw_dates, force_update, progress=progress)
+            
+            if progress is not None:
+                progress.start(len(all_draw_dates))
             synced_count = 0
             error_count = 0
             results = []
@@ -93,7 +123,12 @@ class LottoSyncService:
                 except Exception as e:
                     error_count += 1
                     results.append(f"❌ {date_str}: เกิดข้อผิดพลาด - {str(e)}")
+                
+                if progress is not None:
+                    progress.item(date_str, results[-1], ok=results[-1].startswith('✅'))
             
+            if progress is not None:
+                progress.flush()
             return {
                 'success': True,
                 'message': f'ซิงค์ข้อมูลทั้งหมดเสร็จสิ้น: {synced_count} สำเร็จ, {error_count} ไม่สำเร็จ',
@@ -110,6 +145,141 @@ class LottoSyncService:
                 'error': str(e)
             }
     
+    def sync_dates_bulk(self, draw_dates, force_update=False, progress=None):
+        """
+        ซิงค์หลายวันที่ในครั้งเดียว: อ่าน LottoResult ด้วย query เดียว แปลงในหน่วยความจำ
+        เทียบกับ LotteryDraw เดิม แล้วเขียนด้วย bulk_create/bulk_update ใน transaction เดียว
+        force_update: เขียนทับงวดที่มีอยู่แล้วแม้ข้อมูลไม่เปลี่ยน
+        progress: ตัวรับความคืบหน้า (เช่น lottery_checker.jobs.JobProgress) ที่มีเมธอด
+                  start(total), item(key, message, ok) และ flush() รายงานแต่ละวันที่หลังเขียนเสร็จ
+        """
+        try:
+            timings = {}
+            started = time.perf_counter()
+            
+            dates = []
+            for value in draw_dates:
+                if isinstance(value, str):
+                    value = datetime.strptime(value, '%Y-%m-%d').date()
+                elif isinstance(value, datetime):
+                    value = value.date()
+                dates.append(value)
+            dates = sorted(set(dates))
+            if progress is not None:
+                progress.start(len(dates))
+            
+            # อ่านข้อมูลต้นทางและปลายทางอย่างละหนึ่ง query
+            step = time.perf_counter()
+            lotto_results = LottoResult.objects.filter(draw_date__in=dates).in_bulk(field_name='draw_date')
+            existing = LotteryDraw.objects.filter(draw_date__in=dates).in_bulk(field_name='draw_date')
+            timings['fetch'] = time.perf_counter() - step
+            
+            step = time.perf_counter()
+            to_create = []
+            to_update = []
+            results = []
+            error_count = 0
+            unchanged_count = 0
+            now = timezone.now()
+            
+            for draw_date in dates:
+                lotto_result = lotto_results.get(draw_date)
+                if not lotto_result:
+                    error_count += 1
+                    results.append(f"❌ {draw_date}: ไม่พบข้อมูลใน lottery_checker สำหรับวันที่ {draw_date}")
+                    continue
+                
+                converted_data = self._convert_lotto_data(lotto_result)
+                if not converted_data:
+                    error_count += 1
+                    results.append(f"❌ {draw_date}: ไม่สามารถแปลงข้อมูลวันที่ {draw_date} ได้")
+                    continue
+                
+                draw = existing.get(draw_date)
+                if draw is None:
+                    to_create.append(LotteryDraw(draw_date=draw_date, **converted_data))
+                    results.append(f"✅ {draw_date}: สร้างใหม่ข้อมูลวันที่ {draw_date} สำเร็จ")
+                    continue
+                
+                changed = any(getattr(draw, field) != value for field, value in converted_data.items())
+                if not changed and not force_update:
+                    unchanged_count += 1
+                    results.append(f"⏭️ {draw_date}: ข้อมูลไม่เปลี่ยนแปลง")
+                    continue
+                
+                for field, value in converted_data.items():
+                    setattr(draw, field, value)
+                # bulk_update ไม่อัปเดต auto_now ให้
+                draw.updated_at = now
+                to_update.append(draw)
+                results.append(f"✅ {draw_date}: อัปเดตข้อมูลวันที่ {draw_date} สำเร็จ")
+            timings['convert'] = time.perf_counter() - step
+            
+            step = time.perf_counter()
+            changed_draws = []
+            if to_create or to_update:
+                with transaction.atomic():
+                    LotteryDraw.objects.bulk_create(to_create, batch_size=500)
+                    LotteryDraw.objects.bulk_update(
+                        to_update,
+                        ['draw_round', 'first_prize', 'two_digit',
+                         'three_digit_front', 'three_digit_back', 'updated_at'],
+                        batch_size=500
+                    )
+                    
+                    # โหลดงวดที่เปลี่ยนกลับมาเพื่อให้มี pk ครบทุกฐานข้อมูล
+                    changed_draws = list(LotteryDraw.objects.filter(
+                        draw_date__in=[draw.draw_date for draw in to_create + to_update]
+                    ))
+                    DrawNumber.objects.filter(draw__in=changed_draws).delete()
+                    DrawNumber.objects.bulk_create(
+                        [row for draw in changed_draws for row in build_draw_numbers(draw)],
+                        batch_size=500
+                    )
+            timings['write'] = time.perf_counter() - step
+            
+            step = time.perf_counter()
+            if changed_draws:
+                # ข้อมูลเปลี่ยนหลายงวดพร้อมกัน คำนวณข้อมูลที่ได้จากประวัติใหม่ครั้งเดียว
+                NumberStatsUpdater().rebuild()
+                reset_appearance_index()
+                reset_count_matrix()
+                invalidate_stats_cache()
+            timings['derived'] = time.perf_counter() - step
+            timings['total'] = time.perf_counter() - started
+            
+            if progress is not None:
+                # ข้อความทุกบรรทัดขึ้นต้นด้วยสถานะและวันที่ตามลำดับ dates
+                for draw_date, message in zip(dates, results):
+                    progress.item(draw_date, message, ok=not message.startswith('❌'))
+                progress.flush()
+            
+            synced_count = len(to_create) + len(to_update) + unchanged_count
+            logger.info(
+                f"ซิงค์แบบ bulk {len(dates)} วันที่: สร้าง {len(to_create)}, อัปเดต {len(to_update)}, "
+                f"ไม่เปลี่ยน {unchanged_count}, ผิดพลาด {error_count} ใน {timings['total']:.2f} วินาที"
+            )
+            
+            return {
+                'success': True,
+                'message': f'ซิงค์ข้อมูลเสร็จสิ้น: {synced_count} สำเร็จ, {error_count} ไม่สำเร็จ',
+                'synced_count': synced_count,
+                'created_count': len(to_create),
+                'updated_count': len(to_update),
+                'unchanged_count': unchanged_count,
+                'error_count': error_count,
+                'total_dates': len(dates),
+                'timings': {name: round(value, 4) for name, value in timings.items()},
+                'results': results
+            }
+            
+        except Exception as e:
+            logger.error(f"เกิดข้อผิดพลาดในการซิงค์แบบ bulk: {e}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
     def sync_specific_date(self, date, force_update=False):
         """ซิงค์ข้อมูลสำหรับวันที่เฉพาะ"""
         try:
@@ -137,10 +307,7 @@ class LottoSyncService:
                 }
             
             # สร้างหรืออัปเดตข้อมูล
-            lottery_draw, created = LotteryDraw.objects.update_or_create(
-                draw_date=date,
-                defaults=converted_data
-            )
+            lottery_draw, created = self.save_draw(date, converted_data)
             
             action = 'สร้างใหม่' if created else 'อัปเดต'
             
@@ -158,39 +325,64 @@ class LottoSyncService:
                 'error': str(e)
             }
     
-    def get_sync_status(self):
-        """ดึงสถานะการซิงค์ข้อมูล"""
-        try:
-            # ข้อมูลล่าสุดใน lotto_stats
-            latest_lotto_stats = LotteryDraw.objects.order_by('-draw_date').first()
-            
-            # ข้อมูลล่าสุดใน lottery_checker
-            latest_lotto_checker = LottoResult.objects.order_by('-draw_date').first()
+    def save_draw(self, draw_date, converted_data):
+        """บันทึกงวด แล้วอัปเดต DrawNumber ดัชนีการออก NumberStatistics และล้างแคชสถิติ"""
+        updater = NumberStatsUpdater()
+        
+        with transaction.atomic():
+            existing = LotteryDraw.objects.filter(draw_date=draw_date).first()
+            previous_numbers = updater.numbers_of(existing) if existing else set()
             
-            # ข้อมูลเก่าสุดใน lotto_stats
-            oldest_lotto_stats = LotteryDraw.objects.order_by('draw_date').first()
+            lottery_draw, created = LotteryDraw.objects.update_or_create(
+                draw_date=draw_date,
+                defaults=converted_data
+            )
+            sync_draw_numbers(lottery_draw)
+            updater.apply_draw(lottery_draw, created, previous_numbers)
+        
+        reset_appearance_index()
+        reset_count_matrix()
+        invalidate_stats_cache()
+        return lottery_draw, created
+    
+    def get_sync_status(self, draw_matrix=None):
+        """ดึงสถานะการซิงค์ข้อมูล (ส่ง DrawMatrix ที่โหลดไว้แล้วมาเพื่อไม่ต้อง query LotteryDraw ซ้ำ)"""
+        try:
+            # ข้อมูลใน lotto_stats
+            if draw_matrix is not None:
+                lotto_stats = {
+                    'total': len(draw_matrix),
+                    'latest': draw_matrix.dates[0] if len(draw_matrix) else None,
+                    'oldest': draw_matrix.dates[-1] if len(draw_matrix) else None,
+                }
+            else:
+                lotto_stats = LotteryDraw.objects.aggregate(
+                    total=Count('id'), latest=Max('draw_date'), oldest=Min('draw_date')
+                )
             
-            # ข้อมูลเก่าสุดใน lottery_checker
-            oldest_lotto_checker = LottoResult.objects.order_by('draw_date').first()
+            # ข้อมูลใน lottery_checker
+            lotto_checker = LottoResult.objects.aggregate(
+                total=Count('id'), latest=Max('draw_date'), oldest=Min('draw_date')
+            )
             
             status = {
                 'lotto_stats': {
-                    'total_records': LotteryDraw.objects.count(),
-                    'latest_date': latest_lotto_stats.draw_date.isoformat() if latest_lotto_stats else None,
-                    'oldest_date': oldest_lotto_stats.draw_date.isoformat() if oldest_lotto_stats else None,
+                    'total_records': lotto_stats['total'],
+                    'latest_date': lotto_stats['latest'].isoformat() if lotto_stats['latest'] else None,
+                    'oldest_date': lotto_stats['oldest'].isoformat() if lotto_stats['oldest'] else None,
                 },
                 'lottery_checker': {
-                    'total_records': LottoResult.objects.count(),
-                    'latest_date': latest_lotto_checker.draw_date.isoformat() if latest_lotto_checker else None,
-                    'oldest_date': oldest_lotto_checker.draw_date.isoformat() if oldest_lotto_checker else None,
+                    'total_records': lotto_checker['total'],
+                    'latest_date': lotto_checker['latest'].isoformat() if lotto_checker['latest'] else None,
+                    'oldest_date': lotto_checker['oldest'].isoformat() if lotto_checker['oldest'] else None,
                 },
                 'last_sync': self.last_sync_time.isoformat() if self.last_sync_time else None,
                 'is_synced': False
             }
             
             # ตรวจสอบว่าข้อมูลซิงค์กันหรือไม่
-            if (latest_lotto_stats and latest_lotto_checker and 
-                latest_lotto_stats.draw_date == latest_lotto_checker.draw_date):
+            if (lotto_stats['latest'] and lotto_checker['latest'] and 
+                lotto_stats['latest'] == lotto_checker['latest']):
                 status['is_synced'] = True
             
             return status
@@ -0,0 +1,36 @@
+import time
+from django.core.management.base import BaseCommand
+from lotto_stats.draw_numbers import backfill_draw_numbers
+
+
+class Command(BaseCommand):
+    help = 'สร้างตาราง DrawNumber (เลขที่ออกในแต่ละงวด) จากประวัติ LotteryDraw'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='จำนวนแถวต่อการเขียนหนึ่งครั้ง (default: 500)'
+        )
+        parser.add_argument(
+            '--only-missing',
+            action='store_true',
+            help='สร้างเฉพาะงวดที่ยังไม่มีข้อมูลในตาราง'
+        )
+    
+    def handle(self, *args, **options):
+        self.stdout.write("🔄 เริ่มสร้างตารางเลขที่ออกในแต่ละงวด...")
+        
+        start = time.perf_counter()
+        draw_count, row_count = backfill_draw_numbers(
+            batch_size=options['batch_size'],
+            only_missing=options['only_missing']
+        )
+        elapsed = time.perf_counter() - start
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ บันทึก {row_count} แถว จาก {draw_count} งวด เสร็จใน {elapsed:.2f} วินาที"
+            )
+        )
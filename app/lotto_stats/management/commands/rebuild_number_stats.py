@@ -0,0 +1,26 @@
+import time
+from django.core.management.base import BaseCommand
+from lotto_stats.number_stats import NumberStatsUpdater
+
+
+class Command(BaseCommand):
+    help = 'คำนวณตาราง NumberStatistics ใหม่ทั้งหมดจากประวัติ LotteryDraw'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='จำนวนแถวต่อการเขียนหนึ่งครั้ง (default: 500)'
+        )
+    
+    def handle(self, *args, **options):
+        self.stdout.write("🔄 เริ่มคำนวณสถิติเลขใหม่ทั้งหมด...")
+        
+        start = time.perf_counter()
+        count = NumberStatsUpdater().rebuild(batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - start
+        
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ คำนวณสถิติเลข {count} รายการ เสร็จใน {elapsed:.2f} วินาที")
+        )
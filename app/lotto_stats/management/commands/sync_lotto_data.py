@@ -3,7 +3,9 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import datetime, timedelta
 from lottery_checker.models import LottoResult
-from lotto_stats.models import LotteryDraw
+from lotto_stats.models import LotteryDraw, NumberStatistics
+from lotto_stats.lotto_sync_service import LottoSyncService
+from lotto_stats.stats_cache import invalidate_stats_cache
 from utils.lottery_dates import LOTTERY_DATES
 
 logger = logging.getLogger(__name__)
@@ -23,6 +25,11 @@ class Command(BaseCommand):
             action='store_true',
             help='บังคับอัปเดตข้อมูลที่มีอยู่แล้ว'
         )
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='ซิงค์ทุกวันที่ในครั้งเดียวด้วย bulk write (เร็วกว่ามากสำหรับข้อมูลย้อนหลังจำนวนมาก)'
+        )
         parser.add_argument(
             '--clear-existing',
             action='store_true',
@@ -38,6 +45,8 @@ class Command(BaseCommand):
         if clear_existing:
             self.stdout.write("🗑️ ล้างข้อมูลทั้งหมดใน lotto_stats...")
             LotteryDraw.objects.all().delete()
+            NumberStatistics.objects.all().delete()
+            invalidate_stats_cache()
             self.stdout.write(self.style.SUCCESS("✅ ล้างข้อมูลเสร็จสิ้น"))
         
         # ใช้ LotteryDates แทนการคำนวณแบบเดิม
@@ -54,6 +63,12 @@ class Command(BaseCommand):
         
         self.stdout.write(f"📊 พบวันที่หวยออก {len(recent_draw_dates)} รายการ")
         
+        sync_service = LottoSyncService()
+        
+        if options['bulk']:
+            self.handle_bulk(sync_service, recent_draw_dates, force)
+            return
+        
         synced_count = 0
         updated_count = 0
         error_count = 0
@@ -84,10 +99,7 @@ class Command(BaseCommand):
                     continue
                 
                 # สร้างหรืออัปเดตข้อมูล
-                lottery_draw, created = LotteryDraw.objects.update_or_create(
-                    draw_date=draw_date,
-                    defaults=converted_data
-                )
+                lottery_draw, created = sync_service.save_draw(draw_date, converted_data)
                 
                 if created:
                     synced_count += 1
@@ -120,6 +132,32 @@ class Command(BaseCommand):
         else:
             self.stdout.write(self.style.WARNING("⚠️ ซิงค์ข้อมูลเสร็จสิ้น แต่มีข้อผิดพลาดบางส่วน"))
     
+    def handle_bulk(self, sync_service, draw_dates, force):
+        """ซิงค์ทุกวันที่ด้วย LottoSyncService.sync_dates_bulk แล้วแสดงสรุปและเวลาที่ใช้"""
+        result = sync_service.sync_dates_bulk(draw_dates, force_update=force)
+        
+        if not result['success']:
+            self.stdout.write(self.style.ERROR(f"❌ ซิงค์แบบ bulk ไม่สำเร็จ: {result['error']}"))
+            return
+        
+        timings = result['timings']
+        self.stdout.write("\n" + "="*50)
+        self.stdout.write("📊 สรุปการซิงค์ข้อมูล (bulk)")
+        self.stdout.write("="*50)
+        self.stdout.write(f"✅ สร้างใหม่: {result['created_count']} รายการ")
+        self.stdout.write(f"🔄 อัปเดต: {result['updated_count']} รายการ")
+        self.stdout.write(f"⏭️ ไม่เปลี่ยนแปลง: {result['unchanged_count']} รายการ")
+        self.stdout.write(f"❌ เกิดข้อผิดพลาด: {result['error_count']} รายการ")
+        self.stdout.write(
+            f"⏱️ อ่าน {timings['fetch']:.2f}s | แปลง {timings['convert']:.2f}s | "
+            f"เขียน {timings['write']:.2f}s | สถิติ {timings['derived']:.2f}s | รวม {timings['total']:.2f}s"
+        )
+        
+        if result['error_count'] == 0:
+            self.stdout.write(self.style.SUCCESS("🎉 ซิงค์ข้อมูลสำเร็จ!"))
+        else:
+            self.stdout.write(self.style.WARNING("⚠️ ซิงค์ข้อมูลเสร็จสิ้น แต่มีข้อผิดพลาดบางส่วน"))
+    
     def convert_lotto_data(self, lotto_result):
         """แปลงข้อมูลจาก LottoResult เป็นรูปแบบที่ LotteryDraw ต้องการ"""
         try:
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.13 on 2026-10-16 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lotto_stats', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='numberstatistics',
+            name='current_streak',
+            field=models.IntegerField(default=0, verbose_name='ออกติดต่อกันล่าสุด'),
+        ),
+    ]
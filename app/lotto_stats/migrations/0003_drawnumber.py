@@ -0,0 +1,36 @@
+# Generated by Django 4.2.13 on 2026-10-16 21:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lotto_stats', '0002_numberstatistics_current_streak'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DrawNumber',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('draw_date', models.DateField(verbose_name='วันที่ออกรางวัล')),
+                ('number', models.CharField(max_length=3, verbose_name='เลข')),
+                ('digits', models.PositiveSmallIntegerField(verbose_name='จำนวนหลัก')),
+                ('slot', models.CharField(choices=[('two_digit', 'เลขท้าย 2 ตัว'), ('first_prize', 'ในรางวัลที่ 1'), ('three_digit_front', 'เลขหน้า 3 ตัว'), ('three_digit_back', 'เลขท้าย 3 ตัว')], max_length=20, verbose_name='ช่องรางวัล')),
+                ('position', models.PositiveSmallIntegerField(default=0, verbose_name='ตำแหน่งในช่อง')),
+                ('draw', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='numbers', to='lotto_stats.lotterydraw', verbose_name='งวด')),
+            ],
+            options={
+                'verbose_name': 'เลขที่ออกในงวด',
+                'verbose_name_plural': 'เลขที่ออกในงวด',
+                'ordering': ['-draw_date', 'slot', 'position'],
+                'indexes': [models.Index(fields=['number', 'draw_date'], name='lotto_drawnum_number_date'), models.Index(fields=['digits', 'draw_date'], name='lotto_drawnum_digits_date')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='drawnumber',
+            constraint=models.UniqueConstraint(fields=('draw', 'slot', 'position'), name='lotto_drawnum_unique_slot'),
+        ),
+    ]
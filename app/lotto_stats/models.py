@@ -52,6 +52,39 @@ class LotteryDraw(models.Model):
         three_digit_numbers = [num[-3:] for num in full_numbers if len(num) >= 3]
         return three_digit_numbers[:limit]
 
+class DrawNumber(models.Model):
+    """เลขแต่ละตัวที่ออกในงวด (แยกแถวต่อช่องรางวัล สำหรับค้นหาด้วย index)"""
+    # เรียงตามลำดับความสำคัญเมื่อเลขเดียวกันออกหลายช่องในงวดเดียว
+    SLOT_CHOICES = [
+        ('two_digit', 'เลขท้าย 2 ตัว'),
+        ('first_prize', 'ในรางวัลที่ 1'),
+        ('three_digit_front', 'เลขหน้า 3 ตัว'),
+        ('three_digit_back', 'เลขท้าย 3 ตัว'),
+    ]
+    
+    draw = models.ForeignKey(LotteryDraw, on_delete=models.CASCADE, related_name='numbers', verbose_name="งวด")
+    # เก็บวันที่ซ้ำจากงวด เพื่อให้ค้นหาตามเลขแล้วเรียงตามวันที่ได้จาก index เดียว
+    draw_date = models.DateField("วันที่ออกรางวัล")
+    number = models.CharField("เลข", max_length=3)
+    digits = models.PositiveSmallIntegerField("จำนวนหลัก")
+    slot = models.CharField("ช่องรางวัล", max_length=20, choices=SLOT_CHOICES)
+    position = models.PositiveSmallIntegerField("ตำแหน่งในช่อง", default=0)
+    
+    class Meta:
+        verbose_name = "เลขที่ออกในงวด"
+        verbose_name_plural = "เลขที่ออกในงวด"
+        ordering = ['-draw_date', 'slot', 'position']
+        indexes = [
+            models.Index(fields=['number', 'draw_date'], name='lotto_drawnum_number_date'),
+            models.Index(fields=['digits', 'draw_date'], name='lotto_drawnum_digits_date'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['draw', 'slot', 'position'], name='lotto_drawnum_unique_slot'),
+        ]
+    
+    def __str__(self):
+        return f"{self.number} ({self.get_slot_display()}) {self.draw_date}"
+
 class NumberStatistics(models.Model):
     """สถิติของเลขแต่ละตัว"""
     number = models.CharField("เลข", max_length=3, unique=True)
@@ -67,6 +100,7 @@ class NumberStatistics(models.Model):
     
     # สถิติเพิ่มเติม
     max_consecutive = models.IntegerField("ออกติดต่อกันสูงสุด", default=0)
+    current_streak = models.IntegerField("ออกติดต่อกันล่าสุด", default=0)
     average_gap = models.FloatField("ระยะห่างเฉลี่ย (วัน)", default=0)
     
     updated_at = models.DateTimeField("อัปเดตล่าสุด", auto_now=True)
@@ -0,0 +1,188 @@
+"""
+Number Stats Updater - ดูแลตาราง NumberStatistics ให้เป็นปัจจุบัน
+งวดใหม่ล่าสุดอัปเดตเฉพาะเลขที่ออกในงวดนั้น ส่วนกรณีอื่นคำนวณใหม่จากประวัติด้วย bulk write
+"""
+
+import logging
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .appearance_index import AppearanceIndex, draw_numbers
+from .draw_matrix import DrawMatrix
+from .models import LotteryDraw, NumberStatistics
+
+logger = logging.getLogger(__name__)
+
+STAT_FIELDS = [
+    'number_type', 'total_appearances', 'last_appeared', 'days_since_last',
+    'max_consecutive', 'current_streak', 'average_gap', 'updated_at'
+]
+
+
+def compute_number_statistics(matrix, numbers=None):
+    """
+    คำนวณสถิติของเลขจากประวัติทั้งหมด
+    numbers: จำกัดเฉพาะเลขที่ระบุ (None = ทุกเลขที่เคยออก)
+    คืนค่า dict เลข -> dict ของค่าในตาราง NumberStatistics
+    """
+    index = AppearanceIndex(matrix)
+    today = timezone.now().date()
+    descending = -matrix.ordinals
+    results = {}
+
+    for number_type in AppearanceIndex.NUMBER_TYPES:
+        for number, ordinals in index.items(number_type):
+            if numbers is not None and number not in numbers:
+                continue
+
+            # ลำดับงวดที่ออก เพื่อหาช่วงที่ออกติดต่อกัน (งวดติดกัน = ลำดับห่างกัน 1)
+            rows = np.searchsorted(descending, -ordinals)
+            breaks = np.flatnonzero(np.diff(rows) != 1)
+            run_lengths = np.diff(np.concatenate(([0], breaks + 1, [len(rows)])))
+            total = len(ordinals)
+
+            results[number] = {
+                'number_type': number_type,
+                'total_appearances': total,
+                'last_appeared': matrix.dates[rows[0]],
+                'days_since_last': (today - matrix.dates[rows[0]]).days,
+                'max_consecutive': int(run_lengths.max()),
+                'current_streak': int(run_lengths[0]),
+                # ค่าเฉลี่ยของระยะห่างระหว่างงวดที่ออก = ช่วงเวลาทั้งหมด / จำนวนช่วง
+                'average_gap': (int(ordinals[0] - ordinals[-1]) / (total - 1)) if total > 1 else 0,
+            }
+
+    return results
+
+
+class NumberStatsUpdater:
+    """อัปเดต NumberStatistics เมื่อมีการบันทึกงวด"""
+
+    def apply_draw(self, draw, created, previous_numbers=None):
+        """
+        อัปเดตสถิติหลังบันทึกงวด
+        previous_numbers: เลขของงวดนี้ก่อนถูกอัปเดต (กรณีแก้ไขงวดเดิม)
+        """
+        current_numbers = self.numbers_of(draw)
+        previous_numbers = previous_numbers or set()
+
+        if not created and current_numbers == previous_numbers:
+            return 0
+
+        previous_draw_date = LotteryDraw.objects.exclude(pk=draw.pk).aggregate(
+            latest=Max('draw_date')
+        )['latest']
+        is_latest = previous_draw_date is None or draw.draw_date > previous_draw_date
+
+        if not is_latest:
+            # งวดย้อนหลังเปลี่ยนลำดับงวดติดกันของทุกเลข จึงต้องคำนวณใหม่ทั้งหมด
+            return self.rebuild()
+
+        if not created:
+            return self.rebuild(numbers=current_numbers | previous_numbers)
+
+        if previous_draw_date is None or not NumberStatistics.objects.exists():
+            # งวดแรกหรือยังไม่เคยสร้างสถิติ ต้องคำนวณจากประวัติทั้งหมดก่อน
+            return self.rebuild()
+
+        return self._append(draw, previous_draw_date)
+
+    @staticmethod
+    def numbers_of(draw):
+        """เลข 2D/3D ทั้งหมดของงวด"""
+        matrix = DrawMatrix.from_draw(draw)
+        numbers = set()
+        for number_type in AppearanceIndex.NUMBER_TYPES:
+            numbers.update(draw_numbers(matrix, number_type))
+        return numbers
+
+    def _append(self, draw, previous_draw_date):
+        """เพิ่มงวดใหม่ล่าสุด: อัปเดตเฉพาะแถวของเลขที่ออกในงวดนี้"""
+        matrix = DrawMatrix.from_draw(draw)
+        draw_date = draw.draw_date
+        now = timezone.now()
+        days_since = (now.date() - draw_date).days
+
+        numbers = {
+            number: number_type
+            for number_type in AppearanceIndex.NUMBER_TYPES
+            for number in draw_numbers(matrix, number_type)
+        }
+        existing = NumberStatistics.objects.in_bulk(list(numbers), field_name='number')
+
+        to_update = []
+        to_create = []
+
+        for number, number_type in numbers.items():
+            stats = existing.get(number)
+
+            if stats is None or stats.last_appeared is None:
+                to_create.append(NumberStatistics(
+                    number=number,
+                    number_type=number_type,
+                    total_appearances=1,
+                    last_appeared=draw_date,
+                    days_since_last=days_since,
+                    max_consecutive=1,
+                    current_streak=1,
+                    average_gap=0
+                ))
+                continue
+
+            gaps = stats.total_appearances - 1
+            gap = (draw_date - stats.last_appeared).days
+            stats.average_gap = (stats.average_gap * gaps + gap) / (gaps + 1)
+            stats.current_streak = stats.current_streak + 1 if stats.last_appeared == previous_draw_date else 1
+            stats.max_consecutive = max(stats.max_consecutive, stats.current_streak)
+            stats.total_appearances += 1
+            stats.last_appeared = draw_date
+            stats.days_since_last = days_since
+            stats.updated_at = now
+            to_update.append(stats)
+
+        with transaction.atomic():
+            NumberStatistics.objects.bulk_update(to_update, STAT_FIELDS)
+            # แถวที่สร้างไว้แล้วแต่ไม่มีข้อมูลการออก ให้เขียนทับ
+            NumberStatistics.objects.bulk_create(
+                to_create,
+                update_conflicts=True,
+                unique_fields=['number'],
+                update_fields=STAT_FIELDS
+            )
+
+        return len(to_update) + len(to_create)
+
+    def rebuild(self, numbers=None, batch_size=500):
+        """
+        คำนวณ NumberStatistics ใหม่จากประวัติทั้งหมดด้วย query อ่านเดียวและ bulk write
+        numbers: คำนวณใหม่เฉพาะเลขที่ระบุ (None = ทั้งตาราง)
+        """
+        matrix = DrawMatrix.from_queryset(LotteryDraw.objects.all())
+        results = compute_number_statistics(matrix, numbers)
+        now = timezone.now()
+
+        objects = [
+            NumberStatistics(number=number, updated_at=now, **values)
+            for number, values in results.items()
+        ]
+
+        with transaction.atomic():
+            # ลบแถวของเลขที่ไม่มีในประวัติแล้ว
+            stale = NumberStatistics.objects.exclude(number__in=list(results))
+            if numbers is not None:
+                stale = stale.filter(number__in=list(numbers))
+            stale.delete()
+
+            NumberStatistics.objects.bulk_create(
+                objects,
+                update_conflicts=True,
+                unique_fields=['number'],
+                update_fields=STAT_FIELDS,
+                batch_size=batch_size
+            )
+
+        logger.info(f"คำนวณสถิติเลขใหม่ {len(objects)} รายการ")
+        return len(objects)
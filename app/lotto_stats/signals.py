@@ -0,0 +1,40 @@
+"""
+Signals - ส่งต่อการเปลี่ยนแปลงจาก lottery_checker.LottoResult ไปยัง LotteryDraw
+เมื่อบันทึกผลรางวัลที่ถูกต้อง จะแปลงเฉพาะวันที่นั้นหลัง transaction commit
+(LottoSyncService.save_draw อัปเดตดัชนีและล้างแคชสถิติต่อให้เอง)
+"""
+
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from lottery_checker.models import LottoResult
+
+logger = logging.getLogger(__name__)
+
+
+def propagate_lotto_result(draw_date):
+    """แปลง LottoResult ของวันที่เดียวเป็น LotteryDraw"""
+    from .lotto_sync_service import LottoSyncService
+    from .stats_cache import invalidate_stats_cache
+
+    result = LottoSyncService().sync_specific_date(draw_date)
+    # สถานะการซิงค์ในหน้าสถิติอ่านจาก LottoResult ด้วย จึงล้างแคชแม้แปลงไม่สำเร็จ
+    invalidate_stats_cache()
+    if result['success']:
+        logger.info(f"ส่งต่อผลรางวัลวันที่ {draw_date} ไปยัง lotto_stats: {result['message']}")
+    else:
+        logger.warning(f"ส่งต่อผลรางวัลวันที่ {draw_date} ไม่สำเร็จ: {result['error']}")
+    return result
+
+
+@receiver(post_save, sender=LottoResult, dispatch_uid='lotto_stats_propagate_lotto_result')
+def lotto_result_saved(sender, instance, raw=False, **kwargs):
+    """เข้าคิวการแปลงเมื่อบันทึกผลรางวัลที่ถูกต้อง (ข้ามการโหลด fixture)"""
+    if raw or not instance.is_valid:
+        return
+
+    draw_date = instance.draw_date
+    transaction.on_commit(lambda: propagate_lotto_result(draw_date))
@@ -0,0 +1,134 @@
+"""
+Stats Cache - แคชผลสถิติตามเวอร์ชันของประวัติการออกรางวัล
+ข้อมูลเปลี่ยนเฉพาะตอนซิงค์งวดใหม่ จึงใช้เวอร์ชัน (งวดล่าสุด + จำนวนงวด + เวลาแก้ไขล่าสุด) และวันที่เป็นส่วนหนึ่งของ key
+เมื่อ LottoSyncService บันทึกงวด เวอร์ชันจะถูกล้าง ผลที่แคชไว้ของเวอร์ชันเก่าจึงไม่ถูกใช้อีก
+"""
+
+import hashlib
+import threading
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .models import LotteryDraw
+from .stats_calculator import StatsCalculator
+
+KEY_PREFIX = 'lotto_stats'
+VERSION_KEY = f'{KEY_PREFIX}:draw_version'
+
+# อายุของเวอร์ชันที่แคชไว้ (กันกรณีมี process อื่นบันทึกงวดโดยไม่ได้ล้างแคชของ process นี้)
+VERSION_TIMEOUT = 600
+# อายุของผลสถิติ (ผลของเวอร์ชันเก่าจะหมดอายุไปเอง)
+RESULT_TIMEOUT = 60 * 60 * 24
+
+# ใช้แยกกรณีไม่มีใน cache ออกจากผลลัพธ์ที่เป็น None
+_MISSING = object()
+
+
+def get_draw_version():
+    """เวอร์ชันของประวัติการออกรางวัล (query เฉพาะเมื่อเวอร์ชันไม่อยู่ในแคช)"""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        history = LotteryDraw.objects.aggregate(
+            latest=Max('draw_date'), total=Count('id'), modified=Max('updated_at')
+        )
+        modified = history['modified'].timestamp() if history['modified'] else 0
+        version = f"{history['latest']}:{history['total']}:{modified:.6f}"
+        cache.set(VERSION_KEY, version, timeout=VERSION_TIMEOUT)
+    return version
+
+
+def invalidate_stats_cache():
+    """ล้างเวอร์ชัน ให้คำนวณเวอร์ชันใหม่จากฐานข้อมูลเมื่อเรียกใช้ครั้งถัดไป"""
+    cache.delete(VERSION_KEY)
+
+
+class StatsCache:
+    """memoize ผลการคำนวณต่อ (ชื่อ, พารามิเตอร์, เวอร์ชัน) พร้อมนับ hit/miss"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    @staticmethod
+    def make_key(name, params, version):
+        """
+        สร้าง cache key (พารามิเตอร์ถูก hash เพื่อให้ key สั้นและปลอดภัย)
+        รวมวันที่ปัจจุบันด้วย เพราะสถิติหลายตัวนับจำนวนวันจากวันนี้
+        """
+        digest = hashlib.md5(repr(sorted(params.items())).encode()).hexdigest()
+        return f"{KEY_PREFIX}:{version}:{timezone.now().date():%Y%m%d}:{name}:{digest}"
+
+    def get_or_compute(self, name, compute, **params):
+        """คืนค่าจากแคชถ้ามี ไม่เช่นนั้นเรียก compute(**params) แล้วเก็บผล"""
+        key = self.make_key(name, params, get_draw_version())
+        result = cache.get(key, _MISSING)
+
+        if result is not _MISSING:
+            self._count(name, 'hits')
+            return result
+
+        self._count(name, 'misses')
+        result = compute(**params)
+        cache.set(key, result, timeout=RESULT_TIMEOUT)
+        return result
+
+    def _count(self, name, field):
+        with self._lock:
+            counters = self._counters.setdefault(name, {'hits': 0, 'misses': 0})
+            counters[field] += 1
+
+    def stats(self):
+        """จำนวน hit/miss แยกตามชื่อ และรวมทั้งหมด (นับใน process นี้)"""
+        with self._lock:
+            by_name = {name: dict(counters) for name, counters in self._counters.items()}
+
+        hits = sum(counters['hits'] for counters in by_name.values())
+        misses = sum(counters['misses'] for counters in by_name.values())
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total * 100, 2) if total else 0,
+            'by_name': by_name,
+        }
+
+    def reset_stats(self):
+        """ล้างตัวนับ"""
+        with self._lock:
+            self._counters = {}
+
+
+stats_cache = StatsCache()
+
+
+class CachedStatsCalculator:
+    """
+    StatsCalculator ที่แคชผลของทุกเมธอด get_* ตามเวอร์ชันของประวัติการออกรางวัล
+    StatsCalculator จริงถูกสร้างเมื่อแคชไม่มีผลเท่านั้น
+    """
+
+    def __init__(self, store=None):
+        self._cache = store or stats_cache
+        self._calculator = None
+
+    @property
+    def calculator(self):
+        if self._calculator is None:
+            self._calculator = StatsCalculator()
+        return self._calculator
+
+    def __getattr__(self, name):
+        if not name.startswith('get_') or not callable(getattr(StatsCalculator, name, None)):
+            raise AttributeError(name)
+
+        def cached_method(**params):
+            return self._cache.get_or_compute(
+                f'calculator.{name}',
+                lambda **kwargs: getattr(self.calculator, name)(**kwargs),
+                **params
+            )
+
+        cached_method.__name__ = name
+        return cached_method
@@ -1,13 +1,47 @@
-from django.db.models import Count, Q
 from datetime import datetime, timedelta
 from collections import Counter
-from .models import LotteryDraw, NumberStatistics
+import numpy as np
+from .models import LotteryDraw
+from .draw_matrix import DrawMatrix
+from .appearance_index import AppearanceIndex, get_appearance_index
+from .count_matrix import CountMatrix, get_count_matrix
 from lottery_checker.models import LottoResult
 
+THAI_MONTHS = {
+    1: 'มกราคม', 2: 'กุมภาพันธ์', 3: 'มีนาคม', 4: 'เมษายน',
+    5: 'พฤษภาคม', 6: 'มิถุนายน', 7: 'กรกฎาคม', 8: 'สิงหาคม',
+    9: 'กันยายน', 10: 'ตุลาคม', 11: 'พฤศจิกายน', 12: 'ธันวาคม'
+}
+
+
 class StatsCalculator:
-    def __init__(self):
+    def __init__(self, matrix=None):
         self.all_draws = LotteryDraw.objects.all().order_by('-draw_date')
         self.lotto_results = LottoResult.objects.all().order_by('-draw_date')
+        self._matrix = matrix
+        self._index = AppearanceIndex(matrix) if matrix is not None else None
+        self._counts = None
+
+    @property
+    def matrix(self):
+        """ข้อมูลผลรางวัลทั้งหมดแบบ array (โหลดครั้งเดียวต่อ instance)"""
+        if self._matrix is None:
+            self._matrix = DrawMatrix.from_queryset(self.all_draws)
+        return self._matrix
+
+    @property
+    def index(self):
+        """ดัชนีวันที่ออกของแต่ละเลข (ใช้ดัชนีร่วมของ process ถ้าไม่ได้ส่ง matrix มา)"""
+        if self._index is None:
+            self._index = get_appearance_index()
+        return self._index
+
+    @property
+    def counts(self):
+        """ผลรวมสะสมของจำนวนครั้งที่ออก (ใช้ตารางร่วมของ process ถ้าไม่ได้ส่ง matrix มา)"""
+        if self._counts is None:
+            self._counts = CountMatrix(self._matrix) if self._matrix is not None else get_count_matrix()
+        return self._counts
     
     def get_hot_numbers_from_lotto_result(self, limit=10, days=90, number_type='2D'):
         """คำนวณเลขที่ออกบ่อย (เลขฮอต) จาก LottoResult โดยตรง"""
@@ -26,72 +60,59 @@ class StatsCalculator:
         # ถ้าไม่มีข้อมูลจาก LottoResult ที่มีรางวัล ให้ใช้ LotteryDraw แทน
         return self.get_hot_numbers(limit, days, number_type)
     
+    @staticmethod
+    def _format(number, number_type):
+        """แปลงเลขจาก array กลับเป็นสตริงที่เติมศูนย์นำหน้า"""
+        return str(number).zfill(2 if number_type == '2D' else 3)
+
     def get_hot_numbers(self, limit=10, days=90, number_type='2D'):
         """คำนวณเลขที่ออกบ่อย (เลขฮอต)"""
         cutoff_date = datetime.now().date() - timedelta(days=days)
-        recent_draws = self.all_draws.filter(draw_date__gte=cutoff_date)
+        # ความถี่ในช่วงเวลา = ผลต่างของผลรวมสะสม ไม่ต้องนับใหม่ตามจำนวนวัน
+        ranked, window = self.counts.rank_since(number_type, cutoff_date, limit)
 
-        if not recent_draws:
+        if not window:
             return []
         
-        number_counter = Counter()
-        
-        for draw in recent_draws:
-            if number_type == '2D':
-                # นับเลข 2 ตัวจากทุกตำแหน่ง
-                number_counter[draw.two_digit] += 1
-                # เลข 2 ตัวจากรางวัลที่ 1
-                for num in draw.get_all_two_digits():
-                    number_counter[num] += 1
-            elif number_type == '3D':
-                # นับเลข 3 ตัว
-                for num in draw.get_all_three_digits():
-                    number_counter[num] += 1
-        
         hot_numbers = []
-        for number, count in number_counter.most_common(limit):
+        for number, count in ranked:
             hot_numbers.append({
-                'number': number,
+                'number': self._format(number, number_type),
                 'count': count,
-                'percentage': round((count / len(recent_draws)) * 100, 2)
+                'percentage': round((count / window) * 100, 2)
             })
         
         return hot_numbers
     
+    def get_frequency_series(self, numbers, days=90, points=24):
+        """
+        ความถี่ย้อนหลัง days วัน ณ แต่ละงวดของเลขที่ระบุ (งวดล่าสุด points งวด)
+        คืนค่าในรูปแบบที่ใช้กับ Chart.js ได้ทันที
+        """
+        counts = self.counts
+        ordinals = counts.ordinals[max(len(counts) - points, 0):]
+        labels = [datetime.fromordinal(int(o)).strftime('%d/%m/%Y') for o in ordinals]
+        datasets = []
+
+        for number in numbers:
+            number_type = AppearanceIndex.number_type_of(number)
+            if number_type is None:
+                continue
+            _, series = counts.series(number_type, [int(number)], days, points)
+            datasets.append({'label': number, 'data': series[0].tolist()})
+
+        return {'labels': labels, 'datasets': datasets, 'days': days}
+    
     def get_cold_numbers(self, limit=10, number_type='2D'):
         """คำนวณเลขที่ไม่ออกนาน (เลขเย็น)"""
-        # สร้าง set ของเลขทั้งหมด
-        if number_type == '2D':
-            all_numbers = set(str(i).zfill(2) for i in range(100))
-        else:
-            all_numbers = set(str(i).zfill(3) for i in range(1000))
-        
-        last_appearance = {}
-        
-        for number in all_numbers:
-            for draw in self.all_draws:
-                found = False
-                
-                if number_type == '2D':
-                    if number == draw.two_digit or number in draw.get_all_two_digits():
-                        found = True
-                else:
-                    if number in draw.get_all_three_digits():
-                        found = True
-                
-                if found:
-                    last_appearance[number] = draw.draw_date
-                    break
-        
-        # คำนวณจำนวนวันที่ไม่ออก
         today = datetime.now().date()
         cold_numbers = []
         
-        for number, last_date in last_appearance.items():
-            days_since = (today - last_date).days
+        # คำนวณจำนวนวันที่ไม่ออกจากวันที่ออกล่าสุดในดัชนี
+        for number, last_date in self.index.last_appearances(number_type).items():
             cold_numbers.append({
                 'number': number,
-                'days': days_since,
+                'days': (today - last_date).days,
                 'last_date': last_date.strftime('%d/%m/%Y')
             })
         
@@ -102,70 +123,33 @@ class StatsCalculator:
     
     def get_monthly_statistics(self):
         """สถิติรายเดือน - จัดกลุ่มตามเดือน (ไม่แยกปี)"""
-        # Thai month names
-        thai_months = {
-            1: 'มกราคม', 2: 'กุมภาพันธ์', 3: 'มีนาคม', 4: 'เมษายน',
-            5: 'พฤษภาคม', 6: 'มิถุนายน', 7: 'กรกฎาคม', 8: 'สิงหาคม',
-            9: 'กันยายน', 10: 'ตุลาคม', 11: 'พฤศจิกายน', 12: 'ธันวาคม'
-        }
-        
-        monthly_stats = {}
-        
-        for draw in self.all_draws:
-            month_num = draw.draw_date.month
-            month_name = thai_months[month_num]
-            
-            if month_name not in monthly_stats:
-                monthly_stats[month_name] = {
-                    'draws': [],  # เก็บข้อมูลการจับสลากแต่ละงวด
-                    'numbers_2d': [],
-                    'numbers_3d': [],
-                    'month_number': month_num  # เก็บหมายเลขเดือนสำหรับเรียงลำดับ
-                }
-            
-            # เก็บข้อมูลการจับสลาก
-            monthly_stats[month_name]['draws'].append({
-                'date': draw.draw_date,
-                'date_str': draw.draw_date.strftime('%d/%m/%Y')
-            })
-            
-            # เก็บเลขที่ออก
-            monthly_stats[month_name]['numbers_2d'].append(draw.two_digit)
-            monthly_stats[month_name]['numbers_2d'].extend(draw.get_all_two_digits())
-            monthly_stats[month_name]['numbers_3d'].extend(draw.get_all_three_digits())
-        
-        # หาเลขที่ออกบ่อยที่สุดในแต่ละเดือน
+        matrix = self.matrix
         result = {}
-        for month, data in monthly_stats.items():
-            counter_2d = Counter(data['numbers_2d'])
-            counter_3d = Counter(data['numbers_3d'])
-            
-            most_common_2d = counter_2d.most_common(1)
-            most_common_3d = counter_3d.most_common(1)
+        
+        # วนตามลำดับเดือน (มกราคม, กุมภาพันธ์, ...) เฉพาะเดือนที่มีข้อมูล
+        for month_num in np.unique(matrix.months):
+            month_num = int(month_num)
+            rows = np.flatnonzero(matrix.months == month_num)
             
-            # เรียงลำดับงวดตามวันที่ (ใหม่สุดก่อน)
-            sorted_draws = sorted(data['draws'], key=lambda x: x['date'], reverse=True)
+            most_common_2d = DrawMatrix.rank(matrix.numbers('2D', rows), 100, 1)
+            most_common_3d = DrawMatrix.rank(matrix.numbers('3D', rows), 1000, 1)
             
-            result[month] = {
-                'month_number': data['month_number'],  # สำหรับเรียงลำดับ
-                'total_draws': len(data['draws']),
-                'draw_dates': [d['date_str'] for d in sorted_draws[:5]],  # แสดง 5 งวดล่าสุด
+            result[THAI_MONTHS[month_num]] = {
+                'month_number': month_num,  # สำหรับเรียงลำดับ
+                'total_draws': len(rows),
+                # งวดเรียงจากใหม่สุดอยู่แล้ว แสดง 5 งวดล่าสุด
+                'draw_dates': [matrix.dates[i].strftime('%d/%m/%Y') for i in rows[:5]],
                 'most_common_2d': {
-                    'number': most_common_2d[0][0] if most_common_2d else None,
+                    'number': self._format(most_common_2d[0][0], '2D') if most_common_2d else None,
                     'count': most_common_2d[0][1] if most_common_2d else 0
                 },
                 'most_common_3d': {
-                    'number': most_common_3d[0][0] if most_common_3d else None,
+                    'number': self._format(most_common_3d[0][0], '3D') if most_common_3d else None,
                     'count': most_common_3d[0][1] if most_common_3d else 0
                 }
             }
         
-        # เรียงลำดับตามเดือน (มกราคม, กุมภาพันธ์, ...)
-        sorted_result = {}
-        for month in sorted(result.keys(), key=lambda x: result[x]['month_number']):
-            sorted_result[month] = result[month]
-        
-        return sorted_result
+        return result
     
     def get_number_statistics(self, number):
         """สถิติของเลขที่เจาะจง"""
@@ -179,66 +163,44 @@ class StatsCalculator:
             'min_gap': 999
         }
         
-        appearances = []
-        
-        for draw in self.all_draws:
-            found = False
-            
-            if len(number) == 2:
-                if number == draw.two_digit or number in draw.get_all_two_digits():
-                    found = True
-            else:
-                if number in draw.get_all_three_digits():
-                    found = True
-            
-            if found:
-                appearances.append(draw.draw_date)
+        ordinals = self.index.ordinals(number)
         
-        if appearances:
-            stats['total_appearances'] = len(appearances)
+        if len(ordinals):
+            appearances = self.index.appearance_dates(number)
+            stats['total_appearances'] = len(ordinals)
             stats['last_appeared'] = appearances[0]
             stats['days_since_last'] = (datetime.now().date() - appearances[0]).days
             stats['appearance_dates'] = [d.strftime('%d/%m/%Y') for d in appearances[:10]]
             
             # คำนวณระยะห่าง
-            if len(appearances) > 1:
-                gaps = []
-                for i in range(len(appearances) - 1):
-                    gap = (appearances[i] - appearances[i + 1]).days
-                    gaps.append(gap)
-                
-                stats['average_gap'] = round(sum(gaps) / len(gaps), 2)
-                stats['max_gap'] = max(gaps)
-                stats['min_gap'] = min(gaps)
+            if len(ordinals) > 1:
+                gaps = ordinals[:-1] - ordinals[1:]
+                stats['average_gap'] = round(int(gaps.sum()) / len(gaps), 2)
+                stats['max_gap'] = int(gaps.max())
+                stats['min_gap'] = int(gaps.min())
         
         return stats
     
     def get_statistics_summary(self):
         """สรุปสถิติทั้งหมด"""
-        total_draws = self.all_draws.count()
+        matrix = self.matrix
+        total_draws = len(matrix)
         
         if total_draws == 0:
             return None
         
         # หาเลขที่ออกบ่อยที่สุดตลอดกาล
-        all_2d_counter = Counter()
-        all_3d_counter = Counter()
-        
-        for draw in self.all_draws:
-            all_2d_counter[draw.two_digit] += 1
-            for num in draw.get_all_two_digits():
-                all_2d_counter[num] += 1
-            for num in draw.get_all_three_digits():
-                all_3d_counter[num] += 1
+        top_2d = DrawMatrix.rank(matrix.numbers('2D'), 100, 1)
+        top_3d = DrawMatrix.rank(matrix.numbers('3D'), 1000, 1)
         
-        most_common_2d = all_2d_counter.most_common(1)[0] if all_2d_counter else (None, 0)
-        most_common_3d = all_3d_counter.most_common(1)[0] if all_3d_counter else (None, 0)
+        most_common_2d = (self._format(top_2d[0][0], '2D'), top_2d[0][1]) if top_2d else (None, 0)
+        most_common_3d = (self._format(top_3d[0][0], '3D'), top_3d[0][1]) if top_3d else (None, 0)
         
         return {
             'total_draws': total_draws,
             'date_range': {
-                'from': self.all_draws.last().draw_date.strftime('%d/%m/%Y') if self.all_draws.last() else None,
-                'to': self.all_draws.first().draw_date.strftime('%d/%m/%Y') if self.all_draws.first() else None
+                'from': matrix.dates[-1].strftime('%d/%m/%Y'),
+                'to': matrix.dates[0].strftime('%d/%m/%Y')
             },
             'most_common_all_time': {
                 '2d': {'number': most_common_2d[0], 'count': most_common_2d[1]},
@@ -248,112 +210,58 @@ class StatsCalculator:
     
     def get_running_number_stats(self):
         """สถิติเลขวิ่ง (0-9) ที่ออกในรางวัลเลขท้าย 2 ตัว และรางวัลที่ 1"""
+        today = datetime.now().date()
+        tail_counts, prize_counts, first_rows = self.matrix.digit_presence()
         digit_stats = {}
         
-        # Initialize counters for each digit
         for digit in range(10):
+            row = int(first_rows[digit])
+            last_appeared = self.matrix.dates[row] if row >= 0 else None
             digit_stats[str(digit)] = {
-                'two_digit_count': 0,
-                'first_prize_count': 0,
-                'total_count': 0,
-                'last_appeared': None,
-                'days_since_last': 0
+                'two_digit_count': int(tail_counts[digit]),
+                'first_prize_count': int(prize_counts[digit]),
+                'total_count': int(tail_counts[digit] + prize_counts[digit]),
+                'last_appeared': last_appeared,
+                'days_since_last': (today - last_appeared).days if last_appeared else 999,
+                'last_appeared_str': last_appeared.strftime('%d/%m/%Y') if last_appeared else '-'
             }
         
-        today = datetime.now().date()
-        
-        for draw in self.all_draws:
-            # Count digits in two_digit (last 2 digits)
-            for digit_char in draw.two_digit:
-                digit_stats[digit_char]['two_digit_count'] += 1
-                digit_stats[digit_char]['total_count'] += 1
-                if digit_stats[digit_char]['last_appeared'] is None:
-                    digit_stats[digit_char]['last_appeared'] = draw.draw_date
-            
-            # Count digits in first prize
-            for digit_char in draw.first_prize:
-                digit_stats[digit_char]['first_prize_count'] += 1
-                digit_stats[digit_char]['total_count'] += 1
-                if digit_stats[digit_char]['last_appeared'] is None:
-                    digit_stats[digit_char]['last_appeared'] = draw.draw_date
-        
-        # Calculate days since last appearance
-        for digit in digit_stats:
-            if digit_stats[digit]['last_appeared']:
-                digit_stats[digit]['days_since_last'] = (today - digit_stats[digit]['last_appeared']).days
-                digit_stats[digit]['last_appeared_str'] = digit_stats[digit]['last_appeared'].strftime('%d/%m/%Y')
-            else:
-                digit_stats[digit]['days_since_last'] = 999
-                digit_stats[digit]['last_appeared_str'] = '-'
-        
         return digit_stats
     
-    def get_double_number_stats(self, days_back=365):
-        """สถิติเลขเบิ้ล/เลขหาม (เลขซ้ำ เช่น 22, 99, 111)"""
+    def _collect_pattern_stats(self, pattern_stats, days_back):
+        """นับการออกของเลขรูปแบบพิเศษ (เบิ้ล/เรียง) ในช่วงเวลาที่กำหนด"""
         cutoff_date = datetime.now().date() - timedelta(days=days_back)
-        recent_draws = self.all_draws.filter(draw_date__gte=cutoff_date)
-        
-        double_stats = {
-            '2d': {},  # เลขเบิ้ล 2 ตัว (00, 11, 22, ..., 99)
-            '3d': {}   # เลขเบิ้ล 3 ตัว (000, 111, 222, ..., 999)
-        }
+        window = self.matrix.rows_since(cutoff_date)
         
-        # Initialize 2D doubles
-        for i in range(10):
-            double_num = str(i) + str(i)
-            double_stats['2d'][double_num] = {
-                'count': 0,
-                'last_appeared': None,
-                'appearances': []
-            }
-        
-        # Initialize 3D doubles
-        for i in range(10):
-            double_num = str(i) + str(i) + str(i)
-            double_stats['3d'][double_num] = {
-                'count': 0,
-                'last_appeared': None,
-                'appearances': []
-            }
-        
-        for draw in recent_draws:
-            # Check 2D doubles in two_digit and first_prize
-            if draw.two_digit in double_stats['2d']:
-                double_stats['2d'][draw.two_digit]['count'] += 1
-                double_stats['2d'][draw.two_digit]['last_appeared'] = draw.draw_date
-                double_stats['2d'][draw.two_digit]['appearances'].append({
-                    'date': draw.draw_date.strftime('%d/%m/%Y'),
-                    'type': 'เลขท้าย 2 ตัว'
-                })
-            
-            # Check 2D doubles in first prize
-            for i in range(len(draw.first_prize) - 1):
-                two_digit = draw.first_prize[i:i+2]
-                if two_digit in double_stats['2d']:
-                    double_stats['2d'][two_digit]['count'] += 1
-                    double_stats['2d'][two_digit]['last_appeared'] = draw.draw_date
-                    double_stats['2d'][two_digit]['appearances'].append({
-                        'date': draw.draw_date.strftime('%d/%m/%Y'),
-                        'type': f'รางวัลที่ 1 (ตำแหน่ง {i+1}-{i+2})'
-                    })
+        for category, number_type in (('2d', '2D'), ('3d', '3D')):
+            category_stats = pattern_stats[category]
+            targets = [int(number) for number in category_stats]
+            values = self.matrix.numbers(number_type, slice(0, window))
+            rows, slots = self.matrix.hits(values, targets)
             
-            # Check 3D doubles in three digit prizes
-            for three_digit in draw.get_all_three_digits():
-                if len(three_digit) >= 3:
-                    three_num = three_digit[:3]
-                    if three_num in double_stats['3d']:
-                        double_stats['3d'][three_num]['count'] += 1
-                        double_stats['3d'][three_num]['last_appeared'] = draw.draw_date
-                        double_stats['3d'][three_num]['appearances'].append({
-                            'date': draw.draw_date.strftime('%d/%m/%Y'),
-                            'type': 'รางวัล 3 ตัว'
-                        })
+            for row, slot in zip(rows, slots):
+                draw_date = self.matrix.dates[row]
+                if number_type == '3D':
+                    appearance_type = 'รางวัล 3 ตัว'
+                elif slot == 0:
+                    appearance_type = 'เลขท้าย 2 ตัว'
+                else:
+                    appearance_type = f'รางวัลที่ 1 (ตำแหน่ง {slot}-{slot + 1})'
+                
+                stats = category_stats[self._format(values[row, slot], number_type)]
+                stats['count'] += 1
+                # คงพฤติกรรมเดิม: เก็บวันที่ของรายการสุดท้ายที่วนถึง
+                stats['last_appeared'] = draw_date
+                stats['appearances'].append({
+                    'date': draw_date.strftime('%d/%m/%Y'),
+                    'type': appearance_type
+                })
         
         # Calculate days since last appearance
         today = datetime.now().date()
-        for category in double_stats:
-            for number in double_stats[category]:
-                stats = double_stats[category][number]
+        for category in pattern_stats:
+            for number in pattern_stats[category]:
+                stats = pattern_stats[category][number]
                 if stats['last_appeared']:
                     stats['days_since_last'] = (today - stats['last_appeared']).days
                     stats['last_appeared_str'] = stats['last_appeared'].strftime('%d/%m/%Y')
@@ -361,101 +269,49 @@ class StatsCalculator:
                     stats['days_since_last'] = 999
                     stats['last_appeared_str'] = '-'
         
-        return double_stats
+        return pattern_stats
     
-    def get_sequential_number_stats(self, days_back=365):
-        """สถิติเลขเรียง (เลขต่อเนื่อง เช่น 123, 234, 456, 789)"""
-        cutoff_date = datetime.now().date() - timedelta(days=days_back)
-        recent_draws = self.all_draws.filter(draw_date__gte=cutoff_date)
+    def get_double_number_stats(self, days_back=365):
+        """สถิติเลขเบิ้ล/เลขหาม (เลขซ้ำ เช่น 22, 99, 111)"""
+        double_stats = {
+            '2d': {},  # เลขเบิ้ล 2 ตัว (00, 11, 22, ..., 99)
+            '3d': {}   # เลขเบิ้ล 3 ตัว (000, 111, 222, ..., 999)
+        }
         
-        def is_sequential(number_str):
-            """ตรวจสอบว่าเป็นเลขเรียงหรือไม่"""
-            if len(number_str) < 2:
-                return False
-            
-            digits = [int(d) for d in number_str]
-            # ตรวจสอบเลขเรียงขึ้น (เช่น 123, 234)
-            ascending = all(digits[i] + 1 == digits[i + 1] for i in range(len(digits) - 1))
-            # ตรวจสอบเลขเรียงลง (เช่น 321, 987)
-            descending = all(digits[i] - 1 == digits[i + 1] for i in range(len(digits) - 1))
-            
-            return ascending or descending
+        for i in range(10):
+            for category, width in (('2d', 2), ('3d', 3)):
+                double_stats[category][str(i) * width] = {
+                    'count': 0,
+                    'last_appeared': None,
+                    'appearances': []
+                }
         
+        return self._collect_pattern_stats(double_stats, days_back)
+    
+    def get_sequential_number_stats(self, days_back=365):
+        """สถิติเลขเรียง (เลขต่อเนื่อง เช่น 123, 234, 456, 789)"""
         sequential_stats = {
             '2d': {},
             '3d': {}
         }
         
         # Generate all possible sequential numbers
-        # 2-digit sequences
         for i in range(10):
             for j in [-1, 1]:  # ascending and descending
+                seq_type = 'เรียงขึ้น' if j == 1 else 'เรียงลง'
                 if 0 <= i + j <= 9:
-                    seq_num = str(i) + str(i + j)
-                    if seq_num not in sequential_stats['2d']:
-                        sequential_stats['2d'][seq_num] = {
-                            'count': 0,
-                            'last_appeared': None,
-                            'appearances': [],
-                            'type': 'เรียงขึ้น' if j == 1 else 'เรียงลง'
-                        }
-        
-        # 3-digit sequences
-        for i in range(10):
-            for j in [-1, 1]:  # ascending and descending
-                if 0 <= i + j <= 9 and 0 <= i + 2*j <= 9:
-                    seq_num = str(i) + str(i + j) + str(i + 2*j)
-                    if seq_num not in sequential_stats['3d']:
-                        sequential_stats['3d'][seq_num] = {
+                    sequential_stats['2d'][str(i) + str(i + j)] = {
+                        'count': 0,
+                        'last_appeared': None,
+                        'appearances': [],
+                        'type': seq_type
+                    }
+                    if 0 <= i + 2*j <= 9:
+                        sequential_stats['3d'][str(i) + str(i + j) + str(i + 2*j)] = {
                             'count': 0,
                             'last_appeared': None,
                             'appearances': [],
-                            'type': 'เรียงขึ้น' if j == 1 else 'เรียงลง'
+                            'type': seq_type
                         }
         
-        for draw in recent_draws:
-            # Check 2D sequences in two_digit
-            if draw.two_digit in sequential_stats['2d']:
-                sequential_stats['2d'][draw.two_digit]['count'] += 1
-                sequential_stats['2d'][draw.two_digit]['last_appeared'] = draw.draw_date
-                sequential_stats['2d'][draw.two_digit]['appearances'].append({
-                    'date': draw.draw_date.strftime('%d/%m/%Y'),
-                    'type': 'เลขท้าย 2 ตัว'
-                })
-            
-            # Check 2D sequences in first prize
-            for i in range(len(draw.first_prize) - 1):
-                two_digit = draw.first_prize[i:i+2]
-                if two_digit in sequential_stats['2d']:
-                    sequential_stats['2d'][two_digit]['count'] += 1
-                    sequential_stats['2d'][two_digit]['last_appeared'] = draw.draw_date
-                    sequential_stats['2d'][two_digit]['appearances'].append({
-                        'date': draw.draw_date.strftime('%d/%m/%Y'),
-                        'type': f'รางวัลที่ 1 (ตำแหน่ง {i+1}-{i+2})'
-                    })
-            
-            # Check 3D sequences in three digit prizes
-            for three_digit in draw.get_all_three_digits():
-                if len(three_digit) >= 3:
-                    three_num = three_digit[:3]
-                    if three_num in sequential_stats['3d']:
-                        sequential_stats['3d'][three_num]['count'] += 1
-                        sequential_stats['3d'][three_num]['last_appeared'] = draw.draw_date
-                        sequential_stats['3d'][three_num]['appearances'].append({
-                            'date': draw.draw_date.strftime('%d/%m/%Y'),
-                            'type': 'รางวัล 3 ตัว'
-                        })
-        
-        # Calculate days since last appearance
-        today = datetime.now().date()
-        for category in sequential_stats:
-            for number in sequential_stats[category]:
-                stats = sequential_stats[category][number]
-                if stats['last_appeared']:
-                    stats['days_since_last'] = (today - stats['last_appeared']).days
-                    stats['last_appeared_str'] = stats['last_appeared'].strftime('%d/%m/%Y')
-                else:
-                    stats['days_since_last'] = 999
-                    stats['last_appeared_str'] = '-'
-        
-        return sequential_stats
\ No newline at end of file
+        return self._collect_pattern_stats(sequential_stats, days_back)
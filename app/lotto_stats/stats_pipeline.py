@@ -0,0 +1,98 @@
+"""
+Stats Pipeline - รวมการคำนวณสถิติทุกแผงให้ใช้การอ่านประวัติการออกรางวัลครั้งเดียว
+แต่ละสถิติลงทะเบียนเป็น collector ที่รับ StatsCalculator ซึ่งใช้ DrawMatrix ร่วมกัน
+"""
+
+import logging
+
+from .draw_matrix import DrawMatrix
+from .models import LotteryDraw
+from .stats_calculator import StatsCalculator
+
+logger = logging.getLogger(__name__)
+
+# ชื่อ collector -> (ฟังก์ชัน, ค่าพารามิเตอร์เริ่มต้น)
+COLLECTORS = {}
+
+
+def register_collector(name, **defaults):
+    """ลงทะเบียนสถิติใหม่ให้ pipeline คำนวณ (ไม่ต้องเพิ่มการอ่านตารางใหม่)"""
+    def decorator(func):
+        COLLECTORS[name] = (func, defaults)
+        return func
+    return decorator
+
+
+@register_collector('hot', limit=10, days=90, number_type='2D')
+def collect_hot(calculator, **params):
+    return calculator.get_hot_numbers(**params)
+
+
+@register_collector('cold', limit=10, number_type='2D')
+def collect_cold(calculator, **params):
+    return calculator.get_cold_numbers(**params)
+
+
+@register_collector('monthly')
+def collect_monthly(calculator):
+    return calculator.get_monthly_statistics()
+
+
+@register_collector('summary')
+def collect_summary(calculator):
+    return calculator.get_statistics_summary()
+
+
+@register_collector('running')
+def collect_running(calculator):
+    return calculator.get_running_number_stats()
+
+
+@register_collector('double', days_back=365)
+def collect_double(calculator, **params):
+    return calculator.get_double_number_stats(**params)
+
+
+@register_collector('sequential', days_back=365)
+def collect_sequential(calculator, **params):
+    return calculator.get_sequential_number_stats(**params)
+
+
+class StatsPipeline:
+    """อ่านประวัติการออกรางวัลด้วย query เดียว แล้วส่งให้ทุก collector"""
+
+    def __init__(self, queryset=None):
+        self.queryset = queryset if queryset is not None else LotteryDraw.objects.all()
+        self.matrix = None
+
+    def run(self, collectors=None, params=None, recent_limit=10):
+        """
+        คำนวณสถิติทั้งหมดและคืนค่าเป็น bundle เดียว
+        collectors: รายชื่อ collector ที่ต้องการ (None = ทั้งหมด)
+        params: ค่าพารามิเตอร์เฉพาะ collector เช่น {'hot': {'days': 30}}
+        """
+        params = params or {}
+        self.matrix = DrawMatrix.from_queryset(self.queryset)
+        calculator = StatsCalculator(matrix=self.matrix)
+
+        bundle = {
+            'draw_count': len(self.matrix),
+            'recent_draws': self.recent_draws(recent_limit),
+        }
+
+        for name in collectors or COLLECTORS:
+            func, defaults = COLLECTORS[name]
+            try:
+                bundle[name] = func(calculator, **{**defaults, **params.get(name, {})})
+            except Exception as e:
+                logger.error(f"เกิดข้อผิดพลาดในการคำนวณสถิติ {name}: {e}")
+                bundle[name] = None
+
+        return bundle
+
+    def recent_draws(self, limit=10):
+        """งวดล่าสุดจากข้อมูลที่โหลดไว้แล้ว (ไม่ query ซ้ำ)"""
+        return [
+            LotteryDraw(**dict(zip(DrawMatrix.FIELDS, row)))
+            for row in self.matrix.rows[:limit]
+        ]
@@ -1,3 +1,572 @@
+from django.core.cache import cache
+from django.db.models import Q
 from django.test import TestCase
+from django.urls import reverse
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from lotto_stats.models import DrawNumber, LotteryDraw, NumberStatistics
+from lottery_checker.jobs import JobProgress
+from lottery_checker.models import BackgroundJob, LottoResult
+from lotto_stats.count_matrix import CountMatrix, get_count_matrix, reset_count_matrix
+from lotto_stats.draw_matrix import DrawMatrix
+from lotto_stats.draw_numbers import appearance_dates, backfill_draw_numbers, draws_containing
+from lotto_stats.appearance_index import (
+    AppearanceIndex, get_appearance_index, reset_appearance_index
+)
+from lotto_stats.lotto_sync_service import LottoSyncService
+from lotto_stats.number_stats import NumberStatsUpdater
+from lotto_stats.stats_cache import CachedStatsCalculator, invalidate_stats_cache, stats_cache
+from lotto_stats.stats_calculator import StatsCalculator
+from lotto_stats.stats_pipeline import COLLECTORS, StatsPipeline, register_collector
+
+
+class DrawMatrixTests(TestCase):
+    """Test the vectorized draw matrix"""
+
+    def setUp(self):
+        """Set up test data"""
+        reset_appearance_index()
+        reset_count_matrix()
+        today = date.today()
+        self.draws = [
+            (today - timedelta(days=1), '123456', '99', '111,234', '567,890'),
+            (today - timedelta(days=17), '654321', '12', '', '123,321'),
+            (today - timedelta(days=400), '999999', '99', '000', '555'),
+        ]
+        for draw_date, first_prize, two_digit, front, back in self.draws:
+            LotteryDraw.objects.create(
+                draw_date=draw_date,
+                draw_round=draw_date.strftime('%d/%m/%Y'),
+                first_prize=first_prize,
+                two_digit=two_digit,
+                three_digit_front=front,
+                three_digit_back=back
+            )
+
+    def tearDown(self):
+        reset_appearance_index()
+        reset_count_matrix()
+
+    def test_matrix_layout(self):
+        """Test that pairs and three digit slots follow the draw order"""
+        matrix = DrawMatrix(self.draws)
+        self.assertEqual(len(matrix), 3)
+        self.assertEqual(matrix.pairs[0].tolist(), [99, 12, 23, 34, 45, 56])
+        self.assertEqual(matrix.three_digits[1].tolist(), [123, 321, -1, -1])
+
+    def test_rank_breaks_ties_by_first_seen(self):
+        """Test that rank matches Counter.most_common ordering"""
+        matrix = DrawMatrix(self.draws)
+        ranked = DrawMatrix.rank(matrix.pairs, 100)
+        self.assertEqual(ranked[0], (99, 7))
+        self.assertEqual(ranked[1], (12, 2))
+
+    def test_hot_numbers(self):
+        """Test hot numbers within a window"""
+        hot = StatsCalculator().get_hot_numbers(limit=2, days=30)
+        self.assertEqual(hot[0], {'number': '12', 'count': 2, 'percentage': 100.0})
+        self.assertEqual(hot[1], {'number': '99', 'count': 1, 'percentage': 50.0})
+
+    def test_number_statistics(self):
+        """Test statistics for a specific number"""
+        stats = StatsCalculator().get_number_statistics('99')
+        self.assertEqual(stats['total_appearances'], 2)
+        self.assertEqual(stats['last_appeared'], self.draws[0][0])
+        self.assertEqual(stats['max_gap'], 399)
+
+    def test_cold_numbers_use_latest_appearance(self):
+        """Test cold numbers report the most recent draw of each number"""
+        cold = StatsCalculator().get_cold_numbers(limit=100, number_type='3D')
+        by_number = {item['number']: item for item in cold}
+        self.assertEqual(by_number['000']['days'], 400)
+        self.assertEqual(by_number['123']['days'], 17)
+
+    def test_double_stats(self):
+        """Test double number stats keep per-slot appearance types"""
+        stats = StatsCalculator().get_double_number_stats(days_back=30)
+        self.assertEqual(stats['2d']['99']['count'], 1)
+        self.assertEqual(stats['2d']['99']['appearances'][0]['type'], 'เลขท้าย 2 ตัว')
+        self.assertEqual(stats['3d']['111']['count'], 1)
+        self.assertEqual(stats['3d']['000']['count'], 0)
+
+    def test_empty_database(self):
+        """Test calculator with no draws"""
+        LotteryDraw.objects.all().delete()
+        calculator = StatsCalculator()
+        self.assertEqual(calculator.get_hot_numbers(), [])
+        self.assertIsNone(calculator.get_statistics_summary())
+        self.assertEqual(calculator.get_cold_numbers(), [])
+
+
+class AppearanceIndexTests(TestCase):
+    """Test the per-number appearance index"""
+
+    def setUp(self):
+        """Set up test data"""
+        reset_appearance_index()
+        reset_count_matrix()
+        self.today = date.today()
+        self.draws = [
+            (self.today - timedelta(days=16), '121212', '12', '123', '456'),
+            (self.today - timedelta(days=47), '345678', '12', '456', '789'),
+        ]
+        self.index = AppearanceIndex(DrawMatrix(self.draws))
+
+    def tearDown(self):
+        reset_appearance_index()
+        reset_count_matrix()
+
+    def test_dates_are_unique_per_draw(self):
+        """Test a number appearing in several slots of a draw is indexed once"""
+        self.assertEqual(self.index.appearance_dates('12'), [self.draws[0][0], self.draws[1][0]])
+        self.assertEqual(self.index.last_appeared('456'), self.draws[0][0])
+        self.assertIsNone(self.index.last_appeared('00'))
+        self.assertEqual(len(self.index.ordinals('abc')), 0)
+
+    def test_shared_index_follows_saved_draws(self):
+        """Test the shared index is rebuilt after a draw is saved in this process"""
+        self.assertIsNone(get_appearance_index().last_appeared('77'))
+        LottoSyncService().save_draw(self.today, {'draw_round': 'x', 'first_prize': '777777', 'two_digit': '77'})
+        self.assertEqual(get_appearance_index().last_appeared('77'), self.today)
+        self.assertEqual(StatsCalculator().get_number_statistics('77')['total_appearances'], 1)
+
+    def test_shared_index_rebuilds_when_draw_version_changes(self):
+        """Test draws saved by another process reach the shared index via the draw version"""
+        self.assertIsNone(get_appearance_index().last_appeared('77'))
+        # saved without resetting this process (as another process would), then the cached version expires
+        LotteryDraw.objects.create(
+            draw_date=self.today, draw_round='x', first_prize='777777', two_digit='77'
+        )
+        invalidate_stats_cache()
+        self.assertEqual(get_appearance_index().last_appeared('77'), self.today)
+
+
+class StatsPipelineTests(TestCase):
+    """Test the single-pass statistics pipeline"""
+
+    def setUp(self):
+        """Set up test data"""
+        reset_appearance_index()
+        reset_count_matrix()
+        today = date.today()
+        for i, first_prize in enumerate(['123456', '654321', '112233']):
+            LotteryDraw.objects.create(
+                draw_date=today - timedelta(days=16 * i + 1),
+                draw_round=str(i),
+                first_prize=first_prize,
+                two_digit=first_prize[-2:],
+                three_digit_front='123',
+                three_digit_back='456,789'
+            )
+
+    def tearDown(self):
+        reset_appearance_index()
+        reset_count_matrix()
+
+    def test_bundle_matches_calculator(self):
+        """Test that every collector matches the calculator output"""
+        with self.assertNumQueries(1):
+            bundle = StatsPipeline().run()
+        calculator = StatsCalculator()
+        self.assertEqual(bundle['draw_count'], 3)
+        self.assertEqual(bundle['hot'], calculator.get_hot_numbers(limit=10, days=90))
+        self.assertEqual(bundle['cold'], calculator.get_cold_numbers(limit=10))
+        self.assertEqual(bundle['monthly'], calculator.get_monthly_statistics())
+        self.assertEqual(bundle['summary'], calculator.get_statistics_summary())
+        self.assertEqual(bundle['double'], calculator.get_double_number_stats())
+        self.assertEqual(bundle['recent_draws'][0].get_three_digit_back_list(), ['456', '789'])
+
+    def test_registered_collector_and_params(self):
+        """Test adding a collector and overriding parameters"""
+        register_collector('draw_total')(lambda calculator: len(calculator.matrix))
+        try:
+            bundle = StatsPipeline().run(
+                collectors=['hot', 'draw_total'], params={'hot': {'limit': 1}}
+            )
+        finally:
+            COLLECTORS.pop('draw_total')
+        self.assertEqual(bundle['draw_total'], 3)
+        self.assertEqual(len(bundle['hot']), 1)
+        self.assertNotIn('monthly', bundle)
+
+    def test_statistics_page_queries(self):
+        """Test the statistics page reads the draw history once, then serves from cache"""
+        cache.clear()
+        # เวอร์ชันของประวัติ + ประวัติการออกรางวัล + สถานะ lottery_checker
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('lotto_stats:statistics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['sync_status']['lotto_stats']['total_records'], 3)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('lotto_stats:statistics'))
+        self.assertEqual(response.context['sync_status']['lotto_stats']['total_records'], 3)
+
+
+class NumberStatsUpdaterTests(TestCase):
+    """Test incremental NumberStatistics maintenance"""
+
+    def setUp(self):
+        """Set up test data"""
+        reset_appearance_index()
+        reset_count_matrix()
+        self.today = date.today()
+        self.service = LottoSyncService()
+        self.save(self.today - timedelta(days=32), '000012', '12', '123', '')
+        self.save(self.today - timedelta(days=16), '000034', '34', '', '')
+
+    def tearDown(self):
+        reset_appearance_index()
+        reset_count_matrix()
+
+    def save(self, draw_date, first_prize, two_digit, front, back):
+        return self.service.save_draw(draw_date, {
+            'draw_round': draw_date.strftime('%d/%m/%Y'),
+            'first_prize': first_prize,
+            'two_digit': two_digit,
+            'three_digit_front': front,
+            'three_digit_back': back,
+        })
+
+    def snapshot(self):
+        return {
+            stats.number: (
+                stats.total_appearances, stats.last_appeared,
+                stats.max_consecutive, stats.current_streak, stats.average_gap
+            )
+            for stats in NumberStatistics.objects.all()
+        }
+
+    def test_new_draw_updates_only_its_numbers(self):
+        """Test a newer draw touches only the numbers it contains"""
+        before = NumberStatistics.objects.get(number='34').updated_at
+        self.save(self.today, '000012', '12', '', '')
+
+        stats = NumberStatistics.objects.get(number='12')
+        self.assertEqual(stats.total_appearances, 2)
+        self.assertEqual(stats.last_appeared, self.today)
+        self.assertEqual(stats.current_streak, 1)
+        self.assertEqual(stats.average_gap, 32)
+        self.assertEqual(NumberStatistics.objects.get(number='34').updated_at, before)
+
+    def test_incremental_matches_rebuild(self):
+        """Test incremental updates agree with a full rebuild"""
+        self.save(self.today - timedelta(days=1), '123434', '34', '012', '')
+        self.save(self.today - timedelta(days=1), '123434', '34', '', '')
+        self.save(self.today - timedelta(days=60), '000099', '99', '', '')
+        incremental = self.snapshot()
+
+        NumberStatistics.objects.all().delete()
+        NumberStatsUpdater().rebuild()
+        self.assertEqual(incremental, self.snapshot())
+        self.assertEqual(incremental['34'][2], 2)
+        self.assertNotIn('012', incremental)
+
+
+class StatsCacheTests(TestCase):
+    """Test the draw-version-keyed statistics cache"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        reset_appearance_index()
+        reset_count_matrix()
+        stats_cache.reset_stats()
+        self.today = date.today()
+        self.service = LottoSyncService()
+        self.service.save_draw(self.today - timedelta(days=16), {
+            'draw_round': '1', 'first_prize': '123456', 'two_digit': '56',
+            'three_digit_front': '123', 'three_digit_back': '456',
+        })
+
+    def tearDown(self):
+        cache.clear()
+        reset_appearance_index()
+        reset_count_matrix()
+
+    def test_cached_calculator_hits(self):
+        """Test repeated calls are served without touching the database"""
+        calculator = CachedStatsCalculator()
+        first = calculator.get_hot_numbers(limit=5, days=30)
+        with self.assertNumQueries(0):
+            self.assertEqual(CachedStatsCalculator().get_hot_numbers(limit=5, days=30), first)
+        self.assertEqual(first, StatsCalculator().get_hot_numbers(limit=5, days=30))
+
+        counters = stats_cache.stats()
+        self.assertEqual((counters['hits'], counters['misses']), (1, 1))
+        calculator.get_hot_numbers(limit=3, days=30)
+        self.assertEqual(stats_cache.stats()['misses'], 2)
+
+    def test_sync_invalidates_results(self):
+        """Test saving a draw makes cached results stale"""
+        url = reverse('lotto_stats:api_number_detail', args=['77'])
+        self.assertEqual(self.client.get(url).json()['statistics']['total_appearances'], 0)
+
+        self.service.save_draw(self.today, {
+            'draw_round': '2', 'first_prize': '000077', 'two_digit': '77',
+            'three_digit_front': '', 'three_digit_back': '',
+        })
+        self.assertEqual(self.client.get(url).json()['statistics']['total_appearances'], 1)
+
+        response = self.client.get(reverse('lotto_stats:api_cache_stats'))
+        self.assertEqual(response.json()['cache']['by_name']['number_detail'], {'hits': 0, 'misses': 2})
+
+    def test_stats_endpoints_revalidate_with_etag(self):
+        """Test repeat requests get 304 until a new draw changes the version"""
+        url = reverse('lotto_stats:api_hot_cold')
+        first = self.client.get(url, {'days': 30})
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('s-maxage=600', first['Cache-Control'])
+
+        with self.assertNumQueries(0):
+            repeat = self.client.get(url, {'days': 30}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(repeat.content, b'')
+        self.assertNotEqual(self.client.get(url, {'days': 7})['ETag'], first['ETag'])
+
+        self.service.save_draw(self.today, {
+            'draw_round': '2', 'first_prize': '000077', 'two_digit': '77',
+            'three_digit_front': '', 'three_digit_back': '',
+        })
+        self.assertEqual(self.client.get(url, {'days': 30}, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+
+
+class DrawNumberTests(TestCase):
+    """Test the normalized per-draw number table"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        reset_appearance_index()
+        reset_count_matrix()
+        self.today = date.today()
+        self.service = LottoSyncService()
+        self.service.save_draw(self.today - timedelta(days=16), {
+            'draw_round': '1', 'first_prize': '125959', 'two_digit': '59',
+            'three_digit_front': '123,456', 'three_digit_back': '789,123',
+        })
+        self.service.save_draw(self.today - timedelta(days=1), {
+            'draw_round': '2', 'first_prize': '000001', 'two_digit': '12',
+            'three_digit_front': '', 'three_digit_back': '123',
+        })
+
+    def tearDown(self):
+        cache.clear()
+        reset_appearance_index()
+        reset_count_matrix()
+
+    def test_rows_per_slot(self):
+        """Test every 2D/3D slot of a draw becomes a row"""
+        rows = DrawNumber.objects.filter(draw_date=self.today - timedelta(days=16))
+        self.assertEqual(rows.filter(digits=2).count(), 6)
+        self.assertEqual(
+            list(rows.filter(number='123').values_list('slot', 'position')),
+            [('three_digit_back', 1), ('three_digit_front', 0)]
+        )
+
+    def test_draws_containing(self):
+        """Test lookups match the LIKE scan they replace"""
+        expected = LotteryDraw.objects.filter(
+            Q(two_digit='59') | Q(first_prize__contains='59')
+        ).values_list('draw_date', flat=True)
+        found = draws_containing('59')
+        self.assertEqual([row[0] for row in found], list(expected))
+        self.assertEqual(found[0][2], 'two_digit')
+        self.assertEqual(appearance_dates('123'), [self.today - timedelta(days=1), self.today - timedelta(days=16)])
+        self.assertEqual(len(draws_containing('123', limit=1)), 1)
+
+    def test_resave_and_backfill(self):
+        """Test re-saving replaces rows and backfill rebuilds the same table"""
+        self.service.save_draw(self.today - timedelta(days=1), {
+            'draw_round': '2', 'first_prize': '000001', 'two_digit': '34',
+            'three_digit_front': '', 'three_digit_back': '',
+        })
+        self.assertEqual(appearance_dates('12'), [self.today - timedelta(days=16)])
+        before = sorted(DrawNumber.objects.values_list('draw_date', 'number', 'slot', 'position'))
+
+        self.assertEqual(backfill_draw_numbers(batch_size=4), (2, len(before)))
+        after = sorted(DrawNumber.objects.values_list('draw_date', 'number', 'slot', 'position'))
+        self.assertEqual(before, after)
+
+    def test_number_detail_for_three_digits(self):
+        """Test the detail API returns 3D appearances"""
+        response = self.client.get(reverse('lotto_stats:api_number_detail', args=['123']))
+        appearances = response.json()['recent_appearances']
+        self.assertEqual([item['type'] for item in appearances], ['เลขท้าย 3 ตัว', 'เลขหน้า 3 ตัว'])
+
+
+class CountMatrixTests(TestCase):
+    """Test the prefix-sum count matrix"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        reset_appearance_index()
+        reset_count_matrix()
+        self.today = date.today()
+        self.draws = [
+            (self.today - timedelta(days=16 * i + 1), prize, prize[-2:], '123', '456,123')
+            for i, prize in enumerate(['123456', '561212', '999956', '345612', '121212'])
+        ]
+
+    def tearDown(self):
+        cache.clear()
+        reset_appearance_index()
+        reset_count_matrix()
+
+    def test_windows_match_rank(self):
+        """Test every window matches a direct count with the same tie order"""
+        matrix = DrawMatrix(self.draws)
+        counts = CountMatrix(matrix)
+        for days in (1, 17, 40, 60, 1000):
+            cutoff = self.today - timedelta(days=days)
+            window = matrix.rows_since(cutoff)
+            for number_type, size in (('2D', 100), ('3D', 1000)):
+                ranked, rows = counts.rank_since(number_type, cutoff)
+                self.assertEqual(rows, window)
+                self.assertEqual(ranked, DrawMatrix.rank(matrix.numbers(number_type, slice(0, window)), size))
+
+    def test_shared_matrix_rebuilds_when_draw_version_changes(self):
+        """Test draws saved by another process reach the shared matrix via the draw version"""
+        self.assertEqual(len(get_count_matrix()), 0)
+        for row in self.draws:
+            LotteryDraw.objects.create(draw_round='x', **dict(zip(DrawMatrix.FIELDS, row)))
+        invalidate_stats_cache()
+        self.assertEqual(len(get_count_matrix()), len(self.draws))
+
+    def test_series(self):
+        """Test the rolling frequency series and its API"""
+        for row in self.draws:
+            LotteryDraw.objects.create(draw_round='x', **dict(zip(DrawMatrix.FIELDS, row)))
+
+        series = StatsCalculator().get_frequency_series(numbers=['12', '123'], days=20, points=3)
+        self.assertEqual(len(series['labels']), 3)
+        self.assertEqual(series['labels'][-1], self.draws[0][0].strftime('%d/%m/%Y'))
+        # แต่ละจุดนับเฉพาะงวดภายใน 20 วันก่อนงวดนั้น (สองงวด)
+        self.assertEqual(series['datasets'][0], {'label': '12', 'data': [2, 3, 4]})
+        self.assertEqual(series['datasets'][1]['data'], [4, 4, 4])
+
+        response = self.client.get(reverse('lotto_stats:api_hot_cold_series'), {'days': 20, 'points': 2})
+        self.assertEqual(len(response.json()['labels']), 2)
+        self.assertEqual(response.json()['datasets'][0]['label'], '12')
+
+
+class BulkSyncTests(TestCase):
+    """Test the bulk LottoResult -> LotteryDraw sync"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        reset_appearance_index()
+        reset_count_matrix()
+        self.today = date.today()
+        self.dates = [self.today - timedelta(days=16 * i + 1) for i in range(4)]
+        for draw_date, first in zip(self.dates[:3], ['123456', '654321', None]):
+            result_data = {'first': first, 'last2': first[-2:], 'last3b': ['456', '789']} if first else {}
+            LottoResult.objects.create(draw_date=draw_date, result_data=result_data)
+        self.service = LottoSyncService()
+
+    def tearDown(self):
+        cache.clear()
+        reset_appearance_index()
+        reset_count_matrix()
+
+    def test_bulk_matches_per_date_sync(self):
+        """Test bulk sync writes the same rows as syncing date by date"""
+        self.service.sync_specific_date(self.dates[1])
+
+        result = self.service.sync_dates_bulk([d.isoformat() for d in self.dates])
+
+        self.assertTrue(result['success'])
+        self.assertEqual(
+            (result['created_count'], result['updated_count'], result['unchanged_count'], result['error_count']),
+            (1, 0, 1, 2)
+        )
+        self.assertIn('total', result['timings'])
+
+        draw = LotteryDraw.objects.get(draw_date=self.dates[0])
+        self.assertEqual((draw.first_prize, draw.two_digit, draw.three_digit_back), ('123456', '56', '456, 789'))
+        self.assertEqual(DrawNumber.objects.filter(draw=draw).count(), 8)
+        self.assertEqual(NumberStatistics.objects.get(number='456').total_appearances, 2)
+        self.assertEqual(StatsCalculator().get_number_statistics('56')['total_appearances'], 1)
+
+    def test_changed_and_forced_rows(self):
+        """Test changed draws are updated and unchanged ones only with force_update"""
+        self.service.sync_dates_bulk(self.dates)
+        LotteryDraw.objects.filter(draw_date=self.dates[0]).update(first_prize='000000')
+
+        result = self.service.sync_dates_bulk(self.dates)
+        self.assertEqual((result['updated_count'], result['unchanged_count']), (1, 1))
+        self.assertEqual(LotteryDraw.objects.get(draw_date=self.dates[0]).first_prize, '123456')
+
+        result = self.service.sync_dates_bulk(self.dates, force_update=True)
+        self.assertEqual((result['updated_count'], result['unchanged_count']), (2, 0))
+
+    def test_progress_reports_each_date(self):
+        """Test bulk sync reports every date to the job progress"""
+        job = BackgroundJob.objects.create(kind='lotto_stats.sync_recent')
+
+        self.service.sync_dates_bulk(self.dates, progress=JobProgress(job))
+
+        job.refresh_from_db()
+        self.assertEqual((job.total_items, job.processed_items, job.failed_items), (4, 4, 2))
+        self.assertTrue(job.item_statuses[self.dates[0].isoformat()]['ok'])
+        self.assertFalse(job.item_statuses[self.dates[3].isoformat()]['ok'])
+
+    def test_sync_all_draw_dates_one_by_one(self):
+        """Test the per-date path of sync_all_draw_dates reports progress like the bulk path"""
+        job = BackgroundJob.objects.create(kind='lotto_stats.sync_all')
+
+        with mock.patch('lotto_stats.lotto_sync_service.LOTTERY_DATES') as lottery_dates:
+            lottery_dates.get_all_draw_dates.return_value = [d.isoformat() for d in self.dates]
+            result = self.service.sync_all_draw_dates(bulk=False, progress=JobProgress(job))
+
+        self.assertTrue(result['success'])
+        self.assertEqual((result['synced_count'], result['error_count']), (2, 2))
+        self.assertEqual(LotteryDraw.objects.get(draw_date=self.dates[1]).first_prize, '654321')
+        job.refresh_from_db()
+        self.assertEqual((job.total_items, job.processed_items, job.failed_items), (4, 4, 2))
+
+
+class LottoResultPropagationTests(TestCase):
+    """Test LottoResult saves propagate to LotteryDraw"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        reset_appearance_index()
+        reset_count_matrix()
+        self.draw_date = date.today() - timedelta(days=1)
+
+    def tearDown(self):
+        cache.clear()
+        reset_appearance_index()
+        reset_count_matrix()
+
+    def test_valid_result_is_converted_after_commit(self):
+        """Test saving a valid result creates and later updates its draw"""
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            result = LottoResult.objects.create(
+                draw_date=self.draw_date, result_data={'first': '123456', 'last2': '56'}
+            )
+            self.assertFalse(LotteryDraw.objects.exists())
+        # แปลงเป็น LotteryDraw และคอมไพล์ตารางค้นหารางวัล (lottery_checker)
+        self.assertEqual(len(callbacks), 2)
+        self.assertEqual(LotteryDraw.objects.get(draw_date=self.draw_date).first_prize, '123456')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result.result_data = {'first': '654321', 'last2': '21'}
+            result.save()
+        self.assertEqual(LotteryDraw.objects.get(draw_date=self.draw_date).two_digit, '21')
+        self.assertEqual(NumberStatistics.objects.get(number='21').total_appearances, 1)
+
+    def test_invalid_result_is_ignored(self):
+        """Test results flagged invalid are not converted"""
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            LottoResult.objects.create(
+                draw_date=self.draw_date, result_data={'first': '123456'}, is_valid=False
+            )
+        # มีเฉพาะการคอมไพล์ตารางค้นหารางวัลของ lottery_checker
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse(LotteryDraw.objects.exists())
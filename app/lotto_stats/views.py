@@ -9,26 +9,43 @@ import logging
 from django.views.decorators.http import require_POST
 from django.contrib.admin.views.decorators import staff_member_required
 
-from .models import LotteryDraw, NumberStatistics, HotColdNumber
+from .models import DrawNumber, LotteryDraw, NumberStatistics, HotColdNumber
+from .draw_numbers import draws_containing
 from .stats_calculator import StatsCalculator
+from .stats_pipeline import StatsPipeline
+from .stats_cache import CachedStatsCalculator, get_draw_version, stats_cache
 from .lotto_sync_service import LottoSyncService
+from lottery_checker.http_cache import CachePolicy, conditional_cache, make_etag
+from lottery_checker.jobs import enqueue_job
 
 logger = logging.getLogger(__name__)
 
+# สถิติเปลี่ยนเมื่อมีงวดใหม่หรือข้ามวัน CDN เก็บได้ไม่นานแล้วตรวจซ้ำด้วย ETag
+STATS_CACHE_CONTROL = {'public': True, 'max_age': 60, 's_maxage': 600}
+
+def _stats_policy(request, *args, **kwargs):
+    """ETag ของ JSON สถิติ จาก URL, พารามิเตอร์, เวอร์ชันประวัติการออกรางวัล และวันนี้"""
+    return CachePolicy(
+        make_etag(request.path, request.GET.urlencode(), get_draw_version(), timezone.localdate()),
+        cache_control=STATS_CACHE_CONTROL
+    )
+
+def _build_statistics_bundle():
+    """คำนวณสถิติทุกแผงจากการอ่านประวัติครั้งเดียว พร้อมสถานะการซิงค์"""
+    pipeline = StatsPipeline()
+    bundle = pipeline.run()
+    bundle['sync_status'] = LottoSyncService().get_sync_status(draw_matrix=pipeline.matrix)
+    return bundle
+
 def statistics_page(request):
     """หน้าแสดงสถิติหวย"""
-    # ดึงข้อมูล 10 งวดล่าสุด
-    recent_draws = LotteryDraw.objects.order_by('-draw_date')[:10]
-    
-    # คำนวณสถิติ
-    calculator = StatsCalculator()
+    # ใช้ผลที่แคชไว้จนกว่าจะมีการซิงค์งวดใหม่
+    bundle = stats_cache.get_or_compute('statistics_page', _build_statistics_bundle)
     
-    # เลขฮอต/เย็น
-    hot_numbers = calculator.get_hot_numbers(limit=10, days=90)
-    cold_numbers = calculator.get_cold_numbers(limit=10)
-    
-    # สถิติรายเดือน
-    monthly_stats = calculator.get_monthly_statistics()
+    recent_draws = bundle['recent_draws']
+    hot_numbers = bundle['hot']
+    cold_numbers = bundle['cold']
+    monthly_stats = bundle['monthly']
     
     # เตรียมข้อมูลสำหรับ Chart.js
     hot_numbers_labels = json.dumps([item['number'] for item in hot_numbers])
@@ -49,16 +66,15 @@ def statistics_page(request):
         monthly_data_with_labels.append((month, count))
     
     # สถิติเพิ่มเติม
-    stats_summary = calculator.get_statistics_summary()
+    stats_summary = bundle['summary']
     
     # สถิติใหม่
-    running_number_stats = calculator.get_running_number_stats()
-    double_number_stats = calculator.get_double_number_stats()
-    sequential_number_stats = calculator.get_sequential_number_stats()
+    running_number_stats = bundle['running']
+    double_number_stats = bundle['double']
+    sequential_number_stats = bundle['sequential']
     
     # สถานะการซิงค์ข้อมูล
-    sync_service = LottoSyncService()
-    sync_status = sync_service.get_sync_status()
+    sync_status = bundle['sync_status']
     
     context = {
         'recent_draws': recent_draws,
@@ -81,12 +97,13 @@ def statistics_page(request):
     
     return render(request, 'lotto_stats/statistics.html', context)
 
+@conditional_cache(_stats_policy)
 def api_hot_cold_numbers(request):
     """API สำหรับดึงเลขฮอต/เย็น"""
     days = int(request.GET.get('days', 90))
     limit = int(request.GET.get('limit', 10))
     
-    calculator = StatsCalculator()
+    calculator = CachedStatsCalculator()
     
     data = {
         'hot_2d': calculator.get_hot_numbers(limit=limit, days=days, number_type='2D'),
@@ -98,39 +115,65 @@ def api_hot_cold_numbers(request):
     
     return JsonResponse(data)
 
+@conditional_cache(_stats_policy)
+def api_hot_cold_series(request):
+    """API สำหรับกราฟความถี่ย้อนหลังของเลข (รูปแบบ Chart.js)"""
+    try:
+        days = int(request.GET.get('days', 90))
+        points = int(request.GET.get('points', 24))
+        numbers = [n.strip() for n in request.GET.get('numbers', '').split(',') if n.strip()]
+        
+        calculator = CachedStatsCalculator()
+        
+        if not numbers:
+            # ไม่ระบุเลข ใช้เลขฮอต 5 อันดับแรกในช่วงเวลาเดียวกัน
+            numbers = [item['number'] for item in calculator.get_hot_numbers(limit=5, days=days)]
+        
+        return JsonResponse(calculator.get_frequency_series(numbers=numbers, days=days, points=points))
+        
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+@conditional_cache(_stats_policy)
 def api_number_detail(request, number):
     """API สำหรับดูรายละเอียดของเลข"""
     try:
-        # ดึงประวัติการออกของเลข
-        draws_with_number = []
-        
-        if len(number) == 2:
-            # เลข 2 ตัว
-            draws = LotteryDraw.objects.filter(
-                Q(two_digit=number) | 
-                Q(first_prize__contains=number)
-            ).order_by('-draw_date')[:20]
-            
-            for draw in draws:
-                draws_with_number.append({
-                    'date': draw.draw_date.strftime('%d/%m/%Y'),
-                    'type': 'เลขท้าย 2 ตัว' if draw.two_digit == number else 'ในรางวัลที่ 1',
-                    'first_prize': draw.first_prize
-                })
-        
-        # คำนวณสถิติ
-        calculator = StatsCalculator()
-        stats = calculator.get_number_statistics(number)
-        
-        return JsonResponse({
-            'number': number,
-            'statistics': stats,
-            'recent_appearances': draws_with_number
-        })
+        return JsonResponse(stats_cache.get_or_compute('number_detail', _number_detail, number=number))
         
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=400)
 
+def _number_detail(number):
+    """รายละเอียดของเลข: สถิติและงวดล่าสุดที่ออก"""
+    # ดึงประวัติการออกของเลขจากตาราง DrawNumber (ค้นหาด้วย index)
+    slot_labels = dict(DrawNumber.SLOT_CHOICES)
+    draws_with_number = [
+        {
+            'date': draw_date.strftime('%d/%m/%Y'),
+            'type': slot_labels[slot],
+            'first_prize': first_prize
+        }
+        for draw_date, first_prize, slot in draws_containing(number, limit=20)
+    ]
+    
+    # คำนวณสถิติ
+    calculator = StatsCalculator()
+    stats = calculator.get_number_statistics(number)
+    
+    return {
+        'number': number,
+        'statistics': stats,
+        'recent_appearances': draws_with_number
+    }
+
+def api_cache_stats(request):
+    """API สำหรับดูจำนวน hit/miss ของแคชสถิติ"""
+    return JsonResponse({
+        'success': True,
+        'draw_version': get_draw_version(),
+        'cache': stats_cache.stats()
+    })
+
 def api_sync_status(request):
     """API สำหรับดูสถานะการซิงค์ข้อมูล"""
     try:
@@ -159,27 +202,24 @@ def api_sync_status(request):
 @require_POST
 @staff_member_required
 def api_sync_data(request):
-    """API สำหรับซิงค์ข้อมูลจาก lottery_checker"""
+    """
+    API สำหรับซิงค์ข้อมูลจาก lottery_checker
+    สร้างงานในคิวแล้วตอบกลับทันที (worker: python manage.py run_jobs) ดูความคืบหน้าที่ progress_url
+    """
     try:
         data = json.loads(request.body)
-        days_back = data.get('days_back', 7)
-        force_update = data.get('force_update', False)
+        days_back = int(data.get('days_back', 7))
+        force_update = bool(data.get('force_update', False))
         
-        sync_service = LottoSyncService()
-        result = sync_service.sync_recent_data(days_back, force_update)
+        job = enqueue_job('lotto_stats.sync_recent', days_back=days_back, force_update=force_update)
         
-        # ตรวจสอบว่า result เป็น dict หรือไม่
-        if not isinstance(result, dict):
-            return JsonResponse({
-                'success': False,
-                'error': 'Invalid response format from sync service'
-            }, status=500)
-        
-        # ตรวจสอบว่า result มี key ที่จำเป็นหรือไม่
-        if 'success' not in result:
-            result['success'] = True  # ถ้าไม่มี success ให้เพิ่มเข้าไป
-        
-        return JsonResponse(result)
+        return JsonResponse({
+            'success': True,
+            'message': 'เพิ่มงานเข้าคิวแล้ว',
+            'job_id': job.pk,
+            'status': job.status,
+            'progress_url': job.get_absolute_url(),
+        }, status=202)
         
     except json.JSONDecodeError:
         return JsonResponse({
@@ -2,6 +2,7 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.contrib.auth.models import User
 from news.models import NewsArticle, NewsCategory, LuckyNumberHint
+from dreams.keyword_matcher import get_keyword_matcher
 from dreams.models import DreamKeyword, DreamCategory
 import requests
 from bs4 import BeautifulSoup
@@ -616,50 +617,24 @@ class Command(BaseCommand):
         
         title_lower = title.lower()
         
-        # ค้นหา keywords ที่ตรงกับในฐานข้อมูล DreamKeyword
-        # เรียงลำดับตามความยาวของ keyword (ยาวที่สุดก่อน) เพื่อจับคำที่เฉพาะเจาะจงมากกว่า
-        all_keywords = sorted(DreamKeyword.objects.all(), key=lambda x: len(x.keyword), reverse=True)
+        # ค้นหา keywords ที่ตรงกับในฐานข้อมูล DreamKeyword ด้วย automaton ที่ใช้ร่วมกับระบบความฝัน
+        # เรียงคำที่ยาวกว่าก่อน เพื่อจับคำที่เฉพาะเจาะจงมากกว่า
+        matched = sorted(get_keyword_matcher().keywords_in(title_lower), key=lambda x: len(x.keyword), reverse=True)
         
-        matched_positions = []  # เก็บตำแหน่งที่จับได้แล้ว เพื่อไม่ให้ซ้ำ
-        
-        for keyword_obj in all_keywords:
-            keyword = keyword_obj.keyword.lower()
+        for keyword_obj in matched:
+            found_keywords.append(keyword_obj.keyword)
             
-            # ค้นหาคำที่ตรงกันทั้งคำ และไม่ซ้อนทับกับคำที่จับแล้ว
-            if keyword in title_lower:
-                # หาตำแหน่งทั้งหมดที่พบคำนี้
-                start_idx = 0
-                while True:
-                    idx = title_lower.find(keyword, start_idx)
-                    if idx == -1:
-                        break
-                    
-                    start, end = idx, idx + len(keyword)
-                    
-                    # ตรวจสอบว่าเป็นคำสมบูรณ์
-                    is_valid_match = True
-                    
-                    # ตรวจสอบว่าตำแหน่งนี้ถูกจับแล้วหรือไม่
-                    overlap = any(start < pos_end and end > pos_start for pos_start, pos_end in matched_positions)
-                    
-                    if not overlap and is_valid_match:
-                        matched_positions.append((start, end))
-                        found_keywords.append(keyword_obj.keyword)
-                        
-                        # เก็บข้อมูลเลขเด่น/เลขรอง เฉพาะคำที่พบ
-                        matched_keywords_info.append({
-                            'keyword': keyword_obj.keyword,
-                            'category': keyword_obj.category.name,
-                            'main_number': keyword_obj.main_number,
-                            'secondary_number': keyword_obj.secondary_number,
-                            'common_numbers': keyword_obj.get_numbers_list()
-                        })
-                        
-                        # เพิ่มเลขที่มักตี
-                        numbers.extend(keyword_obj.get_numbers_list())
-                        break  # เจอแล้วครั้งแรกก็พอ
-                    
-                    start_idx = idx + 1
+            # เก็บข้อมูลเลขเด่น/เลขรอง เฉพาะคำที่พบ
+            matched_keywords_info.append({
+                'keyword': keyword_obj.keyword,
+                'category': keyword_obj.category.name,
+                'main_number': keyword_obj.main_number,
+                'secondary_number': keyword_obj.secondary_number,
+                'common_numbers': keyword_obj.get_numbers_list()
+            })
+            
+            # เพิ่มเลขที่มักตี
+            numbers.extend(keyword_obj.get_numbers_list())
         
         # ลบเลขซ้ำและเรียงลำดับ
         numbers = list(dict.fromkeys(numbers))
@@ -789,15 +764,11 @@ class Command(BaseCommand):
         
         # 2. ตรวจสอบคำสำคัญจาก DreamKeyword (2 คะแนน)
         try:
-            from dreams.models import DreamKeyword
-            
-            dream_keywords = DreamKeyword.objects.all()
             found_dream_keywords = []
             
-            for dk in dream_keywords:
-                if dk.keyword.lower() in full_text:
-                    found_dream_keywords.append(dk.keyword)
-                    all_numbers.extend(dk.get_numbers_list())
+            for dk in get_keyword_matcher().keywords_in(full_text):
+                found_dream_keywords.append(dk.keyword)
+                all_numbers.extend(dk.get_numbers_list())
             
             if found_dream_keywords:
                 score += 2